@@ -1,6 +1,13 @@
-from scipy import stats
 import numpy as np
 import pandas as pd
+from analysis.ttest_analysis import welch_ttest_from_moments
+from analysis.resampling import resampling_tests
+from strategies.registry import SIGNAL_COLUMNS
+from utils.tracing import traced
+
+# Signal types a signal column can be filtered by; SIGNAL_COLUMNS (indicator
+# name -> signal column) lists the indicators registered in strategies.registry
+SIGNAL_TYPES = ["All", "Buy", "Sell"]
 
 def remove_outliers(returns: pd.Series, threshold: float = 3.0) -> pd.Series:
     """
@@ -31,14 +38,17 @@ def filter_returns_by_signal(data: pd.DataFrame, signal_column: str, signal_type
     Returns:
         Series of filtered returns
     """
+    # Select only the Return column so the wide frame is never copied
     if signal_type == "Buy":
-        return data[data[signal_column] == 1]["Return"].dropna()
+        return data.loc[data[signal_column] == 1, "Return"].dropna()
     elif signal_type == "Sell":
-        return data[data[signal_column] == -1]["Return"].dropna()
+        return data.loc[data[signal_column] == -1, "Return"].dropna()
     else:  # All
-        return data[data[signal_column] != 0]["Return"].dropna()
+        return data.loc[data[signal_column] != 0, "Return"].dropna()
 
-def compare_indicators(data: pd.DataFrame, indicator1: str, indicator2: str, signal1: str = "All", signal2: str = "All") -> dict:
+@traced()
+def compare_indicators(data: pd.DataFrame, indicator1: str, indicator2: str, signal1: str = "All", signal2: str = "All",
+                       all_pairs: dict = None, n_resamples: int = 0, block_size: int = None, seed=None) -> dict:
     """
     Compare two specific indicators using standard t-tests with signal type filtering
     
@@ -48,42 +58,185 @@ def compare_indicators(data: pd.DataFrame, indicator1: str, indicator2: str, sig
         indicator2: Second indicator name ("RSI", "MACD", "Bollinger")
         signal1: Signal type for first indicator ("All", "Buy", "Sell")
         signal2: Signal type for second indicator ("All", "Buy", "Sell")
+        all_pairs: Result of compare_all_indicators for data; if given, the
+            comparison is read from it instead of re-filtering the frame
+        n_resamples: Bootstrap and permutation resamples to add alongside the t-test (0 to skip)
+        block_size: Bootstrap block length (default: n ** (1/3))
+        seed: Seed for the resampling random streams
         
     Returns:
         Dictionary with comparison results
     """
-    # Map indicator names to signal columns
-    signal_columns = {
-        "RSI": "RSI_Signal",
-        "MACD": "MACD_Strategy_Signal", 
-        "Bollinger": "BB_Strategy_Signal"
-    }
-    
-    # Get filtered returns for each indicator strategy based on signal types
-    returns1 = filter_returns_by_signal(data, signal_columns[indicator1], signal1)
-    returns2 = filter_returns_by_signal(data, signal_columns[indicator2], signal2)
-    
     # Generate comparison key with signal types
     comparison_key = f"{indicator1}_{signal1} vs {indicator2}_{signal2}"
     
+    if all_pairs is not None:
+        group1, group2 = f"{indicator1}_{signal1}", f"{indicator2}_{signal2}"
+        groups = all_pairs["statistics"]
+        n1, mean1 = int(groups.loc[group1, "count"]), groups.loc[group1, "mean"]
+        n2, mean2 = int(groups.loc[group2, "count"]), groups.loc[group2, "mean"]
+        t_stat = all_pairs["t_statistic"].loc[group1, group2]
+        p_val = all_pairs["p_value"].loc[group1, group2]
+    else:
+        # Get filtered returns for each indicator strategy based on signal types
+        returns1 = filter_returns_by_signal(data, SIGNAL_COLUMNS[indicator1], signal1)
+        returns2 = filter_returns_by_signal(data, SIGNAL_COLUMNS[indicator2], signal2)
+        n1, n2 = len(returns1), len(returns2)
+        if n1 >= 2 and n2 >= 2:
+            from scipy import stats
+            t_stat, p_val = stats.ttest_ind(returns1, returns2, equal_var=False)
+            mean1, mean2 = returns1.mean(), returns2.mean()
+    
     results = {}
     
     # Perform comparison if we have at least 2 observations for each group
-    if len(returns1) >= 2 and len(returns2) >= 2:
-        t_stat, p_val = stats.ttest_ind(returns1, returns2, equal_var=False)
+    if n1 >= 2 and n2 >= 2:
         results[comparison_key] = {
             't_statistic': t_stat,
             'p_value': p_val,
-            f'{indicator1.lower()}_mean': returns1.mean(),
-            f'{indicator2.lower()}_mean': returns2.mean(),
-            f'{indicator1.lower()}_count': len(returns1),
-            f'{indicator2.lower()}_count': len(returns2),
+            f'{indicator1.lower()}_mean': mean1,
+            f'{indicator2.lower()}_mean': mean2,
+            f'{indicator1.lower()}_count': n1,
+            f'{indicator2.lower()}_count': n2,
             'winner': determine_winner_simple(t_stat, p_val, indicator1, indicator2),
             'significance': get_significance_level(p_val)
         }
+        
+        # Distribution-free checks for fat-tailed, autocorrelated returns
+        if n_resamples:
+            if all_pairs is not None:
+                returns1 = filter_returns_by_signal(data, SIGNAL_COLUMNS[indicator1], signal1)
+                returns2 = filter_returns_by_signal(data, SIGNAL_COLUMNS[indicator2], signal2)
+            results[comparison_key].update(resampling_tests(returns1.to_numpy(), returns2.to_numpy(), n_resamples,
+                                                            block_size=block_size, seed=seed))
     
     return results
 
+def signal_group_moments(signals: np.ndarray, returns: np.ndarray) -> dict:
+    """
+    Count, mean and sample variance of returns for every (indicator, signal type) group
+    
+    Buy and Sell sums come from one matrix product over the time axis and
+    All is their sum, so the returns are read once however many groups
+    there are. Sums are taken around the mean return to keep the
+    variances accurate.
+    
+    Args:
+        signals: Signal array of shape (..., indicators, time)
+        returns: Returns of shape (..., time); NaN returns are left out
+        
+    Returns:
+        Dict of count, mean and var arrays of shape (..., indicators * 3),
+        ordered All, Buy, Sell within each indicator
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    valid = ~np.isnan(returns)
+    shift = np.where(valid, returns, 0.0).sum(axis=-1, keepdims=True) / np.maximum(valid.sum(axis=-1, keepdims=True), 1)
+    centered = np.where(valid, returns - shift, 0.0)
+    
+    masks = np.stack([signals == 1, signals == -1], axis=-2) & valid[..., None, None, :]
+    masks = masks.astype(np.float64)
+    count = masks.sum(axis=-1)
+    total = (masks @ centered[..., None, :, None])[..., 0]
+    total_sq = (masks @ (centered ** 2)[..., None, :, None])[..., 0]
+    
+    # All = Buy + Sell; groups end up ordered (All, Buy, Sell) per indicator
+    count, total, total_sq = (np.concatenate([a.sum(axis=-1, keepdims=True), a], axis=-1)
+                              for a in (count, total, total_sq))
+    shape = count.shape[:-2] + (-1,)
+    count, total, total_sq = count.reshape(shape), total.reshape(shape), total_sq.reshape(shape)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centered_mean = total / count
+        var = (total_sq - count * centered_mean ** 2) / (count - 1)
+    return {"count": count, "mean": centered_mean + shift, "var": var}
+
+def _pairwise_welch(moments: dict) -> tuple:
+    # Broadcast every group against every other group: (..., groups, groups)
+    first = [m[..., :, None] for m in (moments["count"], moments["mean"], moments["var"])]
+    second = [m[..., None, :] for m in (moments["count"], moments["mean"], moments["var"])]
+    return welch_ttest_from_moments(*first, *second)
+
+def _group_labels(indicators: list) -> list:
+    return [f"{indicator}_{signal_type}" for indicator in indicators for signal_type in SIGNAL_TYPES]
+
+@traced()
+def compare_all_indicators(data: pd.DataFrame, indicators: list = None) -> dict:
+    """
+    Welch t-tests between every pair of (indicator, signal type) groups at once
+    
+    Args:
+        data: DataFrame with all indicator signals and returns
+        indicators: Indicator names to include (default: all of SIGNAL_COLUMNS)
+        
+    Returns:
+        Dictionary with 'statistics' (count, mean, var per group) and
+        't_statistic' / 'p_value' DataFrames indexed by group on both axes,
+        with the row group as the first sample
+    """
+    indicators = list(indicators or SIGNAL_COLUMNS)
+    signals = np.stack([data[SIGNAL_COLUMNS[name]].to_numpy() for name in indicators])
+    moments = signal_group_moments(signals, data["Return"].to_numpy(dtype=np.float64))
+    t_stat, p_val = _pairwise_welch(moments)
+    
+    labels = _group_labels(indicators)
+    return {
+        'statistics': pd.DataFrame(moments, index=labels),
+        't_statistic': pd.DataFrame(t_stat, index=labels, columns=labels),
+        'p_value': pd.DataFrame(p_val, index=labels, columns=labels)
+    }
+
+@traced()
+def compare_all_indicators_batch(frames: dict, indicators: list = None, batch_size: int = 256) -> dict:
+    """
+    All-pairs Welch t-tests for many tickers, as arrays stacked along a ticker axis
+    
+    Frames are padded to a common length and processed batch_size tickers
+    at a time, so the whole universe costs one pass over its returns.
+    
+    Args:
+        frames: Dict of ticker -> DataFrame with signals and returns
+        indicators: Indicator names to include (default: all of SIGNAL_COLUMNS)
+        batch_size: Tickers processed per matrix product
+        
+    Returns:
+        Dictionary with 'tickers', 'groups', 'count' / 'mean' / 'var' arrays
+        of shape (tickers, groups) and 't_statistic' / 'p_value' arrays of
+        shape (tickers, groups, groups)
+    """
+    indicators = list(indicators or SIGNAL_COLUMNS)
+    tickers = list(frames)
+    labels = _group_labels(indicators)
+    n_groups = len(labels)
+    
+    results = {name: np.empty((len(tickers), n_groups)) for name in ("count", "mean", "var")}
+    results.update({name: np.empty((len(tickers), n_groups, n_groups)) for name in ("t_statistic", "p_value")})
+    
+    for start in range(0, len(tickers), batch_size):
+        batch = tickers[start:start + batch_size]
+        length = max((len(frames[ticker]) for ticker in batch), default=0)
+        signals = np.zeros((len(batch), len(indicators), length), dtype=np.int8)
+        returns = np.full((len(batch), length), np.nan)
+        # Right-align so every ticker ends on its latest bar
+        for row, ticker in enumerate(batch):
+            data = frames[ticker]
+            n = len(data)
+            if not n:
+                continue
+            returns[row, length - n:] = data["Return"].to_numpy(dtype=np.float64)
+            for col, name in enumerate(indicators):
+                signals[row, col, length - n:] = data[SIGNAL_COLUMNS[name]].to_numpy()
+        
+        moments = signal_group_moments(signals, returns)
+        t_stat, p_val = _pairwise_welch(moments)
+        rows = slice(start, start + len(batch))
+        for name, values in moments.items():
+            results[name][rows] = values
+        results["t_statistic"][rows] = t_stat
+        results["p_value"][rows] = p_val
+    
+    return {'tickers': tickers, 'groups': labels, **results}
+
 def get_significance_level(p_value: float) -> str:
     """
     Determine significance level based on p-value
@@ -127,6 +280,7 @@ def determine_winner_simple(t_statistic: float, p_value: float, indicator1: str,
     else:
         return 'Inconclusive'
 
+@traced()
 def rank_indicators(comparison_results: dict) -> list:
     """
     Rank indicators based on their performance in comparisons
@@ -137,7 +291,7 @@ def rank_indicators(comparison_results: dict) -> list:
     Returns:
         List of indicators ranked by performance
     """
-    indicator_scores = {'RSI': 0, 'MACD': 0, 'Bollinger': 0}
+    indicator_scores = {name: 0 for name in SIGNAL_COLUMNS}
     
     for comparison, result in comparison_results.items():
         if result['significance'] != 'Not Significant (p ≥ 0.1)' and result['winner'] != 'Inconclusive':
@@ -150,6 +304,7 @@ def rank_indicators(comparison_results: dict) -> list:
     
     return ranked_indicators
 
+@traced()
 def get_indicator_summary(data: pd.DataFrame) -> dict:
     """
     Get summary statistics for each indicator
@@ -160,29 +315,16 @@ def get_indicator_summary(data: pd.DataFrame) -> dict:
     Returns:
         Dictionary with summary statistics
     """
-    rsi_returns = data[data["RSI_Signal"] != 0]["Return"].dropna()
-    macd_returns = data[data["MACD_Strategy_Signal"] != 0]["Return"].dropna()
-    bb_returns = data[data["BB_Strategy_Signal"] != 0]["Return"].dropna()
-    
-    summary = {
-        'RSI': {
-            'mean_return': rsi_returns.mean(),
-            'std_return': rsi_returns.std(),
-            'count': len(rsi_returns),
-            'total_return': rsi_returns.sum()
-        },
-        'MACD': {
-            'mean_return': macd_returns.mean(),
-            'std_return': macd_returns.std(),
-            'count': len(macd_returns),
-            'total_return': macd_returns.sum()
-        },
-        'Bollinger': {
-            'mean_return': bb_returns.mean(),
-            'std_return': bb_returns.std(),
-            'count': len(bb_returns),
-            'total_return': bb_returns.sum()
+    summary = {}
+    for name, column in SIGNAL_COLUMNS.items():
+        if column not in data:
+            continue
+        returns = filter_returns_by_signal(data, column, "All")
+        summary[name] = {
+            'mean_return': returns.mean(),
+            'std_return': returns.std(),
+            'count': len(returns),
+            'total_return': returns.sum()
         }
-    }
     
     return summary
@@ -0,0 +1,249 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from strategies.signal_kernels import (BUY, SELL, pct_change, rsi_signal_kernel,
+                                       macd_signal_kernel, bollinger_signal_kernel)
+from analysis.ttest_analysis import welch_ttest_from_moments
+from utils.helpers import get_close_prices
+from utils.indicator_kernels import ema, rolling_mean, rolling_std, rsi
+
+# Parameters used by the strategy modules; a grid left as None sweeps only these
+DEFAULT_GRIDS = {
+    "RSI": {"window": [14], "lower_quantile": [0.25], "upper_quantile": [0.75]},
+    "MACD": {"fast": [12], "slow": [26], "signal": [9]},
+    "Bollinger": {"window": [20], "num_std": [2]},
+}
+
+PARAMETER_COLUMNS = ["window", "lower_quantile", "upper_quantile", "fast", "slow", "signal", "num_std"]
+
+def expand_grid(grid: dict) -> list:
+    """
+    Expand a parameter grid into a list of parameter dicts
+
+    Args:
+        grid: Dict of parameter name -> list of values
+
+    Returns:
+        List of dicts, one per combination
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+def rolling_mean_batch(values: np.ndarray, windows) -> np.ndarray:
+    """
+    Rolling means of one series for many windows at once
+
+    Uses the same window kernel as the strategy modules, so every
+    variant matches what the strategy would compute on its own.
+
+    Args:
+        values: 1-D array
+        windows: Sequence of window lengths
+
+    Returns:
+        Array of shape (len(windows), len(values)), NaN during each warm-up
+    """
+    out = np.empty((len(windows), len(values)))
+    for row, window in enumerate(windows):
+        out[row] = rolling_mean(values, window)
+    return out
+
+def rolling_std_batch(values: np.ndarray, windows) -> np.ndarray:
+    """
+    Rolling sample standard deviations (ddof=1) of one series for many windows at once
+
+    Args:
+        values: 1-D array
+        windows: Sequence of window lengths
+
+    Returns:
+        Array of shape (len(windows), len(values)), NaN during each warm-up
+    """
+    out = np.empty((len(windows), len(values)))
+    for row, window in enumerate(windows):
+        out[row] = rolling_std(values, window)
+    return out
+
+def ema_batch(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    EMA matching pandas ewm(span=span).mean() along the last axis
+
+    Args:
+        values: 1-D or 2-D array (rows are independent series)
+        span: EMA span
+
+    Returns:
+        Array with the same shape as values
+    """
+    return ema(values, span)[0]
+
+def rsi_batch(close: np.ndarray, windows) -> np.ndarray:
+    """
+    RSI (rolling-mean gains and losses, like calculate_rsi) for many windows
+
+    Args:
+        close: 1-D array of closing prices
+        windows: Sequence of RSI windows
+
+    Returns:
+        Array of shape (len(windows), len(close))
+    """
+    out = np.empty((len(windows), len(close)))
+    for row, window in enumerate(windows):
+        out[row] = rsi(close, window)
+    return out
+
+def signal_statistics(signals: np.ndarray, returns: np.ndarray) -> dict:
+    """
+    Signal counts, mean returns and a Buy vs Sell Welch t-test for every row of signals
+
+    Args:
+        signals: int8 array of shape (variants, time)
+        returns: 1-D array of returns aligned with the time axis
+
+    Returns:
+        Dict of 1-D arrays, one value per variant
+    """
+    valid = ~np.isnan(returns)
+    shift = returns[valid].mean() if valid.any() else 0.0
+    centered = np.where(valid, returns - shift, 0.0)
+
+    moments = {}
+    for name, mask in (("buy", signals == BUY), ("sell", signals == SELL), ("all", signals != 0)):
+        mask = (mask & valid).astype(np.float64)
+        count = mask.sum(axis=-1)
+        total = mask @ centered
+        total_sq = mask @ centered ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = total / count
+            variance = (total_sq - count * mean ** 2) / (count - 1)
+        moments[name] = (count, mean + shift, variance)
+
+    t_stat, p_val = welch_ttest_from_moments(*moments["buy"], *moments["sell"])
+    return {
+        "buy_count": moments["buy"][0].astype(np.int64),
+        "sell_count": moments["sell"][0].astype(np.int64),
+        "signal_count": moments["all"][0].astype(np.int64),
+        "mean_return": moments["all"][1],
+        "buy_mean_return": moments["buy"][1],
+        "sell_mean_return": moments["sell"][1],
+        "t_statistic": t_stat,
+        "p_value": p_val,
+    }
+
+def _rsi_signals(combos: list, close: np.ndarray, price_change: np.ndarray, warmup: int) -> np.ndarray:
+    windows = sorted({c["window"] for c in combos})
+    rsi = rsi_batch(close, windows)
+    row_of = {w: i for i, w in enumerate(windows)}
+
+    signals = np.empty((len(combos), len(close) - warmup), dtype=np.int8)
+    # Quantile thresholds are scalars per kernel call, so group variants by them
+    groups = {}
+    for i, combo in enumerate(combos):
+        groups.setdefault((combo["lower_quantile"], combo["upper_quantile"]), []).append(i)
+    for (lower_q, upper_q), rows in groups.items():
+        variants = rsi[[row_of[combos[i]["window"]] for i in rows]]
+        signals[rows] = rsi_signal_kernel(variants[:, warmup:], close[warmup:], price_change[warmup:],
+                                          lower_quantile=lower_q, upper_quantile=upper_q)
+    return signals
+
+def _macd_signals(combos: list, close: np.ndarray, price_change: np.ndarray, warmup: int) -> np.ndarray:
+    emas = {span: ema_batch(close, span) for span in sorted({c["fast"] for c in combos} | {c["slow"] for c in combos})}
+    pairs = sorted({(c["fast"], c["slow"]) for c in combos})
+    pair_row = {pair: i for i, pair in enumerate(pairs)}
+    macd_lines = np.stack([emas[fast] - emas[slow] for fast, slow in pairs])
+
+    macd = np.empty((len(combos), len(close)))
+    signal_lines = np.empty((len(combos), len(close)))
+    for span in sorted({c["signal"] for c in combos}):
+        rows = [i for i, c in enumerate(combos) if c["signal"] == span]
+        lines = macd_lines[[pair_row[(combos[i]["fast"], combos[i]["slow"])] for i in rows]]
+        macd[rows] = lines
+        signal_lines[rows] = ema_batch(lines, span)
+    return macd_signal_kernel(macd[:, warmup:], signal_lines[:, warmup:], close[warmup:], price_change[warmup:])
+
+def _bollinger_signals(combos: list, close: np.ndarray, price_change: np.ndarray, warmup: int) -> np.ndarray:
+    windows = sorted({c["window"] for c in combos})
+    row_of = {w: i for i, w in enumerate(windows)}
+    means = rolling_mean_batch(close, windows)
+    stds = rolling_std_batch(close, windows)
+
+    rows = [row_of[c["window"]] for c in combos]
+    num_std = np.array([c["num_std"] for c in combos], dtype=np.float64)[:, None]
+    means, stds = means[rows, warmup:], stds[rows, warmup:]
+    upper = means + stds * num_std
+    lower = means - stds * num_std
+    return bollinger_signal_kernel(close[warmup:], lower, upper, price_change[warmup:])
+
+_SIGNAL_BUILDERS = {
+    "RSI": _rsi_signals,
+    "MACD": _macd_signals,
+    "Bollinger": _bollinger_signals,
+}
+
+def _sweep_chunk(indicator: str, combos: list, close: np.ndarray, returns: np.ndarray, warmup: int = 0) -> pd.DataFrame:
+    # Indicators see every bar; signals and statistics skip the warm-up bars
+    price_change = pct_change(close)
+    signals = _SIGNAL_BUILDERS[indicator](combos, close, price_change, warmup)
+    table = pd.DataFrame(combos)
+    table.insert(0, "indicator", indicator)
+    for name, values in signal_statistics(signals, returns[warmup:]).items():
+        table[name] = values
+    return table
+
+def sweep_parameters(data: pd.DataFrame, rsi_grid: dict = None, macd_grid: dict = None,
+                     bollinger_grid: dict = None, batch_size: int = 256, n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Evaluate every parameter combination of the RSI, MACD and Bollinger strategies
+
+    Indicator variants are computed together as 2-D arrays (variants x time)
+    and signals use the same kernels as the strategy modules. For each
+    combination the table reports signal counts, mean returns and a Welch
+    t-test of returns on Buy days against returns on Sell days.
+
+    Bars before data.attrs["analysis_start"] (the warm-up added by
+    fetch_data) only warm up the indicators, as in build_indicator_frame,
+    so the default parameters reproduce the comparison's statistics.
+
+    Args:
+        data: DataFrame with Close and Return columns, e.g. the output of fetch_data
+        rsi_grid: Dict with lists for window, lower_quantile, upper_quantile
+        macd_grid: Dict with lists for fast, slow, signal (combinations with fast >= slow are skipped)
+        bollinger_grid: Dict with lists for window, num_std
+        batch_size: Maximum variants held in memory at once per indicator
+        n_jobs: Number of worker processes (1 runs in-process)
+
+    Returns:
+        DataFrame with one row per parameter combination
+    """
+    close = get_close_prices(data).to_numpy(dtype=np.float64)
+    returns = data["Return"].to_numpy(dtype=np.float64)
+    analysis_start = data.attrs.get("analysis_start")
+    warmup = 0 if analysis_start is None else int(data.index.searchsorted(analysis_start))
+
+    grids = {
+        "RSI": rsi_grid or DEFAULT_GRIDS["RSI"],
+        "MACD": macd_grid or DEFAULT_GRIDS["MACD"],
+        "Bollinger": bollinger_grid or DEFAULT_GRIDS["Bollinger"],
+    }
+    tasks = []
+    for indicator, grid in grids.items():
+        combos = expand_grid({**DEFAULT_GRIDS[indicator], **grid})
+        if indicator == "MACD":
+            combos = [c for c in combos if c["fast"] < c["slow"]]
+        for start in range(0, len(combos), batch_size):
+            tasks.append((indicator, combos[start:start + batch_size]))
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(_sweep_chunk, indicator, combos, close, returns, warmup)
+                       for indicator, combos in tasks]
+            tables = [future.result() for future in futures]
+    else:
+        tables = [_sweep_chunk(indicator, combos, close, returns, warmup) for indicator, combos in tasks]
+
+    table = pd.concat(tables, ignore_index=True)
+    parameter_columns = [c for c in PARAMETER_COLUMNS if c in table.columns]
+    other_columns = [c for c in table.columns if c not in parameter_columns and c != "indicator"]
+    return table[["indicator"] + parameter_columns + other_columns]
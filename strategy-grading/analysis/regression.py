@@ -0,0 +1,264 @@
+import numpy as np
+import pandas as pd
+from utils.indicator_kernels import DEFAULT_CHUNK_SIZE
+from utils.tracing import traced
+
+# Regressors built from the frame of build_indicator_frame. The three
+# Bollinger bands are collinear (upper + lower = 2 * middle) and on the
+# price scale, so they enter as %B and relative bandwidth instead.
+REGRESSION_FEATURES = ["RSI", "MACD", "MACD_Signal", "BB_PercentB", "BB_Bandwidth",
+                       "RSI_Signal", "MACD_Strategy_Signal", "BB_Strategy_Signal"]
+
+# A column whose R diagonal is below this fraction of its norm is a linear
+# combination of the columns before it and is left out of the fit
+ALIASED_TOLERANCE = 1e-7
+
+def feature_values(data: pd.DataFrame, name: str) -> np.ndarray:
+    """
+    Values of one regressor, deriving the Bollinger ratios from the bands
+
+    Args:
+        data: Frame from build_indicator_frame
+        name: Column name or "BB_PercentB" / "BB_Bandwidth"
+
+    Returns:
+        Float array with one value per bar
+    """
+    if name in ("BB_PercentB", "BB_Bandwidth"):
+        upper = data["BB_Upper"].to_numpy(dtype=np.float64)
+        lower = data["BB_Lower"].to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if name == "BB_PercentB":
+                return (data["Close"].to_numpy(dtype=np.float64) - lower) / (upper - lower)
+            return (upper - lower) / data["BB_Middle"].to_numpy(dtype=np.float64)
+    return data[name].to_numpy(dtype=np.float64)
+
+def design_matrix(data: pd.DataFrame, features: list = None, horizon: int = 1, after=None) -> tuple:
+    """
+    Regressors and forward returns of one indicator frame
+
+    The target of bar t is the return from its close to the close
+    horizon bars later, the profit of acting on bar t's indicators. The
+    last horizon bars have no target yet, and rows with a missing value
+    are dropped.
+
+    Args:
+        data: Frame from build_indicator_frame
+        features: Regressor names (default: REGRESSION_FEATURES); an
+            intercept column is always added first
+        horizon: Bars between the signal and the close it is paid at
+        after: Only return rows with a later timestamp (for incremental updates)
+
+    Returns:
+        Tuple of (X of shape (rows, 1 + features), y of shape (rows,), index of the rows)
+    """
+    features = list(features or REGRESSION_FEATURES)
+    close = data["Close"].to_numpy(dtype=np.float64)
+    target = np.full(len(close), np.nan)
+    target[:len(close) - horizon] = close[horizon:] / close[:-horizon] - 1
+    X = np.empty((len(close), len(features) + 1))
+    X[:, 0] = 1.0
+    for column, name in enumerate(features, start=1):
+        X[:, column] = feature_values(data, name)
+
+    rows = ~(np.isnan(X).any(axis=1) | np.isnan(target))
+    if after is not None:
+        rows &= data.index > after
+    return X[rows], target[rows], data.index[rows]
+
+class OLSAccumulator:
+    """
+    Least-squares fits of many series, updated as new rows arrive
+
+    Each series keeps the R factor of the QR decomposition of its rows of
+    [X y], a (k + 1) x (k + 1) triangle that holds everything OLS needs:
+    stacking new rows under it and taking the R factor again gives the
+    decomposition of all rows so far. Updates for all series are one
+    batched np.linalg.qr call on the stacked blocks, and the fit solves
+    the triangles without ever forming X'X, so the conditioning is that
+    of X rather than its square. The mean and spread of y are merged in
+    alongside for R².
+
+    Args:
+        columns: Regressor names, intercept included
+        series: Series labels, e.g. tickers (default: a single unnamed series)
+    """
+
+    def __init__(self, columns: list, series: list = None):
+        self.columns = list(columns)
+        self.series = list(series) if series is not None else [None]
+        k = len(self.columns) + 1
+        self.r = np.zeros((len(self.series), k, k))
+        self.count = np.zeros(len(self.series), dtype=np.int64)
+        self.mean_y = np.zeros(len(self.series))
+        self.m2_y = np.zeros(len(self.series))
+        # Timestamp of the last row added per series, for incremental updates
+        self.last = {}
+
+    def add_series(self, series: list):
+        """Start empty fits for series not seen before"""
+        new = [label for label in series if label not in self.series]
+        if new:
+            k = len(self.columns) + 1
+            self.series.extend(new)
+            self.r = np.concatenate([self.r, np.zeros((len(new), k, k))])
+            self.count = np.concatenate([self.count, np.zeros(len(new), dtype=np.int64)])
+            self.mean_y = np.concatenate([self.mean_y, np.zeros(len(new))])
+            self.m2_y = np.concatenate([self.m2_y, np.zeros(len(new))])
+
+    def update(self, X: np.ndarray, y: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE) -> "OLSAccumulator":
+        """
+        Add rows to every series
+
+        Args:
+            X: Regressors of shape (series, rows, columns), or (rows, columns)
+                for a single series; rows containing NaN are skipped, so
+                series with fewer rows can be padded with NaN
+            y: Targets of shape (series, rows), or (rows,)
+            chunk_size: Rows per QR update
+
+        Returns:
+            self
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if X.ndim == 2:
+            X, y = X[None], y[None]
+        for start in range(0, X.shape[1], chunk_size):
+            block_x, block_y = X[:, start:start + chunk_size], y[:, start:start + chunk_size]
+            valid = ~(np.isnan(block_x).any(axis=-1) | np.isnan(block_y))
+            # Zero rows leave the R factor unchanged
+            rows = np.where(valid[..., None], np.concatenate([block_x, block_y[..., None]], axis=-1), 0.0)
+            self.r = np.linalg.qr(np.concatenate([self.r, rows], axis=1), mode="r")
+
+            # Chan et al. merge of the y count, mean and squared deviations
+            count = valid.sum(axis=-1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = np.where(count > 0, np.where(valid, block_y, 0.0).sum(axis=-1) / count, 0.0)
+                m2 = np.where(valid, block_y - mean[:, None], 0.0) ** 2
+                total = self.count + count
+                delta = mean - self.mean_y
+                self.mean_y = np.where(total > 0, self.mean_y + delta * count / total, 0.0)
+                self.m2_y = self.m2_y + m2.sum(axis=-1) + np.where(total > 0, delta ** 2 * self.count * count / total, 0.0)
+            self.count = total
+        return self
+
+    def fit(self) -> dict:
+        """
+        Coefficients, standard errors and fit statistics of every series
+
+        Columns that are linear combinations of earlier ones (for example a
+        signal that never fires, which equals zero or the intercept) are
+        aliased: they get NaN and the fit uses the remaining columns.
+
+        Returns:
+            Dict with coef, se, t_statistic and p_value arrays of shape
+            (series, columns) and count, rank, r_squared, adj_r_squared and
+            residual_std arrays of shape (series,)
+        """
+        from scipy.special import stdtr
+
+        k = len(self.columns)
+        R, qty = self.r[:, :k, :k], self.r[:, :k, k]
+        norms = np.sqrt((R ** 2).sum(axis=1))
+        diagonal = np.abs(np.diagonal(R, axis1=1, axis2=2))
+        aliased = diagonal <= ALIASED_TOLERANCE * norms
+        reduced = np.where(aliased[:, None, :], 0.0, R)
+        inverse = np.linalg.pinv(reduced)
+        coef = (inverse @ qty[..., None])[..., 0]
+        rank = k - aliased.sum(axis=1)
+
+        # Residual sum of squares: the part of y outside the span of X
+        rss = ((reduced @ coef[..., None])[..., 0] - qty) ** 2
+        rss = rss.sum(axis=1) + self.r[:, k, k] ** 2
+        df = self.count - rank
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sigma2 = np.where(df > 0, rss / df, np.nan)
+            # Diagonal of (R'R)^-1 = R^-1 R^-T is the squared row norms of R^-1
+            se = np.sqrt(sigma2[:, None] * (inverse ** 2).sum(axis=2))
+            t_stat = coef / se
+            p_val = 2 * stdtr(df[:, None].astype(np.float64), -np.abs(t_stat))
+            r_squared = 1 - rss / self.m2_y
+            adj_r_squared = 1 - (1 - r_squared) * (self.count - 1) / df
+        nan_if_aliased = lambda values: np.where(aliased, np.nan, values)
+        return {
+            "coef": nan_if_aliased(coef),
+            "se": nan_if_aliased(se),
+            "t_statistic": nan_if_aliased(t_stat),
+            "p_value": nan_if_aliased(p_val),
+            "count": self.count.copy(),
+            "rank": rank,
+            "r_squared": r_squared,
+            "adj_r_squared": adj_r_squared,
+            "residual_std": np.sqrt(sigma2),
+        }
+
+    def table(self) -> pd.DataFrame:
+        """
+        Long-format fit results, one row per series and regressor
+
+        Returns:
+            DataFrame with ticker, feature, coef, se, t_statistic, p_value,
+            count, r_squared and adj_r_squared
+        """
+        result = self.fit()
+        k = len(self.columns)
+        return pd.DataFrame({
+            "ticker": np.repeat(self.series, k),
+            "feature": np.tile(self.columns, len(self.series)),
+            **{name: result[name].ravel() for name in ("coef", "se", "t_statistic", "p_value")},
+            **{name: np.repeat(result[name], k) for name in ("count", "r_squared", "adj_r_squared")},
+        })
+
+@traced()
+def regress_universe(frames: dict, features: list = None, horizon: int = 1, accumulator: OLSAccumulator = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> OLSAccumulator:
+    """
+    Fit forward returns on indicator features for every ticker in one batched pass
+
+    Each ticker's design matrix is stacked, padded with NaN rows to the
+    longest one, and the whole universe goes through one QR update per
+    chunk of rows. Given the accumulator of an earlier call, only bars
+    after the last row it has seen are added, so a universe can be
+    refitted as new bars arrive without going over its history again.
+
+    Args:
+        frames: Dict of ticker -> frame from build_indicator_frame
+        features: Regressor names (default: REGRESSION_FEATURES)
+        horizon: Bars between the signal and the close it is paid at
+        accumulator: Accumulator to update (default: a new one)
+        chunk_size: Rows per QR update
+
+    Returns:
+        The accumulator; call fit() or table() for the results
+    """
+    features = list(features or REGRESSION_FEATURES)
+    if accumulator is None:
+        accumulator = OLSAccumulator(["Intercept"] + features, list(frames))
+    elif accumulator.columns != ["Intercept"] + features:
+        raise ValueError(f"Accumulator was built for {accumulator.columns[1:]}, not {features}")
+    accumulator.add_series(list(frames))
+
+    blocks = {}
+    for ticker, data in frames.items():
+        X, y, index = design_matrix(data, features, horizon, after=accumulator.last.get(ticker))
+        if len(y):
+            blocks[ticker] = (X, y)
+            accumulator.last[ticker] = index[-1]
+    if not blocks:
+        return accumulator
+
+    # Series without new rows stay all-NaN, which leaves their fit unchanged
+    position = {ticker: i for i, ticker in enumerate(accumulator.series)}
+    rows = max(len(y) for _, y in blocks.values())
+    for start in range(0, rows, chunk_size):
+        stop = min(start + chunk_size, rows)
+        X = np.full((len(accumulator.series), stop - start, len(features) + 1), np.nan)
+        y = np.full((len(accumulator.series), stop - start), np.nan)
+        for ticker, (ticker_x, ticker_y) in blocks.items():
+            count = min(stop, len(ticker_y)) - start
+            if count > 0:
+                X[position[ticker], :count] = ticker_x[start:start + count]
+                y[position[ticker], :count] = ticker_y[start:start + count]
+        accumulator.update(X, y, chunk_size)
+    return accumulator
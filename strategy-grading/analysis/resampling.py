@@ -0,0 +1,214 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils.tracing import traced
+
+# Resamples are drawn in blocks of this many, each from its own random stream,
+# so results depend on neither batch_size nor n_jobs
+RESAMPLE_BLOCK = 128
+
+def default_block_size(n: int) -> int:
+    """
+    Block length for the block bootstrap (the usual n ** (1/3) rule)
+
+    Args:
+        n: Sample size
+
+    Returns:
+        Block length, at least 1
+    """
+    return max(1, int(round(n ** (1 / 3))))
+
+def block_bootstrap_starts(n: int, n_resamples: int, block_size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Block start positions for the circular block bootstrap
+
+    Each row describes one resample: ceil(n / block_size) blocks of
+    consecutive positions, each starting at a random position and wrapping
+    around the end of the sample, with the last block cut so the resample
+    has n values. Keeping whole blocks preserves short-range
+    autocorrelation; a block size of 1 gives the ordinary bootstrap.
+
+    Args:
+        n: Sample size
+        n_resamples: Number of rows
+        block_size: Length of each block
+        rng: NumPy random generator
+
+    Returns:
+        Integer array of shape (n_resamples, number of blocks)
+    """
+    return rng.integers(0, n, size=(n_resamples, -(-n // block_size)))
+
+def circular_block_sums(values: np.ndarray, block_size: int) -> tuple:
+    """
+    Sum of every circular block of a sample, by start position
+
+    Args:
+        values: 1-D sample
+        block_size: Length of the full blocks
+
+    Returns:
+        Tuple of (full block sums, sums of the shorter last block), each of length n
+    """
+    n = len(values)
+    wrapped = np.concatenate([values, values[:block_size]])
+    prefix = np.concatenate([[0.0], np.cumsum(wrapped)])
+    last = n - (-(-n // block_size) - 1) * block_size
+    return prefix[block_size:block_size + n] - prefix[:n], prefix[last:last + n] - prefix[:n]
+
+def _seed_sequence(seed) -> np.random.SeedSequence:
+    # spawn() advances a SeedSequence, so spawn from a copy to leave the caller's seed reusable
+    if isinstance(seed, np.random.SeedSequence):
+        return np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key, pool_size=seed.pool_size)
+    return np.random.SeedSequence(seed)
+
+def _batches(n_resamples: int, batch_size: int, seed) -> list:
+    # (block sizes, block seeds) per batch; a batch holds whole blocks
+    sizes = [min(RESAMPLE_BLOCK, n_resamples - start) for start in range(0, n_resamples, RESAMPLE_BLOCK)]
+    seeds = _seed_sequence(seed).spawn(len(sizes))
+    blocks = max(1, batch_size // RESAMPLE_BLOCK)
+    return [(sizes[i:i + blocks], seeds[i:i + blocks]) for i in range(0, len(sizes), blocks)]
+
+def _map_batches(func, batches: list, n_jobs: int) -> np.ndarray:
+    if n_jobs > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(func, *args) for args in batches]
+            return np.concatenate([future.result() for future in futures])
+    return np.concatenate([func(*args) for args in batches])
+
+def _resample_means(block_sums, block_size, size, rng):
+    # A resample's sum is the sum of its block sums, so only the start matrix is gathered
+    full, last = block_sums
+    starts = block_bootstrap_starts(len(full), size, block_size, rng)
+    return (full[starts[:, :-1]].sum(axis=1) + last[starts[:, -1]]) / len(full)
+
+def _bootstrap_batch(sums1, sums2, block1, block2, sizes, seeds):
+    diffs = []
+    for size, seed in zip(sizes, seeds):
+        rng = np.random.default_rng(seed)
+        diffs.append(_resample_means(sums1, block1, size, rng) - _resample_means(sums2, block2, size, rng))
+    return np.concatenate(diffs)
+
+def _permutation_batch(pooled, n1, sizes, seeds):
+    diffs = []
+    for size, seed in zip(sizes, seeds):
+        rng = np.random.default_rng(seed)
+        # The n1 smallest of n random keys pick a uniformly random group-1 subset
+        keys = rng.random((size, len(pooled)))
+        first = np.argpartition(keys, n1 - 1, axis=1)[:, :n1]
+        sum1 = pooled[first].sum(axis=1)
+        diffs.append(sum1 / n1 - (pooled.sum() - sum1) / (len(pooled) - n1))
+    return np.concatenate(diffs)
+
+def bootstrap_mean_difference(returns1, returns2, n_resamples: int = 10000, block_size: int = None,
+                              confidence: float = 0.95, batch_size: int = 1000, seed=None, n_jobs: int = 1) -> dict:
+    """
+    Block bootstrap test and confidence interval for a difference in mean returns
+
+    Both groups are resampled independently with the circular block
+    bootstrap. The p-value is two-sided: the share of resampled
+    differences, centred on the observed one, at least as far from zero
+    as the observed difference.
+
+    Resamples are drawn in blocks of RESAMPLE_BLOCK, each block from its
+    own random stream spawned from seed, so a fixed seed gives the same
+    results for any batch_size and n_jobs.
+
+    Args:
+        returns1: Returns of the first group
+        returns2: Returns of the second group
+        n_resamples: Number of bootstrap resamples
+        block_size: Block length (default: n ** (1/3) per group; 1 for the ordinary bootstrap)
+        confidence: Confidence level of the percentile interval
+        batch_size: Resamples per batch, in whole blocks of RESAMPLE_BLOCK (one worker task each)
+        seed: Seed for the random streams
+        n_jobs: Number of worker processes (1 runs in-process)
+
+    Returns:
+        Dictionary with mean difference, p-value and confidence interval
+    """
+    returns1 = np.asarray(returns1, dtype=np.float64)
+    returns2 = np.asarray(returns2, dtype=np.float64)
+    block1 = min(block_size or default_block_size(len(returns1)), len(returns1))
+    block2 = min(block_size or default_block_size(len(returns2)), len(returns2))
+    observed = returns1.mean() - returns2.mean()
+
+    sums1, sums2 = circular_block_sums(returns1, block1), circular_block_sums(returns2, block2)
+    diffs = _map_batches(_bootstrap_batch, [(sums1, sums2, block1, block2, sizes, seeds)
+                                            for sizes, seeds in _batches(n_resamples, batch_size, seed)], n_jobs)
+
+    extreme = np.count_nonzero(np.abs(diffs - observed) >= abs(observed))
+    alpha = 1 - confidence
+    ci_low, ci_high = np.quantile(diffs, [alpha / 2, 1 - alpha / 2])
+    return {
+        'mean_difference': observed,
+        'bootstrap_p_value': (extreme + 1) / (n_resamples + 1),
+        'bootstrap_ci_low': ci_low,
+        'bootstrap_ci_high': ci_high,
+        'block_size': max(block1, block2)
+    }
+
+def permutation_mean_difference(returns1, returns2, n_resamples: int = 10000, batch_size: int = 1000,
+                                seed=None, n_jobs: int = 1) -> dict:
+    """
+    Permutation test for a difference in mean returns
+
+    Group labels are shuffled over the pooled returns; the two-sided
+    p-value is the share of shuffles whose mean difference is at least as
+    large in absolute value as the observed one. Shuffles are drawn in
+    blocks like the bootstrap's, so a fixed seed gives the same p-value
+    for any batch_size and n_jobs.
+
+    Args:
+        returns1: Returns of the first group
+        returns2: Returns of the second group
+        n_resamples: Number of permutations
+        batch_size: Permutations per batch, in whole blocks of RESAMPLE_BLOCK (one worker task each)
+        seed: Seed for the random streams
+        n_jobs: Number of worker processes (1 runs in-process)
+
+    Returns:
+        Dictionary with the permutation p-value
+    """
+    returns1 = np.asarray(returns1, dtype=np.float64)
+    returns2 = np.asarray(returns2, dtype=np.float64)
+    pooled = np.concatenate([returns1, returns2])
+    observed = returns1.mean() - returns2.mean()
+
+    diffs = _map_batches(_permutation_batch, [(pooled, len(returns1), sizes, seeds)
+                                              for sizes, seeds in _batches(n_resamples, batch_size, seed)], n_jobs)
+
+    # Small tolerance so ties with the observed split count as extreme
+    extreme = np.count_nonzero(np.abs(diffs) >= abs(observed) * (1 - 1e-12))
+    return {'permutation_p_value': (extreme + 1) / (n_resamples + 1)}
+
+@traced()
+def resampling_tests(returns1, returns2, n_resamples: int = 10000, block_size: int = None,
+                     confidence: float = 0.95, batch_size: int = 1000, seed=None, n_jobs: int = 1) -> dict:
+    """
+    Block bootstrap and permutation tests for a difference in mean returns
+
+    Args:
+        returns1: Returns of the first group
+        returns2: Returns of the second group
+        n_resamples: Number of resamples for each test
+        block_size: Bootstrap block length (default: n ** (1/3) per group)
+        confidence: Confidence level of the bootstrap interval
+        batch_size: Resamples per batch, in whole blocks of RESAMPLE_BLOCK (one worker task each)
+        seed: Seed for the random streams
+        n_jobs: Number of worker processes (1 runs in-process)
+
+    Returns:
+        Dictionary with bootstrap p-value and confidence interval and the
+        permutation p-value; empty if a group has fewer than 2 observations
+    """
+    if len(returns1) < 2 or len(returns2) < 2:
+        return {}
+    # Separate child streams so the two tests are independent
+    bootstrap_seed, permutation_seed = _seed_sequence(seed).spawn(2)
+    results = bootstrap_mean_difference(returns1, returns2, n_resamples, block_size, confidence,
+                                        batch_size, bootstrap_seed, n_jobs)
+    results.update(permutation_mean_difference(returns1, returns2, n_resamples, batch_size,
+                                               permutation_seed, n_jobs))
+    results['n_resamples'] = n_resamples
+    return results
@@ -0,0 +1,165 @@
+import itertools
+import numpy as np
+import pandas as pd
+from analysis.indicator_comparison import SIGNAL_COLUMNS, _group_labels
+from analysis.ttest_analysis import welch_ttest_from_moments
+from utils.tracing import traced
+
+def window_bounds(n: int, window: int, step: int = 1, expanding: bool = False) -> tuple:
+    """
+    Start and end positions of rolling or walk-forward windows
+
+    Args:
+        n: Number of bars
+        window: Bars per window (for expanding windows, bars in the first one)
+        step: Bars between consecutive window ends (step == window gives
+            non-overlapping walk-forward blocks)
+        expanding: Anchor every window at the first bar
+
+    Returns:
+        Tuple of (starts, ends) integer arrays; ends are exclusive
+    """
+    if window < 1 or step < 1:
+        raise ValueError("window and step must be positive")
+    ends = np.arange(window, n + 1, step)
+    starts = np.zeros_like(ends) if expanding else ends - window
+    return starts, ends
+
+def rolling_group_moments(signals: np.ndarray, returns: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                          groups: list = None) -> dict:
+    """
+    Count, mean and sample variance of returns for (indicator, signal type) groups in every window
+
+    Running count, sum and sum of squares per group are kept as prefix
+    sums, so each window costs two lookups per group and the whole series
+    is processed in linear time whatever the window length. Sums are taken
+    around the mean return, as in signal_group_moments, to keep the
+    windowed variances accurate.
+
+    Args:
+        signals: Signal array of shape (indicators, time)
+        returns: Returns of shape (time,); NaN returns are left out
+        starts: Window start positions
+        ends: Window end positions (exclusive)
+        groups: Group positions to compute, indicator * 3 + (0 All, 1 Buy, 2 Sell)
+            (default: every group)
+
+    Returns:
+        Dict of count, mean and var arrays of shape (windows, groups), in
+        the order of groups
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    valid = ~np.isnan(returns)
+    shift = returns[valid].mean() if valid.any() else 0.0
+    centered = np.where(valid, returns - shift, 0.0)
+    squared = centered ** 2
+    groups = list(range(len(signals) * 3)) if groups is None else list(groups)
+
+    def _window_sums(mask):
+        # Prefix sums of count, sum and sum of squares, differenced at the window bounds
+        sums = np.empty((3, len(ends)))
+        for row, values in enumerate((mask, np.where(mask, centered, 0.0), np.where(mask, squared, 0.0))):
+            prefix = np.concatenate([[0.0], np.cumsum(values, dtype=np.float64)])
+            np.subtract(prefix[ends], prefix[starts], out=sums[row])
+        return sums
+
+    # Rows are (count, sum, sum of squares) per group; All is Buy + Sell
+    sums = np.empty((len(groups), 3, len(ends)))
+    buy_sell = {}
+    for out, group in enumerate(groups):
+        indicator, kind = divmod(group, 3)
+        for side in ((1, 2) if kind == 0 else (kind,)):
+            if (indicator, side) not in buy_sell:
+                buy_sell[indicator, side] = _window_sums(valid & (signals[indicator] == (1 if side == 1 else -1)))
+        sums[out] = buy_sell[indicator, 1] + buy_sell[indicator, 2] if kind == 0 else buy_sell[indicator, kind]
+
+    count, total, total_sq = sums[:, 0].T, sums[:, 1].T, sums[:, 2].T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centered_mean = total / count
+        # Differences of prefix sums can leave tiny negative variances
+        var = np.maximum(total_sq - count * centered_mean ** 2, 0.0) / (count - 1)
+    return {"count": count, "mean": centered_mean + shift, "var": var}
+
+def _resolve_pairs(labels: list, pairs) -> list:
+    if pairs is None:
+        return list(itertools.combinations(range(len(labels)), 2))
+    position = {label: i for i, label in enumerate(labels)}
+    try:
+        return [(position[first], position[second]) for first, second in pairs]
+    except KeyError as e:
+        raise ValueError(f"Unknown group {e.args[0]}; expected one of {labels}") from None
+
+@traced()
+def rolling_significance(data: pd.DataFrame, window: int = 63, step: int = 1, expanding: bool = False,
+                         indicators: list = None, pairs: list = None) -> dict:
+    """
+    Welch t-tests between indicator/signal groups over rolling or walk-forward windows
+
+    Args:
+        data: DataFrame with all indicator signals and returns
+        window: Bars per window (for expanding windows, bars in the first one)
+        step: Bars between consecutive window ends
+        expanding: Anchor every window at the first bar (anchored walk-forward)
+        indicators: Indicator names to include (default: all of SIGNAL_COLUMNS)
+        pairs: List of (group, group) labels such as ("RSI_Buy", "MACD_All")
+            (default: every pair of distinct groups)
+
+    Returns:
+        Dictionary with 't_statistic' and 'p_value' DataFrames (one column per
+        pair, e.g. "RSI_All vs MACD_All") and a 'count' DataFrame (one column
+        per group used by the pairs), all indexed by the last bar of each
+        window. A window where a group has fewer than 2 observations gets NaN.
+    """
+    indicators = list(indicators or SIGNAL_COLUMNS)
+    labels = _group_labels(indicators)
+    pair_positions = _resolve_pairs(labels, pairs)
+
+    # Only the groups that appear in a pair are computed
+    groups = sorted({group for pair in pair_positions for group in pair})
+    column = {group: i for i, group in enumerate(groups)}
+
+    starts, ends = window_bounds(len(data), window, step, expanding)
+    signals = np.stack([data[SIGNAL_COLUMNS[name]].to_numpy() for name in indicators])
+    moments = rolling_group_moments(signals, data["Return"].to_numpy(dtype=np.float64), starts, ends, groups)
+
+    first = [column[pair[0]] for pair in pair_positions]
+    second = [column[pair[1]] for pair in pair_positions]
+    t_stat, p_val = welch_ttest_from_moments(*(moments[name][:, first] for name in ("count", "mean", "var")),
+                                             *(moments[name][:, second] for name in ("count", "mean", "var")))
+
+    index = data.index[ends - 1]
+    columns = [f"{labels[i]} vs {labels[j]}" for i, j in pair_positions]
+    return {
+        't_statistic': pd.DataFrame(t_stat, index=index, columns=columns),
+        'p_value': pd.DataFrame(p_val, index=index, columns=columns),
+        'count': pd.DataFrame(moments["count"].astype(np.int64), index=index, columns=[labels[g] for g in groups])
+    }
+
+def rolling_records(result: dict, ticker: str = None) -> pd.DataFrame:
+    """
+    Long-format table of a rolling_significance result, one row per window and pair
+
+    Args:
+        result: Output of rolling_significance
+        ticker: Ticker added as the first column (optional)
+
+    Returns:
+        DataFrame with ticker, date, comparison, t_statistic, p_value, count1 and count2
+    """
+    t_stat, p_val, count = result['t_statistic'], result['p_value'], result['count']
+    frames = []
+    for comparison in t_stat.columns:
+        group1, group2 = comparison.split(" vs ")
+        frames.append(pd.DataFrame({
+            "date": t_stat.index,
+            "comparison": comparison,
+            "t_statistic": t_stat[comparison].to_numpy(),
+            "p_value": p_val[comparison].to_numpy(),
+            "count1": count[group1].to_numpy(),
+            "count2": count[group2].to_numpy(),
+        }))
+    records = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=["date", "comparison", "t_statistic", "p_value", "count1", "count2"])
+    if ticker is not None:
+        records.insert(0, "ticker", ticker)
+    return records
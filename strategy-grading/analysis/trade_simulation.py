@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+from analysis.indicator_comparison import SIGNAL_COLUMNS
+from utils.tracing import traced
+
+# How signals become positions: Buy goes long, Sell goes short (long_short)
+# or flat (long_only); a position is held until a signal changes it
+POSITION_MODES = ["long_short", "long_only"]
+
+def positions_from_signals(signals: np.ndarray, mode: str = "long_short") -> np.ndarray:
+    """
+    Position held at the close of every bar, from Buy/Sell/Hold signals
+
+    Hold bars keep the last non-zero signal (a forward fill done with a
+    running maximum of signal positions), so each Buy or Sell opens a
+    position that lasts until the next opposite signal.
+
+    Args:
+        signals: Signal array (+1/-1/0) of shape (..., time)
+        mode: "long_short" or "long_only"
+
+    Returns:
+        int8 position array (+1 long, -1 short, 0 flat) with the shape of signals
+    """
+    if mode not in POSITION_MODES:
+        raise ValueError(f"Unknown position mode {mode!r}; expected one of {POSITION_MODES}")
+    signals = np.asarray(signals)
+    bars = np.arange(signals.shape[-1])
+    last = np.maximum.accumulate(np.where(signals != 0, bars, -1), axis=-1)
+    positions = np.take_along_axis(signals, np.maximum(last, 0), axis=-1).astype(np.int8)
+    positions[last < 0] = 0
+    if mode == "long_only":
+        np.maximum(positions, 0, out=positions)
+    return positions
+
+def bar_pnl(positions: np.ndarray, returns: np.ndarray) -> tuple:
+    """
+    Gross PnL and turnover of every bar for a fixed notional of 1
+
+    A position taken at the close of bar t earns the return of bar t + 1,
+    so the signals never see the return they are paid. Turnover is the
+    change in position at a bar (2 for a reversal).
+
+    Args:
+        positions: Position array of shape (..., time)
+        returns: Close-to-close returns broadcastable to positions; NaN counts as 0
+
+    Returns:
+        Tuple of (gross PnL, turnover) float arrays with the shape of positions
+    """
+    returns = np.nan_to_num(np.asarray(returns, dtype=np.float64), nan=0.0)
+    held = np.zeros(positions.shape, dtype=np.int8)
+    held[..., 1:] = positions[..., :-1]
+    gross = held * returns
+    turnover = np.abs(positions - held, dtype=np.float64)
+    return gross, turnover
+
+def trade_records(positions: np.ndarray, gross: np.ndarray) -> dict:
+    """
+    Entry/exit pairs of a position array with their gross PnL
+
+    A trade starts at the bar where a non-zero position is taken and
+    ends at the bar where it is closed or reversed; one still open at
+    the last bar is marked to market there. Its gross PnL is the sum of
+    bar PnL from the bar after entry up to the next entry, taken with one
+    np.add.reduceat over the flattened series (flat bars add nothing).
+
+    Args:
+        positions: Position array of shape (time,) or (series, time)
+        gross: Gross PnL from bar_pnl, same shape
+
+    Returns:
+        Dict of equal-length arrays, one value per trade in time order
+        within each series: series, entry, exit (bar positions within the
+        series), direction, bars held, gross PnL and closed (False for a
+        trade still open at the end)
+    """
+    positions = np.atleast_2d(positions)
+    gross = np.atleast_2d(gross)
+    n = positions.shape[-1]
+    flat_positions = positions.ravel()
+    held = np.zeros_like(positions)
+    held[:, 1:] = positions[:, :-1]
+    held = held.ravel()
+
+    changed = flat_positions != held
+    entries = np.flatnonzero(changed & (flat_positions != 0))
+    exits = np.flatnonzero(changed & (held != 0))
+    series = entries // n
+
+    # A trade closes at the first exit after its entry, else at the end of its series
+    following = np.searchsorted(exits, entries, side="right")
+    end_of_series = (series + 1) * n - 1
+    candidate = exits[np.minimum(following, max(len(exits) - 1, 0))] if len(exits) else end_of_series
+    closed = (following < len(exits)) & (candidate <= end_of_series)
+    closes = np.where(closed, candidate, end_of_series)
+
+    # Segment sums from the bar after each entry; a trailing zero covers an entry on the last bar
+    padded = np.append(gross.ravel(), 0.0)
+    pnl = np.add.reduceat(padded, entries + 1) if len(entries) else np.zeros(0)
+
+    return {
+        "series": series,
+        "entry": entries - series * n,
+        "exit": closes - series * n,
+        "direction": flat_positions[entries],
+        "bars": closes - entries,
+        "gross_pnl": pnl,
+        "closed": closed,
+    }
+
+def max_drawdown(pnl: np.ndarray) -> np.ndarray:
+    """
+    Largest fall of cumulative PnL from its running peak (starting from 0), along the last axis
+
+    Args:
+        pnl: Per-bar PnL of shape (..., time)
+
+    Returns:
+        Non-negative drawdown array of shape (...)
+    """
+    cumulative = np.cumsum(pnl, axis=-1)
+    peak = np.maximum.accumulate(np.maximum(cumulative, 0.0), axis=-1)
+    return (peak - cumulative).max(axis=-1, initial=0.0)
+
+def trade_summary(trade_pnl: np.ndarray, net: np.ndarray, positions: np.ndarray) -> dict:
+    """
+    Headline figures of one simulation
+
+    Args:
+        trade_pnl: Net PnL per trade
+        net: Net PnL per bar
+        positions: Position per bar
+
+    Returns:
+        Dict with trades, win_rate, mean_trade, total_pnl, max_drawdown and
+        exposure (fraction of bars with a position)
+    """
+    count = len(trade_pnl)
+    return {
+        "trades": count,
+        "win_rate": float((trade_pnl > 0).mean()) if count else np.nan,
+        "mean_trade": float(trade_pnl.mean()) if count else np.nan,
+        "total_pnl": float(net.sum()),
+        "max_drawdown": float(max_drawdown(net)),
+        "exposure": float((positions != 0).mean()) if len(positions) else np.nan,
+    }
+
+@traced()
+def simulate_trades(data: pd.DataFrame, indicator: str = "RSI", mode: str = "long_short", commission: float = 0.0,
+                    slippage: float = 0.0) -> dict:
+    """
+    Simulate trading an indicator's signals on one price frame
+
+    Every Buy/Sell signal sets the position at that bar's close (see
+    positions_from_signals) and each position has a fixed notional of 1,
+    so PnL is in units of return and adds up across trades. Commission
+    and slippage are fractions of the notional traded, charged on every
+    entry and exit (a reversal pays both).
+
+    Args:
+        data: Frame from build_indicator_frame (needs Close, Return and the signal column)
+        indicator: Indicator name ("RSI", "MACD", "Bollinger") or a signal column name
+        mode: "long_short" or "long_only"
+        commission: Commission per side as a fraction of notional (0.0005 = 5 bps)
+        slippage: Slippage per side as a fraction of notional
+
+    Returns:
+        Dictionary with 'bars' (position, gross_pnl, cost, net_pnl and
+        cumulative_pnl per bar), 'trades' (one row per entry/exit pair with
+        dates, prices, direction, bars held, gross_pnl, cost, net_pnl and
+        closed) and 'summary' (see trade_summary)
+    """
+    column = SIGNAL_COLUMNS.get(indicator, indicator)
+    positions = positions_from_signals(data[column].to_numpy(), mode)
+    gross, turnover = bar_pnl(positions, data["Return"].to_numpy(dtype=np.float64))
+    cost_per_side = commission + slippage
+    costs = turnover * cost_per_side
+    net = gross - costs
+
+    trades = trade_records(positions, gross)
+    trade_costs = (1 + trades["closed"]) * cost_per_side
+    close = data["Close"].to_numpy(dtype=np.float64)
+    trade_frame = pd.DataFrame({
+        "entry_date": data.index[trades["entry"]],
+        "exit_date": data.index[trades["exit"]],
+        "entry_price": close[trades["entry"]],
+        "exit_price": close[trades["exit"]],
+        "direction": trades["direction"],
+        "bars": trades["bars"],
+        "gross_pnl": trades["gross_pnl"],
+        "cost": trade_costs,
+        "net_pnl": trades["gross_pnl"] - trade_costs,
+        "closed": trades["closed"],
+    })
+    bars = pd.DataFrame({
+        "position": positions,
+        "gross_pnl": gross,
+        "cost": costs,
+        "net_pnl": net,
+        "cumulative_pnl": np.cumsum(net),
+    }, index=data.index)
+    return {"bars": bars, "trades": trade_frame, "summary": trade_summary(trade_frame["net_pnl"].to_numpy(), net, positions)}
+
+@traced()
+def simulate_batch(signals: np.ndarray, returns: np.ndarray, commission=0.0, slippage=0.0,
+                   mode: str = "long_short") -> dict:
+    """
+    Trade simulation summaries for many series and cost settings at once
+
+    Positions, bar PnL and trades are computed once per series. Costs
+    enter linearly (net = gross - cost per side * turnover), so every cost
+    setting reuses them; only the drawdown needs a pass over the bars per
+    setting.
+
+    Args:
+        signals: Signal array of shape (series, time), e.g. one row per ticker
+            or per parameter variant
+        returns: Returns of shape (series, time) or (time,)
+        commission: Scalar or 1-D array of commissions per side
+        slippage: Scalar or 1-D array of slippages per side (broadcast with commission)
+
+    Returns:
+        Dict of arrays of shape (costs, series): trades, win_rate,
+        mean_trade, total_pnl, max_drawdown, plus exposure of shape (series,)
+        and the cost per side of shape (costs,)
+    """
+    signals = np.atleast_2d(signals)
+    positions = positions_from_signals(signals, mode)
+    gross, turnover = bar_pnl(positions, returns)
+    cost_per_side = np.atleast_1d(np.add(commission, slippage)).astype(np.float64)
+    n_series = len(positions)
+
+    trades = trade_records(positions, gross)
+    count = np.bincount(trades["series"], minlength=n_series)
+    sides = 1 + trades["closed"]
+    trade_pnl = trades["gross_pnl"] - cost_per_side[:, None] * sides
+    wins = np.stack([np.bincount(trades["series"], weights=pnl > 0, minlength=n_series) for pnl in trade_pnl])
+    trade_total = np.stack([np.bincount(trades["series"], weights=pnl, minlength=n_series) for pnl in trade_pnl])
+
+    total_gross = gross.sum(axis=-1)
+    total_turnover = turnover.sum(axis=-1)
+    drawdown = np.empty((len(cost_per_side), n_series))
+    for i, cost in enumerate(cost_per_side):
+        drawdown[i] = max_drawdown(gross - cost * turnover if cost else gross)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "cost_per_side": cost_per_side,
+            "trades": np.broadcast_to(count, drawdown.shape).copy(),
+            "win_rate": wins / count,
+            "mean_trade": trade_total / count,
+            "total_pnl": total_gross - cost_per_side[:, None] * total_turnover,
+            "max_drawdown": drawdown,
+            "exposure": (positions != 0).mean(axis=-1),
+        }
@@ -1,8 +1,11 @@
-from scipy import stats
 import numpy as np
 import pandas as pd
+from analysis.resampling import resampling_tests
+from utils.tracing import traced
 
 def perform_ttests(data: pd.DataFrame):
+    from scipy import stats
+
     buy_returns = data.loc[data["Signal"] == 1, "Return"].dropna()
     sell_returns = data.loc[data["Signal"] == -1, "Return"].dropna()
     hold_returns = data.loc[data["Signal"] == 0, "Return"].dropna()
@@ -20,7 +23,9 @@ def perform_ttests(data: pd.DataFrame):
 
     return results
 
-def perform_pairwise_ttest(data: pd.DataFrame, strategy1: str, strategy2: str):
+@traced()
+def perform_pairwise_ttest(data: pd.DataFrame, strategy1: str, strategy2: str, n_resamples: int = 0,
+                           block_size: int = None, seed=None):
     """
     Perform t-test between two specific strategies
     
@@ -28,6 +33,9 @@ def perform_pairwise_ttest(data: pd.DataFrame, strategy1: str, strategy2: str):
         data: DataFrame with stock data and signals
         strategy1: First strategy ('Buy', 'Sell', 'Hold')
         strategy2: Second strategy ('Buy', 'Sell', 'Hold')
+        n_resamples: Bootstrap and permutation resamples to add alongside the t-test (0 to skip)
+        block_size: Bootstrap block length (default: n ** (1/3))
+        seed: Seed for the resampling random streams
     
     Returns:
         Dictionary with t-test results and interpretation
@@ -60,6 +68,7 @@ def perform_pairwise_ttest(data: pd.DataFrame, strategy1: str, strategy2: str):
         }
     
     # Perform t-test
+    from scipy import stats
     t_stat, p_val = stats.ttest_ind(returns1, returns2, equal_var=False)
     
     # Determine significance level
@@ -76,7 +85,7 @@ def perform_pairwise_ttest(data: pd.DataFrame, strategy1: str, strategy2: str):
         significance = 'Not Significant (p ≥ 0.1)'
         grade = 'C'
     
-    return {
+    results = {
         'p_value': p_val,
         't_statistic': t_stat,
         'significance': significance,
@@ -88,3 +97,39 @@ def perform_pairwise_ttest(data: pd.DataFrame, strategy1: str, strategy2: str):
         'std_return_1': returns1.std(),
         'std_return_2': returns2.std()
     }
+    
+    # Distribution-free checks for fat-tailed, autocorrelated returns
+    if n_resamples:
+        results.update(resampling_tests(returns1.to_numpy(), returns2.to_numpy(), n_resamples,
+                                        block_size=block_size, seed=seed))
+    
+    return results
+
+@traced()
+def welch_ttest_from_moments(n1, mean1, var1, n2, mean2, var2) -> tuple:
+    """
+    Welch's t-test from group sizes, means and sample variances
+    
+    Gives the same result as stats.ttest_ind(equal_var=False) without the
+    raw returns, and works element-wise on arrays of groups.
+    
+    Args:
+        n1, mean1, var1: Size, mean and sample variance (ddof=1) of the first group
+        n2, mean2, var2: Size, mean and sample variance (ddof=1) of the second group
+    
+    Returns:
+        Tuple of (t-statistic, two-sided p-value); NaN where a group has fewer than 2 observations
+    """
+    # Student t CDF from scipy.special; scipy.stats takes about a second to import
+    from scipy.special import stdtr
+    
+    n1 = np.asarray(n1, dtype=np.float64)
+    n2 = np.asarray(n2, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se1 = np.asarray(var1, dtype=np.float64) / n1
+        se2 = np.asarray(var2, dtype=np.float64) / n2
+        t_stat = (np.asarray(mean1) - np.asarray(mean2)) / np.sqrt(se1 + se2)
+        df = (se1 + se2) ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+        p_val = 2 * stdtr(df, -np.abs(t_stat))
+    valid = (n1 >= 2) & (n2 >= 2)
+    return np.where(valid, t_stat, np.nan), np.where(valid, p_val, np.nan)
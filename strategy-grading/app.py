@@ -1,7 +1,21 @@
+import datetime
 import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
-from main import run_indicator_comparison
+import os
+import time
+from contextlib import nullcontext
+from main import CachedAnalysis
+from watchlist import WatchlistScheduler, read_watchlist
+from utils import tracing
+from utils.compact import bytes_per_row
+from analysis.rolling_significance import rolling_significance
+from analysis.trade_simulation import POSITION_MODES, simulate_trades
+from analysis.regression import regress_universe
+from data.results_store import get_default_store
+from strategies.registry import INDICATORS, SIGNAL_COLUMNS
+from utils.downsampling import WEBGL_THRESHOLD, decimate, signal_markers
+from utils.helpers import indicator_memo
 
 # Configure page for fintech styling
 st.set_page_config(
@@ -213,6 +227,109 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# One result cache per server process, shared by every browser session
+@st.cache_resource
+def get_analysis_cache():
+    # Results are also recorded in (and repeat requests answered from) the local results store
+    analysis = CachedAnalysis(store=get_default_store())
+    # Pre-warm a watchlist ("AAPL,MSFT" or a file of tickers) now and after every market close
+    watchlist = os.environ.get("STRATEGY_GRADING_WATCHLIST")
+    if watchlist:
+        WatchlistScheduler(read_watchlist(watchlist), analysis=analysis, run_on_start=True).start()
+    return analysis
+
+analysis_cache = get_analysis_cache()
+
+def line_trace(x, y, **kwargs):
+    """Line trace, drawn with WebGL once it has too many points for SVG"""
+    trace = go.Scattergl if len(x) > WEBGL_THRESHOLD else go.Scatter
+    return trace(x=x, y=y, mode="lines", **kwargs)
+
+def add_signal_markers(fig, view, name, y_column):
+    """Buy/Sell markers of one indicator on the full-resolution bars, drawn on y_column"""
+    for side, symbol, color in (("Buy", "triangle-up", "green"), ("Sell", "triangle-down", "red")):
+        rows = signal_markers(view, SIGNAL_COLUMNS[name])[side]
+        trace = go.Scattergl if len(rows) > WEBGL_THRESHOLD else go.Scatter
+        fig.add_trace(trace(x=rows.index, y=rows[y_column], mode="markers", name=f"{name} {side}",
+                            marker=dict(symbol=symbol, color=color, size=8)))
+
+@st.fragment
+def show_charts(data, ticker, interval, indicators, names):
+    """
+    Price and indicator charts of the last run, decimated to a fixed number of points
+    
+    Lines are cut down to the bucket minima and maxima of the visible range
+    (see utils.downsampling) and drawn with WebGL when long, so payload and
+    render time do not grow with the history. Moving the range slider reruns
+    only this fragment and decimates the full-resolution frame again for the
+    new range, so zooming in brings back every bar once few enough are visible.
+    """
+    index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    view = data
+    if len(index) > 1:
+        first, last = index[0].to_pydatetime(), index[-1].to_pydatetime()
+        step = datetime.timedelta(days=1) if interval == "1d" else datetime.timedelta(minutes=1)
+        zoom = st.slider("🔍 Chart range:", min_value=first, max_value=last, value=(first, last), step=step,
+                         format="YYYY-MM-DD" if interval == "1d" else "YYYY-MM-DD HH:mm")
+        view = data.iloc[index.searchsorted(zoom[0]):index.searchsorted(zoom[1], side="right")]
+    if view.empty:
+        st.info("No bars in the selected range")
+        return
+    
+    fig = go.Figure()
+    lines = decimate(view, ["Close"])
+    fig.add_trace(line_trace(lines.index, lines["Close"], name="Close Price", line=dict(color='blue')))
+    for name in dict.fromkeys(names):
+        add_signal_markers(fig, view, name, "Close")
+    fig.update_layout(title=f"{ticker} Stock Price", 
+                     xaxis_title="Date", yaxis_title="Price")
+    st.plotly_chart(fig, width='stretch')
+    if len(lines) < len(view):
+        st.caption(f"Showing {len(lines):,} of {len(view):,} bars (bucket minima and maxima); narrow the range for more detail")
+    
+    # Show charts for selected indicators only
+    if "RSI" in indicators:
+        st.subheader("📈 RSI Indicator")
+        fig_rsi = go.Figure()
+        lines = decimate(view, ["RSI"])
+        fig_rsi.add_trace(line_trace(lines.index, lines["RSI"], name="RSI", line=dict(color='purple')))
+        add_signal_markers(fig_rsi, view, "RSI", "RSI")
+        
+        # Add adaptive RSI thresholds based on the data
+        rsi_25 = data["RSI"].quantile(0.25)
+        rsi_75 = data["RSI"].quantile(0.75)
+        
+        fig_rsi.add_hline(y=rsi_75, line_dash="dash", line_color="red", annotation_text=f"Top 25% ({rsi_75:.1f})")
+        fig_rsi.add_hline(y=rsi_25, line_dash="dash", line_color="green", annotation_text=f"Bottom 25% ({rsi_25:.1f})")
+        fig_rsi.update_layout(title=f"{ticker} RSI Indicator with Adaptive Thresholds", 
+                             xaxis_title="Date", yaxis_title="RSI",
+                             yaxis=dict(range=[0, 100]))
+        st.plotly_chart(fig_rsi, width='stretch')
+    
+    if "MACD" in indicators:
+        st.subheader("📈 MACD Indicator")
+        fig_macd = go.Figure()
+        lines = decimate(view, ["MACD", "MACD_Signal"])
+        fig_macd.add_trace(line_trace(lines.index, lines["MACD"], name="MACD", line=dict(color='blue')))
+        fig_macd.add_trace(line_trace(lines.index, lines["MACD_Signal"], name="Signal", line=dict(color='red')))
+        add_signal_markers(fig_macd, view, "MACD", "MACD")
+        fig_macd.update_layout(title=f"{ticker} MACD Indicator", 
+                             xaxis_title="Date", yaxis_title="MACD")
+        st.plotly_chart(fig_macd, width='stretch')
+    
+    if "Bollinger Bands" in indicators:
+        st.subheader("📈 Bollinger Bands")
+        fig_bb = go.Figure()
+        lines = decimate(view, ["Close", "BB_Upper", "BB_Middle", "BB_Lower"])
+        fig_bb.add_trace(line_trace(lines.index, lines["Close"], name="Close Price", line=dict(color='blue')))
+        fig_bb.add_trace(line_trace(lines.index, lines["BB_Upper"], name="Upper Band", line=dict(color='red', dash='dash')))
+        fig_bb.add_trace(line_trace(lines.index, lines["BB_Middle"], name="Middle Band", line=dict(color='green', dash='dot')))
+        fig_bb.add_trace(line_trace(lines.index, lines["BB_Lower"], name="Lower Band", line=dict(color='red', dash='dash')))
+        add_signal_markers(fig_bb, view, "Bollinger", "Close")
+        fig_bb.update_layout(title=f"{ticker} Bollinger Bands", 
+                           xaxis_title="Date", yaxis_title="Price")
+        st.plotly_chart(fig_bb, width='stretch')
+
 # Main header with fintech styling
 st.markdown("""
 <div class="main-header">
@@ -239,6 +356,11 @@ period = st.sidebar.selectbox("Select Time Period:",
                              ["1mo", "3mo", "6mo", "1y", "2y", "5y"], 
                              index=2,
                              help="Longer periods provide more reliable statistical results")
+interval = st.sidebar.selectbox("Bar Interval:",
+                               ["1d", "1h", "30m", "15m", "5m", "2m", "1m"],
+                               index=0,
+                               help="Intraday bars are limited by Yahoo Finance to 7 days (1m), "
+                                    "60 days (2m-30m) or 730 days (1h) of history")
 
 # Indicator comparison selection with fintech styling
 st.sidebar.markdown("""
@@ -248,7 +370,9 @@ st.sidebar.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-indicator_options = ["RSI", "MACD", "Bollinger Bands"]
+# Every registered indicator, by display name
+indicator_mapping = {indicator.label: name for name, indicator in INDICATORS.items()}
+indicator_options = list(indicator_mapping)
 signal_options = ["All", "Buy", "Sell"]
 
 col1, col2 = st.sidebar.columns(2)
@@ -261,6 +385,44 @@ with col2:
     indicator2 = st.selectbox("Second Indicator:", indicator_options, index=1)
     signal2 = st.selectbox("Second Signal Type:", signal_options, index=0)
 
+# Window for the rolling significance chart
+rolling_window = st.sidebar.number_input("Rolling Window (bars):", min_value=10, max_value=504, value=63, step=1,
+                                         help="Bars in each window of the rolling t-test chart")
+
+# Position rules and trading costs for the trade simulation
+with st.sidebar.expander("💰 Trade Simulation"):
+    position_mode = st.selectbox("Positions:", POSITION_MODES, index=0,
+                                 format_func=lambda mode: {"long_short": "Long and short", "long_only": "Long only"}[mode],
+                                 help="Sell signals go short, or only close a long position")
+    commission_bps = st.number_input("Commission (bps per side):", min_value=0.0, max_value=100.0, value=5.0, step=0.5)
+    slippage_bps = st.number_input("Slippage (bps per side):", min_value=0.0, max_value=100.0, value=5.0, step=0.5)
+
+# Result cache status and manual invalidation
+with st.sidebar.expander("⚡ Result Cache"):
+    cache_stats = analysis_cache.stats
+    for layer, label in (("data", "Price data"), ("frame", "Indicator frames")):
+        layer_stats = cache_stats[layer]
+        st.write(f"**{label}**: {layer_stats['entries']} cached, {layer_stats['hits']} hits / {layer_stats['misses']} misses")
+    if analysis_cache.store is not None:
+        store_stats = analysis_cache.store.stats
+        st.write(f"**Results store**: {store_stats['hits']} hits / {store_stats['misses']} misses, "
+                 f"{store_stats['runs_written']} recorded")
+    memo_stats = indicator_memo.stats
+    st.write(f"**Indicator memo**: {memo_stats['entries']} results ({memo_stats['bytes'] / 2**20:.0f} MiB), "
+             f"{memo_stats['hits']} hits / {memo_stats['misses']} misses, {memo_stats['evictions']} evicted")
+    if st.button("🧹 Clear Cached Results"):
+        analysis_cache.clear()
+        indicator_memo.clear()
+        st.success("Cached results cleared")
+
+# Optional per-stage timing of the analysis pipeline
+with st.sidebar.expander("⏱️ Performance"):
+    record_timings = st.checkbox("Record per-stage timings", value=False,
+                                 help="Time every pipeline stage and show a breakdown after the run")
+    compact_frames = st.checkbox("Compact frames", value=False,
+                                 help="Store indicators as float32 and drop unused price columns; "
+                                      "statistics are unchanged")
+
 # Ensure different indicators are selected
 if indicator1 == indicator2:
     st.sidebar.warning("⚠️ Please select two different indicators for comparison")
@@ -276,16 +438,30 @@ with col1:
             with st.spinner("Fetching data and performing indicator comparison..."):
                 try:
                     # Map UI names to internal names
-                    indicator_mapping = {
-                        "RSI": "RSI",
-                        "MACD": "MACD", 
-                        "Bollinger Bands": "Bollinger"
-                    }
-                    
                     mapped_indicator1 = indicator_mapping[indicator1]
                     mapped_indicator2 = indicator_mapping[indicator2]
                     
-                    data, comparison_results, indicator_ranking, summary = run_indicator_comparison(ticker, period, mapped_indicator1, mapped_indicator2, signal1, signal2)
+                    started = time.perf_counter()
+                    # Spans are only recorded for this session's run
+                    with (tracing.recording() if record_timings else nullcontext()) as tracer:
+                        data, comparison_results, indicator_ranking, summary, all_pairs, cache_status = analysis_cache.run(ticker, period, mapped_indicator1, mapped_indicator2, signal1, signal2, interval=interval, compact=compact_frames)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    store_status = f" · Results store: {cache_status['store']}" if 'store' in cache_status else ""
+                    st.caption(f"⚡ Price data: {cache_status['data']} · Indicators: {cache_status['frame']}{store_status} · {elapsed_ms:.0f} ms")
+                    if compact_frames:
+                        st.caption(f"🗜️ Frame memory: {data.attrs['bytes_per_row_before']:.0f} → "
+                                   f"{bytes_per_row(data):.0f} bytes per row")
+                    
+                    if tracer is not None:
+                        with st.expander("⏱️ Performance", expanded=True):
+                            stages = tracer.summary()
+                            run_total = stages[0]['total'] if stages else 0
+                            st.dataframe(pd.DataFrame([{
+                                "Stage": "\u2003" * stage['stage'].count("/") + stage['stage'].rsplit("/", 1)[-1],
+                                "Calls": stage['count'],
+                                "Total (ms)": round(stage['total'] * 1000, 2),
+                                "Share of run": f"{stage['total'] / run_total:.0%}" if run_total else "",
+                            } for stage in stages]), hide_index=True)
                     
                     # Store data in session state for charts
                     st.session_state['data'] = data
@@ -414,21 +590,13 @@ with col1:
                         
                         # Show means
                         st.write("**Mean Returns:**")
-                        if 'rsi_mean' in result:
-                            st.write(f"• RSI: {result['rsi_mean']:.4f}")
-                        if 'macd_mean' in result:
-                            st.write(f"• MACD: {result['macd_mean']:.4f}")
-                        if 'bb_mean' in result:
-                            st.write(f"• Bollinger: {result['bb_mean']:.4f}")
+                        for name in (mapped_indicator1, mapped_indicator2):
+                            st.write(f"• {name}: {result[f'{name.lower()}_mean']:.4f}")
                         
                         # Show sample sizes
                         st.write("**Sample Sizes:**")
-                        if 'rsi_count' in result:
-                            st.write(f"• RSI: {result['rsi_count']} signals")
-                        if 'macd_count' in result:
-                            st.write(f"• MACD: {result['macd_count']} signals")
-                        if 'bb_count' in result:
-                            st.write(f"• Bollinger: {result['bb_count']} signals")
+                        for name in (mapped_indicator1, mapped_indicator2):
+                            st.write(f"• {name}: {result[f'{name.lower()}_count']} signals")
                     else:
                         st.error("Comparison not found. Please try again.")
                     
@@ -587,62 +755,88 @@ with col1:
                         else:
                             st.info(f"ℹ️ **Not Significant (p ≥ 0.1)**: No significant difference between the indicators")
                     
-                    # Charts section with fintech styling
-                    st.markdown("### 📈 Market Analysis Charts")
-                    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-                    fig = go.Figure()
-                    
-                    # Handle multi-level columns from yfinance
-                    if isinstance(data["Close"], pd.DataFrame):
-                        close_prices = data["Close"].iloc[:, 0]  # Get first column if multi-level
-                    else:
-                        close_prices = data["Close"]
+                    # Every indicator/signal pair, computed once with the cached indicator frame
+                    st.session_state['all_pairs'] = all_pairs
+                    with st.expander("🔢 All Indicator Pairs (p-values)"):
+                        st.caption("Welch t-test p-values; the row group is the first sample")
+                        st.dataframe(all_pairs['p_value'].round(4))
                     
-                    fig.add_trace(go.Scatter(x=data.index, y=close_prices, mode="lines", name="Close Price", line=dict(color='blue')))
-                    fig.update_layout(title=f"{ticker} Stock Price", 
-                                     xaxis_title="Date", yaxis_title="Price")
-                    st.plotly_chart(fig, width='stretch')
+                    # Does the edge hold over time? Welch t-test on every rolling window
+                    with st.expander("📉 Rolling Significance"):
+                        if len(data) < rolling_window:
+                            st.info(f"Only {len(data)} bars; choose a longer period or a shorter rolling window")
+                        else:
+                            rolling = rolling_significance(data, window=rolling_window,
+                                                           pairs=[(f"{mapped_indicator1}_{signal1}", f"{mapped_indicator2}_{signal2}")])
+                            rolling_p = rolling['p_value'].iloc[:, 0]
+                            rolling_fig = go.Figure()
+                            rolling_lines = decimate(rolling_p.to_frame("p_value"), ["p_value"])["p_value"]
+                            rolling_fig.add_trace(line_trace(rolling_lines.index, rolling_lines, name="p-value", line=dict(color='#1f77b4')))
+                            rolling_fig.add_hline(y=0.05, line_dash="dash", line_color="red", annotation_text="p = 0.05")
+                            rolling_fig.update_layout(title=f"{rolling_window}-bar rolling p-value: {comparison_key}",
+                                                      xaxis_title="Window end", yaxis_title="p-value", yaxis_range=[0, 1])
+                            st.plotly_chart(rolling_fig, width='stretch')
+                            tested = rolling_p.dropna()
+                            if len(tested):
+                                st.caption(f"Significant at 5% in {(tested < 0.05).mean():.0%} of {len(tested)} windows with enough signals")
+                            st.download_button("⬇️ Download rolling results (CSV)",
+                                               pd.concat({"t_statistic": rolling['t_statistic'].iloc[:, 0], "p_value": rolling_p}, axis=1).to_csv(),
+                                               file_name=f"{ticker}_rolling_{rolling_window}.csv", mime="text/csv")
                     
-                    # Show charts for selected indicators only
-                    if indicator1 == "RSI" or indicator2 == "RSI":
-                        st.subheader("📈 RSI Indicator")
-                        fig_rsi = go.Figure()
-                        fig_rsi.add_trace(go.Scatter(x=data.index, y=data["RSI"], mode="lines", name="RSI", line=dict(color='purple')))
-                        
-                        # Add adaptive RSI thresholds based on the data
-                        rsi_25 = data["RSI"].quantile(0.25)
-                        rsi_75 = data["RSI"].quantile(0.75)
-                        
-                        fig_rsi.add_hline(y=rsi_75, line_dash="dash", line_color="red", annotation_text=f"Top 25% ({rsi_75:.1f})")
-                        fig_rsi.add_hline(y=rsi_25, line_dash="dash", line_color="green", annotation_text=f"Bottom 25% ({rsi_25:.1f})")
-                        fig_rsi.update_layout(title=f"{ticker} RSI Indicator with Adaptive Thresholds", 
-                                             xaxis_title="Date", yaxis_title="RSI",
-                                             yaxis=dict(range=[0, 100]))
-                        st.plotly_chart(fig_rsi, width='stretch')
+                    # Entry/exit trades of each compared indicator, after costs
+                    with st.expander("💰 Trade Simulation"):
+                        simulations = {name: simulate_trades(data, name, position_mode, commission=commission_bps / 1e4,
+                                                             slippage=slippage_bps / 1e4)
+                                       for name in dict.fromkeys([mapped_indicator1, mapped_indicator2])}
+                        st.dataframe(pd.DataFrame({name: simulation["summary"] for name, simulation in simulations.items()}).T
+                                     .style.format({"win_rate": "{:.1%}", "mean_trade": "{:.4%}", "total_pnl": "{:.2%}",
+                                                    "max_drawdown": "{:.2%}", "exposure": "{:.1%}"}))
+                        pnl_fig = go.Figure()
+                        for name, simulation in simulations.items():
+                            pnl = decimate(simulation["bars"], ["cumulative_pnl"])["cumulative_pnl"]
+                            pnl_fig.add_trace(line_trace(pnl.index, pnl, name=name))
+                        pnl_fig.update_layout(title="Cumulative net PnL (fixed notional, in units of return)",
+                                              xaxis_title="Date", yaxis_title="PnL", yaxis_tickformat=".0%")
+                        st.plotly_chart(pnl_fig, width='stretch')
+                        st.caption(f"Positions change at the close of the signal bar; "
+                                   f"{commission_bps + slippage_bps:g} bps charged per entry and per exit")
+                        st.download_button("⬇️ Download trades (CSV)",
+                                           pd.concat({name: simulation["trades"] for name, simulation in simulations.items()},
+                                                     names=["indicator", "trade"]).to_csv(),
+                                           file_name=f"{ticker}_trades.csv", mime="text/csv")
                     
-                    if indicator1 == "MACD" or indicator2 == "MACD":
-                        st.subheader("📈 MACD Indicator")
-                        fig_macd = go.Figure()
-                        fig_macd.add_trace(go.Scatter(x=data.index, y=data["MACD"], mode="lines", name="MACD", line=dict(color='blue')))
-                        fig_macd.add_trace(go.Scatter(x=data.index, y=data["MACD_Signal"], mode="lines", name="Signal", line=dict(color='red')))
-                        fig_macd.update_layout(title=f"{ticker} MACD Indicator", 
-                                             xaxis_title="Date", yaxis_title="MACD")
-                        st.plotly_chart(fig_macd, width='stretch')
+                    # Which indicator values explain the next bar's return?
+                    with st.expander("📐 Signal Regression"):
+                        regression = regress_universe({ticker: data}).table().set_index("feature")
+                        st.caption(f"OLS of the next bar's return on the indicators over {regression['count'].iloc[0]} bars; "
+                                   f"R² = {regression['r_squared'].iloc[0]:.4f}, adjusted {regression['adj_r_squared'].iloc[0]:.4f}")
+                        st.dataframe(regression[["coef", "se", "t_statistic", "p_value"]].style.format("{:.4g}"))
                     
-                    if indicator1 == "Bollinger Bands" or indicator2 == "Bollinger Bands":
-                        st.subheader("📈 Bollinger Bands")
-                        fig_bb = go.Figure()
-                        fig_bb.add_trace(go.Scatter(x=data.index, y=close_prices, mode="lines", name="Close Price", line=dict(color='blue')))
-                        fig_bb.add_trace(go.Scatter(x=data.index, y=data["BB_Upper"], mode="lines", name="Upper Band", line=dict(color='red', dash='dash')))
-                        fig_bb.add_trace(go.Scatter(x=data.index, y=data["BB_Middle"], mode="lines", name="Middle Band", line=dict(color='green', dash='dot')))
-                        fig_bb.add_trace(go.Scatter(x=data.index, y=data["BB_Lower"], mode="lines", name="Lower Band", line=dict(color='red', dash='dash')))
-                        fig_bb.update_layout(title=f"{ticker} Bollinger Bands", 
-                                           xaxis_title="Date", yaxis_title="Price")
-                        st.plotly_chart(fig_bb, width='stretch')
+                    # Charts section with fintech styling
+                    st.markdown("### 📈 Market Analysis Charts")
+                    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+                    show_charts(data, ticker, interval, (indicator1, indicator2), (mapped_indicator1, mapped_indicator2))
 
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
                     st.info("Please check if the ticker symbol is correct and try again.")
+    
+    # Earlier results survive reruns and restarts in the results store
+    if analysis_cache.store is not None:
+        with st.expander("🗄️ Results History"):
+            history_cols = st.columns(4)
+            history_winner = history_cols[0].selectbox("Winner:", ["Any"] + list(INDICATORS))
+            history_loser = history_cols[1].selectbox("Beat:", ["Any"] + list(INDICATORS))
+            history_p = history_cols[2].number_input("p-value below:", min_value=0.0, max_value=1.0, value=0.05, step=0.01)
+            history_since = history_cols[3].date_input("Last bar since:", value=datetime.date.today() - datetime.timedelta(days=30))
+            history_ticker = st.checkbox(f"Only {ticker.upper()}", value=False)
+            history = analysis_cache.store.comparisons(
+                ticker=ticker if history_ticker else None,
+                winner=None if history_winner == "Any" else history_winner,
+                loser=None if history_loser == "Any" else history_loser,
+                max_p=history_p, since=history_since, limit=500)
+            st.caption(f"{len(history)} matching comparisons (newest 500) of {len(analysis_cache.store):,} stored runs")
+            st.dataframe(history, hide_index=True)
 
 with col1:
     st.markdown("""
@@ -0,0 +1,264 @@
+"""
+Benchmarks for the indicator, signal and statistics hot paths
+
+Runs every benchmark on synthetic price series of each size and records
+wall time (best of several runs), throughput and peak traced memory.
+Results are written as JSON and can be compared against a stored
+baseline; slower or larger results beyond the thresholds are flagged as
+regressions. Everything runs offline.
+
+Usage (from the strategy-grading directory):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sizes 1000 100000 --baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from analysis.indicator_comparison import compare_indicators, get_indicator_summary
+from analysis.trade_simulation import simulate_trades
+from main import build_indicator_frame
+from strategies.bollinger_strategy import generate_bollinger_signals
+from strategies.macd_strategy import generate_macd_signals
+from strategies.rsi_strategy import generate_rsi_signals
+from utils.helpers import calculate_bollinger_bands, calculate_macd, calculate_rsi, indicator_memo
+from utils.result_cache import ArrayMemo
+from utils.rolling_index import RollingIndex
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+# Benchmark name -> function called with the indicator frame
+BENCHMARKS = {
+    "calculate_rsi": lambda data: calculate_rsi(data),
+    "calculate_macd": lambda data: calculate_macd(data),
+    "calculate_bollinger_bands": lambda data: calculate_bollinger_bands(data),
+    "generate_rsi_signals": lambda data: generate_rsi_signals(data),
+    "generate_macd_signals": lambda data: generate_macd_signals(data),
+    "generate_bollinger_signals": lambda data: generate_bollinger_signals(data),
+    "compare_indicators": lambda data: compare_indicators(data, "RSI", "MACD"),
+    "get_indicator_summary": lambda data: get_indicator_summary(data),
+    "simulate_trades": lambda data: simulate_trades(data, "RSI", commission=0.0005, slippage=0.0005),
+    "rolling_index": lambda data: RollingIndex(data["Close"].to_numpy()).rolling_std([10, 20, 50, 100, 200]),
+    "indicator_memo_hit": lambda data: memo_hit(data),
+}
+
+# Memo for indicator_memo_hit, large enough for the biggest series
+_memo = ArrayMemo(max_bytes=2**31)
+
+def memo_hit(data: pd.DataFrame) -> tuple:
+    """Memoized RSI lookup: hashing the close prices and fetching the stored result"""
+    close = data["Close"].to_numpy()
+    return _memo.get_or_compute(_memo.memo_key("rsi", close, window=14), lambda: (calculate_rsi(data).to_numpy(),))
+
+def make_prices(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic OHLCV frame with returns, one bar per minute
+
+    Args:
+        n: Number of rows
+        seed: Random seed
+
+    Returns:
+        DataFrame shaped like the output of fetch_data
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0, 0.001, n + 1)))
+    spread = np.abs(rng.normal(0.0, 0.0005, n + 1))
+    open_ = np.concatenate([close[:1], close[:-1]])
+    data = pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + spread),
+        "Low": np.minimum(open_, close) * (1 - spread),
+        "Close": close,
+        "Volume": rng.integers(1_000, 100_000, n + 1).astype(np.float64),
+    }, index=pd.date_range("2000-01-03", periods=n + 1, freq="min"))
+    data["Return"] = data["Close"].pct_change()
+    return data.iloc[1:]
+
+def time_call(func, data, min_time: float = 0.2, max_repeat: int = 10) -> float:
+    """
+    Best wall time of repeated calls
+
+    Args:
+        func: Benchmark function
+        data: Argument passed to func
+        min_time: Keep repeating until this many seconds have been spent in total
+        max_repeat: Upper bound on the number of calls
+
+    Returns:
+        Fastest call in seconds
+    """
+    best = float("inf")
+    spent = 0.0
+    for _ in range(max_repeat):
+        start = time.perf_counter()
+        func(data)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        if spent >= min_time:
+            break
+    return best
+
+def peak_memory(func, data) -> int:
+    """Peak bytes allocated (as seen by tracemalloc) during one call"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_benchmarks(sizes: list, names: list = None, min_time: float = 0.2, progress=None) -> list:
+    """
+    Run benchmarks for every size
+
+    Args:
+        sizes: Row counts of the synthetic series
+        names: Benchmarks to run (default: all)
+        min_time: Seconds of repeated calls per timing
+        progress: Callable(result dict) called after each benchmark
+
+    Returns:
+        List of result dicts
+    """
+    names = names or list(BENCHMARKS)
+    results = []
+    # Repeated calls would otherwise time memo hits instead of the indicator math
+    memo_settings = indicator_memo.max_bytes, indicator_memo.directory
+    indicator_memo.max_bytes, indicator_memo.directory = 0, None
+    try:
+        # Warm up once so lazy imports and first-call setup are not timed
+        warmup = build_indicator_frame(make_prices(1_000))
+        for name in names:
+            BENCHMARKS[name](warmup)
+
+        for rows in sizes:
+            # One frame per size; the generators overwrite their own columns on every call
+            data = build_indicator_frame(make_prices(rows))
+            for name in names:
+                func = BENCHMARKS[name]
+                seconds = time_call(func, data, min_time=min_time)
+                result = {
+                    "benchmark": name,
+                    "rows": rows,
+                    "seconds": seconds,
+                    "rows_per_second": rows / seconds if seconds else float("inf"),
+                    "peak_bytes": peak_memory(func, data),
+                }
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+            del data
+            gc.collect()
+    finally:
+        indicator_memo.max_bytes, indicator_memo.directory = memo_settings
+    return results
+
+def environment() -> dict:
+    """Versions and machine details stored next to the results"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def compare_to_baseline(results: list, baseline: list, time_threshold: float = 0.25,
+                        memory_threshold: float = 0.25, min_slowdown: float = 0.001) -> list:
+    """
+    Compare results with a baseline run
+
+    Args:
+        results: Current results
+        baseline: Baseline results
+        time_threshold: Allowed relative slowdown before flagging
+        memory_threshold: Allowed relative growth in peak memory before flagging
+        min_slowdown: Slowdowns smaller than this many seconds are timer noise and never flagged
+
+    Returns:
+        List of comparison dicts with time and memory ratios and a regression flag
+    """
+    previous = {(r["benchmark"], r["rows"]): r for r in baseline}
+    comparisons = []
+    for result in results:
+        base = previous.get((result["benchmark"], result["rows"]))
+        if base is None:
+            continue
+        time_ratio = result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        memory_ratio = result["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else 1.0
+        comparisons.append({
+            "benchmark": result["benchmark"],
+            "rows": result["rows"],
+            "time_ratio": time_ratio,
+            "memory_ratio": memory_ratio,
+            "regression": ((time_ratio > 1 + time_threshold and result["seconds"] - base["seconds"] > min_slowdown)
+                           or memory_ratio > 1 + memory_threshold),
+        })
+    return comparisons
+
+def _format_result(result: dict) -> str:
+    return (f"{result['benchmark']:<28}{result['rows']:>11,} rows {result['seconds'] * 1e3:>11.2f} ms "
+            f"{result['rows_per_second']:>14,.0f} rows/s {result['peak_bytes'] / 2 ** 20:>10.1f} MiB")
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark indicator, signal and statistics hot paths")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Row counts (default: 1k to 10M)")
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds of repeated calls per timing")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--baseline", help="Baseline JSON file to compare against")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline file")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="Allowed relative slowdown (default: 0.25)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed relative memory growth (default: 0.25)")
+    parser.add_argument("--min-slowdown", type=float, default=0.001,
+                        help="Ignore slowdowns below this many seconds (default: 0.001)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.benchmarks, args.min_time, progress=lambda r: print(_format_result(r)))
+    report = {"environment": environment(), "results": results}
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparisons = compare_to_baseline(results, baseline["results"], args.time_threshold, args.memory_threshold,
+                                          args.min_slowdown)
+        report["baseline"] = {"file": args.baseline, "environment": baseline.get("environment"),
+                              "comparisons": comparisons}
+        print(f"\nCompared with {args.baseline} ({baseline.get('environment', {}).get('commit')})")
+        for c in comparisons:
+            flag = "REGRESSION" if c["regression"] else "ok"
+            print(f"{c['benchmark']:<28}{c['rows']:>11,} rows  time x{c['time_ratio']:.2f}  memory x{c['memory_ratio']:.2f}  {flag}")
+        if any(c["regression"] for c in comparisons):
+            exit_code = 1
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=1)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
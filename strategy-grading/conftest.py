@@ -0,0 +1 @@
+# Puts the project root on sys.path so the tests import its modules with a plain `pytest` run
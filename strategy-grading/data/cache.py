@@ -0,0 +1,354 @@
+import json
+import os
+import re
+import threading
+import time
+import numpy as np
+import pandas as pd
+from utils.rolling_index import RollingIndex
+
+def slice_bars(bars: pd.DataFrame, start: pd.Timestamp = None, warmup: int = 0, min_bars: int = 0) -> pd.DataFrame:
+    """
+    Bars from start onwards, with warm-up bars in front, found by binary search
+
+    The result is a positional slice, so for memory-mapped bars it is a
+    view rather than a copy. The first bar of the requested range is
+    stored in attrs["analysis_start"]; the bars before it are warm-up.
+
+    Args:
+        bars: Bars on a sorted index
+        start: First timestamp wanted (None for all bars)
+        warmup: Bars to include before the first wanted bar
+        min_bars: Move the first wanted bar back until at least this many bars follow it
+
+    Returns:
+        DataFrame slice of bars
+    """
+    n = len(bars)
+    first = 0
+    if start is not None:
+        # NumPy's binary search on the raw timestamps, with the key in their
+        # unit, only touches the pages it visits (pandas scans the whole index)
+        stamps = bars.index.to_numpy()
+        unit = np.datetime_data(stamps.dtype)[0]
+        first = int(stamps.searchsorted(np.datetime64(pd.Timestamp(start).as_unit(unit).asm8, unit)))
+    first = max(min(first, n - min_bars), 0)
+    sliced = bars.iloc[max(first - warmup, 0):]
+    if first < n:
+        sliced.attrs["analysis_start"] = bars.index[first]
+    return sliced
+
+class OHLCVCache:
+    """
+    On-disk Parquet cache of OHLCV bars, one file per ticker and interval
+
+    An index.json file next to the Parquet files records, for each entry,
+    the earliest timestamp the cached history is known to cover, the last
+    cached bar, when it was last refreshed from the provider and when it
+    was last written. Reads only bump the modification time of the bars
+    (a file, or a directory for the price store), so they never rewrite
+    the index; an entry's last access is the later of the two. Entries are evicted least-recently-used first once the
+    cache grows beyond max_bytes, and dropped entirely when unused for
+    longer than max_age seconds.
+
+    Args:
+        cache_dir: Directory holding the Parquet files
+        max_bytes: Size budget for all cached files
+        max_age: Seconds an entry may go unused before eviction
+        refresh_after: Seconds after a refresh during which no new bars are requested
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 ** 2,
+                 max_age: float = 30 * 24 * 3600, refresh_after: float = 15 * 60):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.refresh_after = refresh_after
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "bytes_read": 0, "bytes_written": 0,
+                       "appends": 0, "evictions": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def stats(self) -> dict:
+        """Snapshot of cache counters"""
+        with self._lock:
+            return dict(self._stats)
+
+    def record(self, name: str, amount: int = 1):
+        """Increment a cache counter"""
+        with self._lock:
+            self._stats[name] += amount
+
+    def _key(self, ticker: str, interval: str) -> str:
+        return f"{re.sub(r'[^A-Za-z0-9._^=-]', '_', ticker.upper())}_{interval}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    # Storage hooks; subclasses can keep the bars in another format
+    def _read_bars(self, key: str) -> tuple:
+        # Returns (bars, bytes read); raises OSError or ValueError when unreadable
+        path = self._path(key)
+        return pd.read_parquet(path), os.path.getsize(path)
+
+    def _write_bars(self, key: str, bars: pd.DataFrame) -> int:
+        # Write-then-rename so concurrent readers never see a partial file; returns bytes on disk
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        bars.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def _delete_bars(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _touch_bars(self, key: str):
+        # Mark the bars as read now; their modification time is the entry's last access
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _last_access(self, key: str, entry: dict) -> float:
+        try:
+            return max(entry["last_access"], os.path.getmtime(self._path(key)))
+        except OSError:
+            return entry["last_access"]
+
+    def _read_rolling_index(self, key: str, column: str) -> tuple:
+        # Returns (index, bytes written to store it); Parquet entries rebuild it from the bars every time
+        data, _ = self._read_bars(key)
+        return RollingIndex(data[column].to_numpy(dtype=np.float64), index=data.index), 0
+
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, "index.json")
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index: dict):
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp_path = f"{self._index_path()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._index_path())
+
+    def entry(self, ticker: str, interval: str = "1d") -> dict:
+        """
+        Get the index entry for a ticker
+
+        Args:
+            ticker: Stock ticker symbol
+            interval: Bar interval
+
+        Returns:
+            Entry dict (covered_from, last_bar, fetched_at, last_access, bytes) or None
+        """
+        key = self._key(ticker, interval)
+        with self._lock:
+            entry = self._load_index().get(key)
+        if entry is not None and not os.path.exists(self._path(key)):
+            return None
+        if entry is not None:
+            entry["last_access"] = self._last_access(key, entry)
+        return entry
+
+    def covers(self, ticker: str, interval: str, start: pd.Timestamp) -> bool:
+        """Check whether the cached history reaches back to start (None means full history)"""
+        entry = self.entry(ticker, interval)
+        if entry is None:
+            return False
+        if entry["covered_from"] is None:
+            return True
+        return start is not None and pd.Timestamp(entry["covered_from"]) <= start
+
+    def is_fresh(self, ticker: str, interval: str = "1d", now: float = None) -> bool:
+        """Check whether the entry was refreshed within refresh_after seconds"""
+        entry = self.entry(ticker, interval)
+        now = time.time() if now is None else now
+        return entry is not None and now - entry["fetched_at"] < self.refresh_after
+
+    def read(self, ticker: str, interval: str = "1d", start: pd.Timestamp = None, warmup: int = 0,
+             min_bars: int = 0) -> pd.DataFrame:
+        """
+        Read the cached bars for a ticker
+
+        Args:
+            ticker: Stock ticker symbol
+            interval: Bar interval
+            start: First timestamp wanted (None for the whole history)
+            warmup: Bars to include before start (see slice_bars)
+            min_bars: Bars wanted from the first requested bar onwards
+
+        Returns:
+            DataFrame of cached bars, or None if not cached
+        """
+        key = self._key(ticker, interval)
+        try:
+            data, size = self._read_bars(key)
+        except (OSError, ValueError):
+            self.record("misses")
+            return None
+
+        self._touch_bars(key)
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["bytes_read"] += size
+        if start is None and not warmup and not min_bars:
+            return data
+        return slice_bars(data, start, warmup, min_bars)
+
+    def rolling_index(self, ticker: str, interval: str = "1d", column: str = "Close") -> RollingIndex:
+        """
+        Prefix-sum index of one cached column, for rolling statistics of any window
+
+        Stores that keep the index next to the bars (see PriceStore) build
+        it on first use and only map it afterwards; it belongs to the
+        version of the bars it was built from, so new bars never meet a
+        stale index.
+
+        Args:
+            ticker: Stock ticker symbol
+            interval: Bar interval
+            column: Column to index
+
+        Returns:
+            RollingIndex over the whole cached history (its .index holds the
+            bar timestamps), or None if not cached
+        """
+        key = self._key(ticker, interval)
+        try:
+            rolling_index, size = self._read_rolling_index(key, column)
+        except (OSError, ValueError, KeyError):
+            self.record("misses")
+            return None
+
+        with self._lock:
+            self._stats["hits"] += 1
+            if size:
+                self._stats["bytes_written"] += size
+                index = self._load_index()
+                if key in index:
+                    index[key]["bytes"] += size
+                    self._save_index(index)
+        return rolling_index
+
+    def write(self, ticker: str, interval: str, bars: pd.DataFrame, covered_from: pd.Timestamp = None) -> pd.DataFrame:
+        """
+        Store a downloaded history, merging it with any cached bars
+
+        Args:
+            ticker: Stock ticker symbol
+            interval: Bar interval
+            bars: OHLCV bars from the provider
+            covered_from: First timestamp the download was asked to cover (None for full history)
+
+        Returns:
+            The merged DataFrame now in the cache
+        """
+        covered_from = None if covered_from is None else pd.Timestamp(covered_from).isoformat()
+        return self._merge(ticker, interval, bars, covered_from, extend=True)
+
+    def append(self, ticker: str, interval: str, bars: pd.DataFrame) -> pd.DataFrame:
+        """
+        Append newer bars to a cached history; overlapping timestamps take the new values
+
+        Args:
+            ticker: Stock ticker symbol
+            interval: Bar interval
+            bars: OHLCV bars newer than (or equal to) the last cached bar
+
+        Returns:
+            The merged DataFrame now in the cache
+        """
+        return self._merge(ticker, interval, bars, None, extend=False)
+
+    def _merge(self, ticker: str, interval: str, bars: pd.DataFrame, covered_from: str, extend: bool) -> pd.DataFrame:
+        key = self._key(ticker, interval)
+        with self._lock:
+            index = self._load_index()
+            if key in index and os.path.exists(self._path(key)):
+                existing, _ = self._read_bars(key)
+                bars = pd.concat([existing, bars])
+                bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+                old_from = index[key]["covered_from"]
+                if not extend:
+                    covered_from = old_from
+                elif old_from is None or covered_from is None:
+                    covered_from = None
+                else:
+                    covered_from = min(old_from, covered_from)
+                self._stats["appends"] += 1
+
+            size = self._write_bars(key, bars)
+
+            now = time.time()
+            index[key] = {
+                "ticker": ticker,
+                "interval": interval,
+                "covered_from": covered_from,
+                "last_bar": bars.index[-1].isoformat() if len(bars) else None,
+                "fetched_at": now,
+                "last_access": now,
+                "bytes": size,
+            }
+            self._stats["bytes_written"] += size
+            self._evict(index, now)
+            self._save_index(index)
+        return bars
+
+    def touch(self, ticker: str, interval: str = "1d"):
+        """Mark an entry as refreshed without changing its bars"""
+        key = self._key(ticker, interval)
+        with self._lock:
+            index = self._load_index()
+            if key in index:
+                index[key]["fetched_at"] = time.time()
+                self._save_index(index)
+
+    def _evict(self, index: dict, now: float):
+        accessed = {key: self._last_access(key, entry) for key, entry in index.items()}
+
+        # Drop entries unused for longer than max_age
+        for key in [k for k in index if now - accessed[k] > self.max_age]:
+            self._remove(index, key)
+
+        # Drop least recently used entries until within the size budget
+        total = sum(e["bytes"] for e in index.values())
+        for key in sorted(index, key=lambda k: accessed[k]):
+            if total <= self.max_bytes:
+                break
+            total -= index[key]["bytes"]
+            self._remove(index, key)
+
+    def _remove(self, index: dict, key: str):
+        index.pop(key, None)
+        self._delete_bars(key)
+        self._stats["evictions"] += 1
+
+    def evict(self):
+        """Apply the size and age limits now"""
+        with self._lock:
+            index = self._load_index()
+            self._evict(index, time.time())
+            self._save_index(index)
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            index = self._load_index()
+            for key in list(index):
+                self._remove(index, key)
+            self._save_index(index)
+
+    def size(self) -> int:
+        """Total bytes of cached files"""
+        return sum(e["bytes"] for e in self._load_index().values())
@@ -1,38 +1,304 @@
-import yfinance as yf
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+from data.cache import OHLCVCache, slice_bars
+from data.price_store import PriceStore
+from data.providers import (INTERVAL_FREQUENCIES, LimitedProvider, PriceProvider, YahooProvider, history_start,
+                            normalize_ohlcv, period_start)
+from strategies.registry import warmup_bars
+from utils.rolling_index import RollingIndex
+from utils.tracing import traced
 
-def fetch_data(ticker: str, period: str = "6mo") -> pd.DataFrame:
+# Fewest bars a period is analysed on; shorter periods start earlier
+MIN_BARS = 60
+
+# Trading minutes in a regular session, to turn intraday bar counts into trading days
+SESSION_MINUTES = 390
+
+_default_provider = None
+_default_cache = None
+
+def get_default_provider() -> PriceProvider:
+    """
+    Get the process-wide default data provider (Yahoo Finance)
+    """
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = YahooProvider()
+    return _default_provider
+
+def get_default_cache() -> OHLCVCache:
+    """
+    Get the process-wide default price store (memory-mapped columns, see PriceStore)
+
+    The location can be changed with the STRATEGY_GRADING_CACHE_DIR
+    environment variable; setting it to an empty string disables caching.
+    """
+    global _default_cache
+    if _default_cache is None:
+        cache_dir = os.environ.get("STRATEGY_GRADING_CACHE_DIR",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "strategy-grading"))
+        if not cache_dir:
+            return None
+        _default_cache = PriceStore(cache_dir)
+    return _default_cache
+
+def lead_start(start: pd.Timestamp, bars: int, interval: str = "1d") -> pd.Timestamp:
+    """
+    Timestamp far enough before start for at least bars bars to lie in between
+
+    Bars are counted as trading days (or the trading days they fill in
+    regular sessions, for intraday bars), with a week to spare for
+    holidays and shorter sessions.
+
+    Args:
+        start: First timestamp wanted
+        bars: Bars wanted before it
+        interval: Bar interval
+
+    Returns:
+        Earlier timestamp, or None (the whole history) for intervals without a known bar length
+    """
+    frequency = INTERVAL_FREQUENCIES.get(interval)
+    if start is None or frequency is None:
+        return None
+    if interval == "1d":
+        days = bars
+    else:
+        minutes = pd.Timedelta(pd.tseries.frequencies.to_offset(frequency)).total_seconds() / 60
+        days = -(-int(bars * minutes) // SESSION_MINUTES)
+    return (start - pd.offsets.BDay(days) - pd.Timedelta(days=7)).normalize()
+
+@traced()
+def load_bars(ticker: str, period: str, interval: str = "1d", provider: PriceProvider = None,
+              cache: OHLCVCache = None, warmup: int = 0, min_bars: int = 0, refresh: bool = False,
+              now: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Load raw OHLCV bars, reading the cache first and only downloading what is missing
+
+    The first download of a ticker fetches the period with its warm-up
+    and minimum bars in front (see lead_start), clipped to the history the
+    provider serves for the interval. A later period reaching further back
+    downloads from its own start and is merged into the cached bars, so
+    the cache grows to the longest period asked for and shorter periods
+    are slices of it. A cached history is topped up with bars from its
+    last timestamp onwards (the last bar is re-requested because it may
+    still have been forming).
+
+    Args:
+        ticker: Stock ticker symbol
+        period: Time period ('1mo', '3mo', '6mo', '1y', '2y', '5y', 'max')
+        interval: Bar interval
+        provider: Data provider (default: Yahoo Finance)
+        cache: OHLCV cache (default: process-wide price store)
+        warmup: Cached bars to include before the period (see slice_bars)
+        min_bars: Start the period earlier if it has fewer cached bars than this
+        refresh: Ask the provider for new bars even if the cache was refreshed recently
+        now: Current time the period ends at and the cache's freshness is
+            judged against (default: the wall clock); naive times count as UTC
+            for the freshness check
+
+    Returns:
+        DataFrame of bars covering the period; when read from the cache,
+        attrs["analysis_start"] is the first bar of the period
+    """
+    provider = provider or get_default_provider()
+    cache = cache or get_default_cache()
+    # Bars are dated in market time, so periods are cut on the clock's local date
+    local = now.tz_localize(None) if now is not None and now.tzinfo is not None else now
+    start = period_start(period, local)
+    history = history_start(interval, local)
+    if history is not None and (start is None or start < history):
+        # Intraday bars older than the provider's window cannot be downloaded
+        start = history
+
+    if cache is None:
+        return provider.fetch(ticker, period=period, interval=interval)
+
+    # First bar to hold: the period with its warm-up bars in front
+    first = lead_start(start, warmup + min_bars, interval)
+    if history is not None and (first is None or first < history):
+        first = history
+
+    if cache.covers(ticker, interval, first):
+        bars = cache.read(ticker, interval)
+        if bars is not None:
+            stale = refresh or not cache.is_fresh(ticker, interval, None if now is None else now.timestamp())
+            if not provider.offline and stale and len(bars):
+                new_bars = provider.fetch(ticker, interval=interval, start=bars.index[-1])
+                if new_bars.empty:
+                    cache.touch(ticker, interval)
+                else:
+                    bars = cache.append(ticker, interval, new_bars)
+            return slice_bars(bars, start, warmup, min_bars)
+    else:
+        cache.record("misses")
+
+    # Download the period with its warm-up bars; shorter periods are then slices of it
+    bars = provider.fetch(ticker, period="max" if first is None else None, interval=interval, start=first)
+    if bars.empty:
+        return bars
+    bars = cache.write(ticker, interval, bars, covered_from=first)
+    return slice_bars(bars, start, warmup, min_bars)
+
+@traced()
+def load_rolling_index(ticker: str, interval: str = "1d", column: str = "Close", provider: PriceProvider = None,
+                       cache: OHLCVCache = None) -> RollingIndex:
+    """
+    Rolling statistics index of a ticker's full history, downloading the history first if it is not cached
+
+    The index is stored next to the bars in the price store, so
+    exploring many windows over the same history costs one pass to build
+    it and constant time per query afterwards.
+
+    Args:
+        ticker: Stock ticker symbol
+        interval: Bar interval
+        column: Price column to index
+        provider: Data provider (default: Yahoo Finance)
+        cache: OHLCV cache (default: process-wide price store)
+
+    Returns:
+        RollingIndex whose .index holds the bar timestamps
     """
-    Fetch stock data from Yahoo Finance
-    
+    cache = cache or get_default_cache()
+    rolling_index = cache.rolling_index(ticker, interval, column) if cache is not None else None
+    if rolling_index is None:
+        bars = load_bars(ticker, "max", interval, provider=provider, cache=cache)
+        if bars.empty:
+            raise ValueError(f"No data found for ticker: {ticker}")
+        rolling_index = cache.rolling_index(ticker, interval, column) if cache is not None else None
+        if rolling_index is None:
+            bars = normalize_ohlcv(bars)
+            rolling_index = RollingIndex(bars[column].to_numpy(dtype=np.float64), bars.index)
+    return rolling_index
+
+@traced()
+def fetch_data(ticker: str, period: str = "6mo", provider: PriceProvider = None, cache: OHLCVCache = None,
+               interval: str = "1d", warmup: int = None, refresh: bool = False,
+               now: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Fetch stock data from Yahoo Finance, reading the local price store first
+
+    Periods are cut from the stored history with warmup extra bars in
+    front, and start earlier when they hold fewer than MIN_BARS bars.
+    Without a store only the period itself is downloaded, and 1mo of
+    daily bars is widened to 3mo to reach MIN_BARS.
+
     Args:
         ticker: Stock ticker symbol (e.g., 'AAPL', 'TCS.NS')
         period: Time period ('1mo', '3mo', '6mo', '1y', '2y', '5y')
-    
+        provider: Data provider (default: Yahoo Finance)
+        cache: OHLCV cache (default: process-wide price store)
+        interval: Bar interval ('1m', '2m', '5m', '15m', '30m', '60m', '1h', '1d')
+        warmup: Bars to load before the period so the indicators are warmed
+            up on its first bar (default: strategies.registry.warmup_bars())
+        refresh: Ask the provider for new bars even if the cache was refreshed recently
+        now: Current time (default: the wall clock; see load_bars)
+
     Returns:
-        DataFrame with stock data and returns
+        DataFrame with stock data and returns. Bars before
+        attrs["analysis_start"] (if set) are warm-up bars, which
+        build_indicator_frame drops once the indicators are computed.
     """
     try:
-        # Ensure we have enough data for meaningful analysis
-        min_period = "3mo" if period in ["1mo"] else period
-        data = yf.download(ticker, period=min_period, interval="1d")
-        
+        warmup = warmup_bars() if warmup is None else warmup
+        cache = cache or get_default_cache()
+        if cache is None and interval == "1d" and period in ["1mo"]:
+            # No stored history to take warm-up bars from; widen the period instead
+            period = "3mo"
+        data = load_bars(ticker, period, interval=interval, provider=provider, cache=cache,
+                         warmup=warmup, min_bars=MIN_BARS, refresh=refresh, now=now)
+        analysis_start = data.attrs.get("analysis_start")
+
         if data.empty:
             raise ValueError(f"No data found for ticker: {ticker}")
-        
+
+        # Flat float64 columns so downstream code never copies to normalize
+        data = normalize_ohlcv(data).astype(np.float64)
+
         # Remove any rows with missing data
-        data.dropna(inplace=True)
-        
+        data = data.dropna()
+
         # Calculate returns
         data["Return"] = data["Close"].pct_change()
-        
+
         # Remove the first row which will have NaN return
         data = data.dropna()
-        
+
+        analysed = len(data)
+        if analysis_start is not None:
+            data.attrs["analysis_start"] = analysis_start
+            analysed -= int(data.index.searchsorted(analysis_start))
+
         # Ensure we have enough data points
-        if len(data) < 60:  # Need at least 60 days for meaningful MA analysis
-            raise ValueError(f"Insufficient data: Only {len(data)} days available. Try a longer period.")
-        
+        if analysed < MIN_BARS:  # Need at least 60 bars for meaningful MA analysis
+            raise ValueError(f"Insufficient data: Only {analysed} bars available. Try a longer period.")
+
         return data
     except Exception as e:
         raise Exception(f"Error fetching data for {ticker}: {str(e)}")
+
+def fetch_many(tickers: list, period: str = "6mo", interval: str = "1d", provider: PriceProvider = None,
+               cache: OHLCVCache = None, max_workers: int = 16, retries: int = 2, backoff: float = 0.5,
+               refresh: bool = False, now: pd.Timestamp = None) -> tuple:
+    """
+    Fetch stock data for many tickers concurrently
+
+    Downloads run on a thread pool; the provider's max_concurrency caps how
+    many hit the provider at once and its max_rate how many start per
+    second, and provider calls failing with a transient error are retried
+    with exponential backoff. A failing ticker does not stop the others.
+
+    Args:
+        tickers: List of ticker symbols
+        period: Time period ('1mo', '3mo', '6mo', '1y', '2y', '5y')
+        interval: Bar interval
+        provider: Data provider (default: Yahoo Finance)
+        cache: OHLCV cache (default: process-wide on-disk cache)
+        max_workers: Thread pool size
+        retries: Retries per provider call after the first failure
+        backoff: Base backoff delay in seconds
+        refresh: Ask the provider for new bars even if the cache was refreshed recently
+        now: Current time (default: the wall clock; see load_bars)
+
+    Returns:
+        Tuple of (dict of ticker -> DataFrame, dict of ticker -> error message)
+    """
+    tickers = list(dict.fromkeys(tickers))
+    limited = LimitedProvider(provider or get_default_provider(), retries=retries, backoff=backoff)
+
+    data, errors = {}, {}
+    if not tickers:
+        return data, errors
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as executor:
+        # Each task runs in a copy of the caller's context so tracing spans nest under it
+        futures = {
+            ticker: executor.submit(contextvars.copy_context().run, fetch_data, ticker, period, provider=limited,
+                                    cache=cache, interval=interval, refresh=refresh, now=now)
+            for ticker in tickers
+        }
+        for ticker, future in futures.items():
+            try:
+                data[ticker] = future.result()
+            except Exception as e:
+                errors[ticker] = str(e)
+
+    return data, errors
+
+def to_long_frame(data: dict) -> pd.DataFrame:
+    """
+    Stack per-ticker DataFrames into one long-format DataFrame with a Ticker column
+
+    Args:
+        data: Dict of ticker -> DataFrame (as returned by fetch_many)
+
+    Returns:
+        Long-format DataFrame
+    """
+    if not data:
+        return pd.DataFrame()
+    return pd.concat(data, names=["Ticker"]).reset_index(level="Ticker")
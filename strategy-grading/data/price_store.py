@@ -0,0 +1,132 @@
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+from data.cache import OHLCVCache
+from data.providers import OHLCV_COLUMNS
+from utils.rolling_index import RollingIndex
+
+class PriceStore(OHLCVCache):
+    """
+    On-disk columnar price store read through memory maps
+
+    Each ticker and interval is a directory of versions; a version holds
+    one .npy file per column plus the bar timestamps. Reads map the
+    newest version read-only and wrap the arrays in a DataFrame without
+    copying, so opening a long history costs a few milliseconds and pages
+    are only loaded for the bars that are used. A period is a binary
+    search on the timestamps and a positional slice of the mapped columns.
+
+    Updates write a complete new version next to the old one and then
+    rename it into place, so readers never see a partial write; frames
+    still mapping an older version keep working after it is removed.
+
+    The prefix-sum index of a column (see rolling_index) is saved into
+    the version it was built from, so it is replaced along with the bars.
+
+    Indexing, freshness and eviction work as in OHLCVCache.
+
+    Args:
+        cache_dir: Directory holding one subdirectory per ticker and interval
+        max_bytes: Size budget for all stored columns
+        max_age: Seconds an entry may go unused before eviction
+        refresh_after: Seconds after a refresh during which no new bars are requested
+    """
+
+    INDEX_FILE = "_index.npy"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _versions(self, key: str) -> list:
+        # Completed versions, oldest first; in-progress writes end in .tmp
+        try:
+            names = os.listdir(self._path(key))
+        except OSError:
+            return []
+        return sorted((name for name in names if name.isdigit()), key=int)
+
+    def _read_bars(self, key: str) -> tuple:
+        for attempt in range(3):
+            versions = self._versions(key)
+            if not versions:
+                raise FileNotFoundError(self._path(key))
+            folder = os.path.join(self._path(key), versions[-1])
+            try:
+                index = np.load(os.path.join(folder, self.INDEX_FILE), mmap_mode="r")
+                # Files starting with an underscore are timestamps and derived data, not columns
+                names = [name[:-len(".npy")] for name in os.listdir(folder)
+                         if name.endswith(".npy") and not name.startswith("_")]
+                order = {name: i for i, name in enumerate(OHLCV_COLUMNS)}
+                columns = {name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r")
+                           for name in sorted(names, key=lambda name: (order.get(name, len(order)), name))}
+                break
+            except FileNotFoundError:
+                # A writer replaced this version between listing and opening it
+                if attempt == 2:
+                    raise
+        # Memory-mapped columns are used as they are; the frame only holds views of them
+        data = pd.DataFrame(columns, index=pd.DatetimeIndex(index, copy=False, name="Date"), copy=False)
+        return data, int(index.nbytes + sum(column.nbytes for column in columns.values()))
+
+    def _read_rolling_index(self, key: str, column: str) -> tuple:
+        for attempt in range(3):
+            versions = self._versions(key)
+            if not versions:
+                raise FileNotFoundError(self._path(key))
+            folder = os.path.join(self._path(key), versions[-1])
+            path = os.path.join(folder, f"_rolling_{column}.npy")
+            try:
+                timestamps = pd.DatetimeIndex(np.load(os.path.join(folder, self.INDEX_FILE), mmap_mode="r"),
+                                              copy=False, name="Date")
+                if os.path.exists(path):
+                    return RollingIndex.from_state(np.load(path, mmap_mode="r"), timestamps), 0
+                if not os.path.exists(os.path.join(folder, f"{column}.npy")) and os.path.isdir(folder):
+                    raise KeyError(column)
+                values = np.load(os.path.join(folder, f"{column}.npy"), mmap_mode="r")
+                break
+            except FileNotFoundError:
+                # A writer replaced this version between listing and opening it
+                if attempt == 2:
+                    raise
+
+        rolling_index = RollingIndex(values, timestamps)
+        # Saved into the version it was built from; if that version has been replaced meanwhile, it is dropped
+        tmp_path = f"{path[:-len('.npy')]}.{os.getpid()}.{threading.get_ident()}.tmp.npy"
+        try:
+            np.save(tmp_path, rolling_index.state)
+            os.replace(tmp_path, path)
+            return rolling_index, os.path.getsize(path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return rolling_index, 0
+
+    def _write_bars(self, key: str, bars: pd.DataFrame) -> int:
+        path = self._path(key)
+        os.makedirs(path, exist_ok=True)
+        tmp_path = os.path.join(path, f"write.{os.getpid()}.{threading.get_ident()}.tmp")
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, self.INDEX_FILE), bars.index.to_numpy())
+        for column in bars.columns:
+            np.save(os.path.join(tmp_path, f"{column}.npy"), bars[column].to_numpy())
+        size = sum(os.path.getsize(os.path.join(tmp_path, name)) for name in os.listdir(tmp_path))
+
+        # Another process may publish the same version number first; take the next one
+        while True:
+            versions = self._versions(key)
+            version = str(int(versions[-1]) + 1 if versions else 1)
+            try:
+                os.rename(tmp_path, os.path.join(path, version))
+                break
+            except OSError:
+                if not os.path.isdir(os.path.join(path, version)):
+                    raise
+        # Older versions are only needed by frames that already map them
+        for old in versions:
+            shutil.rmtree(os.path.join(path, old), ignore_errors=True)
+        return size
+
+    def _delete_bars(self, key: str):
+        shutil.rmtree(self._path(key), ignore_errors=True)
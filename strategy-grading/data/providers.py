@@ -0,0 +1,369 @@
+import random
+import threading
+import time
+import zlib
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Calendar offsets matching the period strings accepted by Yahoo Finance
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Bar spacing for each supported interval
+INTERVAL_FREQUENCIES = {
+    "1m": "min",
+    "2m": "2min",
+    "5m": "5min",
+    "15m": "15min",
+    "30m": "30min",
+    "60m": "h",
+    "1h": "h",
+    "1d": "B",
+}
+
+# How far back Yahoo Finance serves intraday bars; longer requests are clipped
+YAHOO_INTRADAY_LOOKBACK = {
+    "1m": pd.Timedelta(days=7),
+    "2m": pd.Timedelta(days=60),
+    "5m": pd.Timedelta(days=60),
+    "15m": pd.Timedelta(days=60),
+    "30m": pd.Timedelta(days=60),
+    "60m": pd.Timedelta(days=730),
+    "1h": pd.Timedelta(days=730),
+}
+
+def period_start(period: str, now: pd.Timestamp = None) -> pd.Timestamp:
+    """
+    Get the first timestamp covered by a period ending now
+
+    Args:
+        period: Time period ('1mo', '3mo', '6mo', '1y', '2y', '5y', 'ytd', 'max')
+        now: Reference time (default: current time)
+
+    Returns:
+        Start timestamp, or None for 'max'
+    """
+    now = pd.Timestamp.now() if now is None else now
+    if period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    if period not in PERIOD_OFFSETS:
+        raise ValueError(f"Unsupported period: {period}")
+    return (now - PERIOD_OFFSETS[period]).normalize()
+
+def history_start(interval: str, now: pd.Timestamp = None) -> pd.Timestamp:
+    """
+    Get the first timestamp of the full history available for an interval
+
+    Args:
+        interval: Bar interval
+        now: Reference time (default: current time)
+
+    Returns:
+        None (all history) for daily bars, or the start of Yahoo's intraday window
+    """
+    lookback = YAHOO_INTRADAY_LOOKBACK.get(interval)
+    if lookback is None:
+        return None
+    now = pd.Timestamp.now() if now is None else now
+    return (now - lookback + pd.Timedelta(days=1)).normalize()
+
+def normalize_ohlcv(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Flatten provider output to single-level OHLCV columns on a sorted, tz-naive index
+
+    Args:
+        data: Raw provider DataFrame (may have (Price, Ticker) MultiIndex columns)
+
+    Returns:
+        DataFrame with flat columns
+    """
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.copy()
+        data.columns = data.columns.get_level_values(0)
+    data = data.loc[:, ~data.columns.duplicated()]
+    if data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    return data.sort_index()
+
+class PriceProvider:
+    """
+    Interface for OHLCV data sources used by fetch_data
+
+    Subclasses implement fetch() and return flat OHLCV columns indexed by
+    bar timestamp. Either period or start is given; start is inclusive.
+    max_concurrency caps how many fetches may run at once against the
+    provider across all batch downloads in the process, and max_rate (if
+    set) how many may start per second. Offline providers
+    can only serve what is already cached, so stale cache entries are used
+    as they are instead of being topped up.
+    """
+    name = "base"
+    max_concurrency = 8
+    max_rate = None
+    offline = False
+
+    def fetch(self, ticker: str, period: str = None, interval: str = "1d", start: pd.Timestamp = None) -> pd.DataFrame:
+        raise NotImplementedError
+
+class YahooProvider(PriceProvider):
+    """
+    Yahoo Finance provider backed by yfinance
+
+    Intraday requests reaching further back than Yahoo serves for the
+    interval (see YAHOO_INTRADAY_LOOKBACK) are clipped to the available
+    history instead of failing.
+    """
+    name = "yahoo"
+    max_concurrency = 4
+
+    def fetch(self, ticker: str, period: str = None, interval: str = "1d", start: pd.Timestamp = None) -> pd.DataFrame:
+        import yfinance as yf
+
+        earliest = history_start(interval)
+        if earliest is not None:
+            requested = start if start is not None else period_start(period)
+            start = earliest if requested is None else max(requested, earliest)
+        if start is not None:
+            data = yf.download(ticker, start=start, interval=interval)
+        else:
+            data = yf.download(ticker, period=period, interval=interval)
+        return normalize_ohlcv(data)
+
+class CacheOnlyProvider(PriceProvider):
+    """Offline provider for cached-only runs; every download request fails"""
+    name = "cache-only"
+    offline = True
+
+    def fetch(self, ticker: str, period: str = None, interval: str = "1d", start: pd.Timestamp = None) -> pd.DataFrame:
+        raise LookupError(f"{ticker} ({interval}, {period or start}) is not in the cache")
+
+class SyntheticProvider(PriceProvider):
+    """
+    Offline provider generating deterministic random-walk bars
+
+    The same ticker always yields the same history, so incremental fetches
+    line up with earlier ones. Useful for tests, benchmarks and demos.
+
+    Args:
+        origin: Timestamp of the first generated bar
+        latency: Seconds to sleep on every fetch call
+        clock: Callable returning the current time as a Timestamp
+        seed: Base seed mixed with each ticker name
+        fail_tickers: Tickers whose fetches always raise
+        transient_failures: Number of initial fetches per ticker that raise before succeeding
+    """
+    name = "synthetic"
+
+    def __init__(self, origin: str = "2000-01-03", latency: float = 0.0, clock=None, seed: int = 0,
+                 fail_tickers=(), transient_failures: int = 0):
+        self.origin = pd.Timestamp(origin)
+        self.latency = latency
+        self.clock = clock or pd.Timestamp.now
+        self.seed = seed
+        self.fail_tickers = set(fail_tickers)
+        self.transient_failures = transient_failures
+        self.calls = 0
+        self._ticker_calls = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Locks cannot be pickled; worker processes get a fresh one
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def bars(self, ticker: str, interval: str = "1d", end: pd.Timestamp = None) -> pd.DataFrame:
+        """
+        Generate the full history of a ticker up to end
+
+        Args:
+            ticker: Stock ticker symbol
+            interval: Bar interval
+            end: Last timestamp to generate (default: clock())
+
+        Returns:
+            OHLCV DataFrame
+        """
+        end = self.clock() if end is None else end
+        if interval == "1d":
+            # Business days via NumPy; pandas builds "B" ranges in a Python loop
+            days = np.arange(self.origin.date(), end.normalize().date() + pd.Timedelta(days=1), dtype="datetime64[D]")
+            index = pd.DatetimeIndex(days[np.is_busday(days)].astype("datetime64[ns]"))
+        else:
+            index = pd.date_range(self.origin, end, freq=INTERVAL_FREQUENCIES[interval])
+        n = len(index)
+        # One stream per field so a longer history extends a shorter one exactly
+        key = zlib.crc32(ticker.encode())
+        # Intraday bars get the daily drift and volatility scaled to their share of a 6.5 hour session
+        scale = 1.0 if interval == "1d" else pd.Timedelta(pd.tseries.frequencies.to_offset(
+            INTERVAL_FREQUENCIES[interval])) / pd.Timedelta(minutes=390)
+        log_returns = np.random.default_rng([self.seed, key, 0]).normal(0.0003 * scale, 0.015 * np.sqrt(scale), n)
+        spread = np.abs(np.random.default_rng([self.seed, key, 1]).normal(0.0, 0.005, n))
+        volume = np.random.default_rng([self.seed, key, 2]).integers(100_000, 5_000_000, n)
+
+        close = 100 * np.exp(np.cumsum(log_returns))
+        open_ = np.concatenate([close[:1], close[:-1]])
+        data = pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1 + spread),
+            "Low": np.minimum(open_, close) * (1 - spread),
+            "Close": close,
+            "Volume": volume,
+        }, index=index)
+        data.index.name = "Date"
+        return data
+
+    def fetch(self, ticker: str, period: str = None, interval: str = "1d", start: pd.Timestamp = None) -> pd.DataFrame:
+        with self._lock:
+            self.calls += 1
+            self._ticker_calls[ticker] = attempt = self._ticker_calls.get(ticker, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if ticker in self.fail_tickers:
+            raise ValueError(f"Unknown ticker: {ticker}")
+        if attempt <= self.transient_failures:
+            raise ConnectionError(f"Simulated transient failure for {ticker}")
+
+        now = self.clock()
+        data = self.bars(ticker, interval, end=now)
+        if start is None and period is not None:
+            start = period_start(period, now)
+        if start is not None:
+            data = data[data.index >= start]
+        return data
+
+# HTTP statuses worth retrying: timeouts, rate limiting and server errors
+TRANSIENT_HTTP_STATUSES = {408, 429, 500, 502, 503, 504}
+
+def is_transient(error: Exception) -> bool:
+    """
+    Check whether a failed fetch may succeed when retried
+
+    Network errors and timeouts (OSError, which the requests exceptions
+    derive from) are transient unless they carry an HTTP response with a
+    permanent status such as 404; Yahoo's rate-limit error is transient.
+    Anything else (unknown tickers, empty or malformed downloads) fails
+    the same way every time.
+
+    Args:
+        error: Exception raised by a provider
+
+    Returns:
+        True if the fetch should be retried
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in TRANSIENT_HTTP_STATUSES
+    return isinstance(error, OSError) or type(error).__name__ == "YFRateLimitError"
+
+_provider_semaphores = {}
+_provider_semaphores_lock = threading.Lock()
+
+def provider_semaphore(provider: PriceProvider) -> threading.BoundedSemaphore:
+    """
+    Get the process-wide semaphore limiting concurrent fetches for a provider type
+    """
+    with _provider_semaphores_lock:
+        key = (type(provider), provider.name)
+        if key not in _provider_semaphores:
+            _provider_semaphores[key] = threading.BoundedSemaphore(provider.max_concurrency)
+        return _provider_semaphores[key]
+
+class RateLimiter:
+    """
+    Spaces out calls so that at most rate start per second
+
+    Thread-safe; each caller reserves the next free slot and is told how
+    long to wait for it.
+
+    Args:
+        rate: Calls per second
+        clock: Monotonic clock in seconds
+    """
+
+    def __init__(self, rate: float, clock=time.monotonic):
+        self.interval = 1.0 / rate
+        self.clock = clock
+        self._next = None
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserve the next call slot and return the seconds to wait before using it"""
+        with self._lock:
+            now = self.clock()
+            slot = now if self._next is None else max(self._next, now)
+            self._next = slot + self.interval
+            return slot - now
+
+_provider_rate_limiters = {}
+
+def provider_rate_limiter(provider: PriceProvider) -> RateLimiter:
+    """
+    Get the process-wide rate limiter for a provider type, or None if it has no max_rate
+    """
+    if not provider.max_rate:
+        return None
+    with _provider_semaphores_lock:
+        key = (type(provider), provider.name)
+        if key not in _provider_rate_limiters:
+            _provider_rate_limiters[key] = RateLimiter(provider.max_rate)
+        return _provider_rate_limiters[key]
+
+class LimitedProvider(PriceProvider):
+    """
+    Wrap a provider with its concurrency and rate limits and retries with exponential backoff
+
+    Only transient errors (see is_transient) are retried; others are
+    raised straight away.
+
+    Args:
+        provider: Provider to wrap
+        retries: Number of retries after the first failed attempt
+        backoff: Base delay in seconds; attempt n waits about backoff * 2**n
+        sleep: Sleep function (replaceable in tests)
+    """
+
+    def __init__(self, provider: PriceProvider, retries: int = 2, backoff: float = 0.5, sleep=time.sleep):
+        self.provider = provider
+        self.name = provider.name
+        self.max_concurrency = provider.max_concurrency
+        self.max_rate = provider.max_rate
+        self.offline = provider.offline
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self._semaphore = provider_semaphore(provider)
+        self._rate_limiter = provider_rate_limiter(provider)
+
+    def fetch(self, ticker: str, period: str = None, interval: str = "1d", start: pd.Timestamp = None) -> pd.DataFrame:
+        for attempt in range(self.retries + 1):
+            # Wait for a rate slot before taking a concurrency slot, so waiting calls do not hold one
+            if self._rate_limiter is not None:
+                delay = self._rate_limiter.reserve()
+                if delay > 0:
+                    self.sleep(delay)
+            try:
+                with self._semaphore:
+                    return self.provider.fetch(ticker, period=period, interval=interval, start=start)
+            except Exception as error:
+                if attempt == self.retries or not is_transient(error):
+                    raise
+            # Jittered exponential backoff outside the semaphore so other tickers can proceed
+            self.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
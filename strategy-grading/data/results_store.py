@@ -0,0 +1,420 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    period TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    indicator1 TEXT NOT NULL,
+    signal1 TEXT NOT NULL,
+    indicator2 TEXT NOT NULL,
+    signal2 TEXT NOT NULL,
+    parameter_hash TEXT NOT NULL,
+    data_hash TEXT NOT NULL,
+    start TEXT,
+    end TEXT,
+    bars INTEGER,
+    created_at REAL NOT NULL,
+    comparison TEXT NOT NULL,
+    ranking TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS runs_request ON runs (
+    ticker, period, interval, indicator1, signal1, indicator2, signal2, parameter_hash, data_hash);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at);
+CREATE INDEX IF NOT EXISTS runs_data ON runs (data_hash);
+
+CREATE TABLE IF NOT EXISTS comparisons (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    ticker TEXT NOT NULL,
+    period TEXT NOT NULL,
+    end TEXT,
+    indicator1 TEXT NOT NULL,
+    signal1 TEXT NOT NULL,
+    indicator2 TEXT NOT NULL,
+    signal2 TEXT NOT NULL,
+    t_statistic REAL,
+    p_value REAL,
+    mean1 REAL,
+    mean2 REAL,
+    count1 INTEGER,
+    count2 INTEGER,
+    winner TEXT,
+    loser TEXT,
+    significance TEXT
+);
+CREATE INDEX IF NOT EXISTS comparisons_winner ON comparisons (winner, loser, end, p_value);
+CREATE INDEX IF NOT EXISTS comparisons_pair ON comparisons (indicator1, indicator2, end);
+CREATE INDEX IF NOT EXISTS comparisons_ticker ON comparisons (ticker, end);
+CREATE INDEX IF NOT EXISTS comparisons_run ON comparisons (run_id);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    ticker TEXT NOT NULL,
+    end TEXT,
+    indicator TEXT NOT NULL,
+    count INTEGER,
+    mean_return REAL,
+    std_return REAL,
+    total_return REAL
+);
+CREATE INDEX IF NOT EXISTS summaries_indicator ON summaries (indicator, end);
+CREATE INDEX IF NOT EXISTS summaries_ticker ON summaries (ticker, end);
+CREATE INDEX IF NOT EXISTS summaries_run ON summaries (run_id);
+"""
+
+# Columns of runs that identify a request; identical requests have equal values
+REQUEST_FIELDS = ["ticker", "period", "interval", "indicator1", "signal1", "indicator2", "signal2",
+                  "parameter_hash", "data_hash"]
+
+def parameter_hash(parameters: dict = None) -> str:
+    """
+    Hash of the indicator parameters a result was computed with
+
+    Every registered indicator's defaults are included, so registering
+    an indicator or changing a default changes the hash as well.
+
+    Args:
+        parameters: Indicator name -> keyword arguments (as for build_indicator_frame)
+
+    Returns:
+        Hex digest
+    """
+    from strategies.registry import INDICATORS
+
+    parameters = parameters or {}
+    effective = {name: {**indicator.defaults, **parameters.get(name, {})} for name, indicator in INDICATORS.items()}
+    return hashlib.blake2b(json.dumps(effective, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+def request_key(ticker: str, period: str, interval: str, indicator1: str, indicator2: str, signal1: str,
+                signal2: str, parameters: dict, data_hash: str) -> dict:
+    """
+    Identity of one comparison request in the results store
+
+    Args:
+        ticker: Stock ticker symbol
+        period: Time period
+        interval: Bar interval
+        indicator1, indicator2: Indicator names
+        signal1, signal2: Signal types
+        parameters: Indicator parameters
+        data_hash: Content hash of the fetched data (utils.result_cache.frame_fingerprint)
+
+    Returns:
+        Dict with one value per REQUEST_FIELDS entry
+    """
+    return {"ticker": ticker.upper(), "period": period, "interval": interval, "indicator1": indicator1,
+            "signal1": signal1, "indicator2": indicator2, "signal2": signal2,
+            "parameter_hash": parameter_hash(parameters), "data_hash": data_hash}
+
+def _timestamp(value) -> str:
+    # ISO text in UTC (naive timestamps are taken as they are), so text order is time order
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    if value.tzinfo is not None:
+        value = value.tz_convert("UTC").tz_localize(None)
+    return value.isoformat()
+
+def _number(value):
+    # Plain Python numbers for sqlite3; NaN is stored as NULL
+    if value is None:
+        return None
+    value = value.item() if hasattr(value, "item") else value
+    return None if isinstance(value, float) and value != value else value
+
+def _split_pair(key: str) -> tuple:
+    # "RSI_All vs MACD_Buy" -> ("RSI", "All", "MACD", "Buy")
+    first, second = key.split(" vs ")
+    return (*first.rsplit("_", 1), *second.rsplit("_", 1))
+
+class ResultsStore:
+    """
+    Local SQLite store of comparison results, one row per distinct request
+
+    A run is identified by ticker, period, interval, compared indicators
+    and signal types, a hash of the indicator parameters and a content
+    hash of the fetched data, so an identical request can be answered
+    from the store without recomputing, and changed data or parameters
+    never return a stale result. Each run keeps its comparison results,
+    ranking and summary as JSON for exact reconstruction, and its
+    comparisons and per-indicator summaries are also written as indexed
+    rows (with ticker, period and last bar copied in) so that questions
+    across the history, such as every ticker where MACD beat RSI at
+    p < 0.05 in a given month, are index range scans.
+
+    Writes go through put_many, one transaction per batch. The database
+    runs in WAL mode, so readers in other threads and processes are not
+    blocked by a writer. Connections are opened per thread, and a store
+    can be pickled to worker processes (it reopens by path).
+
+    Args:
+        path: Database file (created if missing)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "runs_written": 0}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        with connection:
+            connection.executescript(SCHEMA)
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state["path"])
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @property
+    def stats(self) -> dict:
+        """Snapshot of store counters (hits, misses, runs_written)"""
+        with self._lock:
+            return dict(self._stats)
+
+    def _record(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def get(self, request: dict) -> dict:
+        """
+        Stored results of an identical request
+
+        Args:
+            request: Request identity from request_key
+
+        Returns:
+            Dict with comparison, ranking and summary (as returned by
+            compare_indicators, rank_indicators and get_indicator_summary),
+            bars, start, end and created_at; or None if not stored
+        """
+        row = self._connection().execute(
+            f"SELECT comparison, ranking, summary, bars, start, end, created_at FROM runs "
+            f"WHERE {' AND '.join(f'{field} = ?' for field in REQUEST_FIELDS)}",
+            [request[field] for field in REQUEST_FIELDS]).fetchone()
+        if row is None:
+            self._record("misses")
+            return None
+        self._record("hits")
+        comparison, ranking, summary, bars, start, end, created_at = row
+        return {
+            "comparison": json.loads(comparison),
+            "ranking": [tuple(item) for item in json.loads(ranking)],
+            "summary": json.loads(summary),
+            "bars": bars,
+            "start": start,
+            "end": end,
+            "created_at": created_at,
+        }
+
+    def put(self, request: dict, comparison: dict, ranking: list, summary: dict, data: pd.DataFrame = None) -> bool:
+        """
+        Store the results of one request (see put_many)
+
+        Returns:
+            True if stored, False if an identical request was already stored
+        """
+        return self.put_many([self.record(request, comparison, ranking, summary, data)]) == 1
+
+    @staticmethod
+    def record(request: dict, comparison: dict, ranking: list, summary: dict, data: pd.DataFrame = None) -> dict:
+        """
+        Bundle a request and its results for put_many
+
+        Args:
+            request: Request identity from request_key
+            comparison: Result of compare_indicators
+            ranking: Result of rank_indicators
+            summary: Result of get_indicator_summary
+            data: Analysed frame, for its bar count and first and last bar
+
+        Returns:
+            Record dict
+        """
+        return {
+            **request,
+            "bars": len(data) if data is not None else None,
+            "start": data.index[0] if data is not None and len(data) else None,
+            "end": data.index[-1] if data is not None and len(data) else None,
+            "comparison": comparison,
+            "ranking": ranking,
+            "summary": summary,
+        }
+
+    def put_many(self, records: list) -> int:
+        """
+        Store many results in one transaction
+
+        Requests that are already stored are skipped.
+
+        Args:
+            records: Record dicts from record()
+
+        Returns:
+            Number of runs written
+        """
+        connection = self._connection()
+        written = 0
+        comparisons, summaries = [], []
+        now = time.time()
+        encode = lambda value: json.dumps(value, default=_number)
+        with connection:
+            for record in records:
+                end = _timestamp(record["end"])
+                cursor = connection.execute(
+                    f"INSERT INTO runs ({', '.join(REQUEST_FIELDS)}, start, end, bars, created_at, comparison, "
+                    f"ranking, summary) VALUES ({', '.join('?' * (len(REQUEST_FIELDS) + 7))}) ON CONFLICT DO NOTHING",
+                    [record[field] for field in REQUEST_FIELDS]
+                    + [_timestamp(record["start"]), end, record["bars"], now, encode(record["comparison"]),
+                       encode(record["ranking"]), encode(record["summary"])])
+                if not cursor.rowcount:
+                    continue
+                written += 1
+                run_id = cursor.lastrowid
+                for key, result in record["comparison"].items():
+                    indicator1, signal1, indicator2, signal2 = _split_pair(key)
+                    winner = result.get("winner")
+                    loser = {indicator1: indicator2, indicator2: indicator1}.get(winner)
+                    comparisons.append((
+                        run_id, record["ticker"], record["period"], end, indicator1, signal1, indicator2, signal2,
+                        _number(result.get("t_statistic")), _number(result.get("p_value")),
+                        _number(result.get(f"{indicator1.lower()}_mean")), _number(result.get(f"{indicator2.lower()}_mean")),
+                        _number(result.get(f"{indicator1.lower()}_count")), _number(result.get(f"{indicator2.lower()}_count")),
+                        winner, loser, result.get("significance")))
+                for indicator, stats in record["summary"].items():
+                    summaries.append((run_id, record["ticker"], end, indicator, _number(stats.get("count")),
+                                      _number(stats.get("mean_return")), _number(stats.get("std_return")),
+                                      _number(stats.get("total_return"))))
+            connection.executemany(f"INSERT INTO comparisons VALUES ({', '.join('?' * 17)})", comparisons)
+            connection.executemany(f"INSERT INTO summaries VALUES ({', '.join('?' * 8)})", summaries)
+        self._record("runs_written", written)
+        return written
+
+    def _select(self, query: str, values: list) -> pd.DataFrame:
+        # Rows straight from the cursor; pandas.read_sql_query costs more than the indexed query itself
+        cursor = self._connection().execute(query, values)
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=[column[0] for column in cursor.description])
+
+    def comparisons(self, ticker: str = None, winner: str = None, loser: str = None, indicators: tuple = None,
+                    max_p: float = None, since=None, until=None, limit: int = None) -> pd.DataFrame:
+        """
+        Stored comparisons matching every given filter, newest last bar first
+
+        Args:
+            ticker: Only this ticker
+            winner: Only comparisons this indicator won (at p < 0.05, see determine_winner_simple)
+            loser: Only comparisons won against this indicator
+            indicators: Only this (indicator1, indicator2) pair, in either order
+            max_p: Only p-values below this
+            since: Only results whose last bar is at or after this time
+            until: Only results whose last bar is before this time
+            limit: Most rows to return
+
+        Returns:
+            DataFrame with ticker, period, end, indicator1, signal1, indicator2,
+            signal2, t_statistic, p_value, mean1, mean2, count1, count2,
+            winner, loser and significance
+        """
+        conditions, values = [], []
+        for column, value in (("ticker", ticker and ticker.upper()), ("winner", winner), ("loser", loser)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        if indicators is not None:
+            conditions.append("((indicator1 = ? AND indicator2 = ?) OR (indicator1 = ? AND indicator2 = ?))")
+            values.extend([*indicators, *reversed(indicators)])
+        if max_p is not None:
+            conditions.append("p_value < ?")
+            values.append(max_p)
+        if since is not None:
+            conditions.append("end >= ?")
+            values.append(_timestamp(since))
+        if until is not None:
+            conditions.append("end < ?")
+            values.append(_timestamp(until))
+        query = ("SELECT ticker, period, end, indicator1, signal1, indicator2, signal2, t_statistic, p_value, "
+                 "mean1, mean2, count1, count2, winner, loser, significance FROM comparisons")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY end DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return self._select(query, values)
+
+    def summaries(self, ticker: str = None, indicator: str = None, since=None, until=None,
+                  limit: int = None) -> pd.DataFrame:
+        """
+        Stored per-indicator summaries matching every given filter, newest last bar first
+
+        Args:
+            ticker: Only this ticker
+            indicator: Only this indicator
+            since: Only results whose last bar is at or after this time
+            until: Only results whose last bar is before this time
+            limit: Most rows to return
+
+        Returns:
+            DataFrame with ticker, end, indicator, count, mean_return, std_return and total_return
+        """
+        conditions, values = [], []
+        for column, value in (("ticker", ticker and ticker.upper()), ("indicator", indicator)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        if since is not None:
+            conditions.append("end >= ?")
+            values.append(_timestamp(since))
+        if until is not None:
+            conditions.append("end < ?")
+            values.append(_timestamp(until))
+        query = "SELECT ticker, end, indicator, count, mean_return, std_return, total_return FROM summaries"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY end DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return self._select(query, values)
+
+_default_store = None
+
+def get_default_store() -> ResultsStore:
+    """
+    Get the process-wide results store
+
+    It lives in results.sqlite next to the price store
+    (STRATEGY_GRADING_CACHE_DIR); STRATEGY_GRADING_RESULTS_DB overrides the
+    file, and setting either to an empty string disables it.
+    """
+    global _default_store
+    if _default_store is None:
+        path = os.environ.get("STRATEGY_GRADING_RESULTS_DB")
+        if path is None:
+            cache_dir = os.environ.get("STRATEGY_GRADING_CACHE_DIR",
+                                       os.path.join(os.path.expanduser("~"), ".cache", "strategy-grading"))
+            path = os.path.join(cache_dir, "results.sqlite") if cache_dir else ""
+        if not path:
+            return None
+        _default_store = ResultsStore(path)
+    return _default_store
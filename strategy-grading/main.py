@@ -1,54 +1,477 @@
-from data.data_fetcher import fetch_data
-from strategies.rsi_strategy import generate_rsi_signals
-from strategies.macd_strategy import generate_macd_signals
-from strategies.bollinger_strategy import generate_bollinger_signals
-from analysis.indicator_comparison import compare_indicators, rank_indicators, get_indicator_summary
+# Heavy modules (pandas, scipy, the data/analysis/strategies packages) are
+# imported inside the functions that need them, so the command line starts fast
+from __future__ import annotations
+import argparse
+import json
+import math
+import sys
+from typing import TYPE_CHECKING
+from utils.tracing import span, traced
 
-def run_indicator_comparison(ticker: str = "AAPL", period: str = "6mo", indicator1: str = "RSI", indicator2: str = "MACD", signal1: str = "All", signal2: str = "All"):
+if TYPE_CHECKING:
+    import pandas as pd
+
+@traced()
+def build_indicator_frame(data: pd.DataFrame, parameters: dict = None, chunk_size: int | None = None,
+                          compact: bool = False, max_workers: int = 1) -> pd.DataFrame:
+    """
+    Add every registered indicator and its signals to a price frame
+    
+    The indicators (RSI, MACD and Bollinger Bands, plus any registered
+    with strategies.registry.register_indicator) are computed as one
+    graph, so shared intermediates are computed once. Every column is
+    written into the same frame, so the frame from fetch_data becomes the
+    feature frame. Bars before data.attrs["analysis_start"] (set by
+    fetch_data) only warm up the indicators: they get no signals and are
+    dropped at the end.
+    
+    Args:
+        data: DataFrame with stock price data and returns (modified in place)
+        parameters: Optional dict of indicator name ("RSI", "MACD", "Bollinger")
+            -> keyword arguments for its build function
+        chunk_size: Bars per chunk for the indicator calculations (default:
+            utils.indicator_kernels.DEFAULT_CHUNK_SIZE; 0 for one pass).
+            Results are the same for every chunk size; smaller chunks only
+            lower peak memory on long intraday histories.
+        compact: Downcast indicators to float32 and drop Open/High/Low/Volume
+            once the signals are computed (see utils.compact)
+        max_workers: Threads computing independent indicators at the same time
+        
+    Returns:
+        The DataFrame with indicator and signal columns added, without its warm-up bars
+    """
+    from strategies.registry import compute_indicators
+    from utils.indicator_kernels import DEFAULT_CHUNK_SIZE
+    
+    chunk_size = DEFAULT_CHUNK_SIZE if chunk_size is None else chunk_size or None
+    analysis_start = data.attrs.get("analysis_start")
+    warmup = 0 if analysis_start is None else int(data.index.searchsorted(analysis_start))
+    
+    compute_indicators(data, parameters, chunk_size=chunk_size, warmup=warmup, max_workers=max_workers)
+    
+    if warmup:
+        data = data.iloc[warmup:]
+    if compact:
+        from utils.compact import compact_frame
+        compact_frame(data)
+    
+    return data
+
+def run_indicator_comparison(ticker: str = "AAPL", period: str = "6mo", indicator1: str = "RSI", indicator2: str = "MACD", signal1: str = "All", signal2: str = "All", provider=None, interval: str = "1d", compact: bool = False, data: pd.DataFrame = None):
     """
     Run indicator comparison analysis for RSI, MACD, and Bollinger Bands
     
     Args:
         ticker: Stock ticker symbol
         period: Time period for data
+        provider: Data provider passed to fetch_data (default: Yahoo Finance)
+        interval: Bar interval ('1m', '5m', '1h', '1d', ...)
+        compact: Return a compact frame (float32 indicators, no unused columns);
+            the statistics are the same as without it
+        data: Output of fetch_data for ticker, period and interval (default: fetched here)
         
     Returns:
         Tuple of (data, comparison_results, indicator_ranking, summary)
     """
-    # Fetch data
-    data = fetch_data(ticker, period)
+    from analysis.indicator_comparison import compare_all_indicators, compare_indicators, get_indicator_summary, rank_indicators
+    from data.data_fetcher import fetch_data
+    
+    # Every stage below is a traced span nested under this one
+    with span("run_indicator_comparison", ticker=ticker):
+        # Fetch data
+        if data is None:
+            data = fetch_data(ticker, period, provider=provider, interval=interval)
+        
+        # Add all indicators and signals to the fetched frame
+        combined_data = build_indicator_frame(data, compact=compact)
+        
+        # Compare indicators (Welch t-test from group moments, no scipy.stats import)
+        comparison_results = compare_indicators(combined_data, indicator1, indicator2, signal1, signal2,
+                                                all_pairs=compare_all_indicators(combined_data))
+        
+        # Rank indicators
+        indicator_ranking = rank_indicators(comparison_results)
+        
+        # Get summary statistics
+        summary = get_indicator_summary(combined_data)
+    
+    return combined_data, comparison_results, indicator_ranking, summary
+
+class CachedAnalysis:
+    """
+    Layered in-memory cache around the indicator comparison pipeline
     
-    # Generate signals for each indicator
-    rsi_data = generate_rsi_signals(data.copy())
-    macd_data = generate_macd_signals(data.copy())
-    bb_data = generate_bollinger_signals(data.copy())
+    Fetched data is cached per (ticker, period, interval) for data_ttl
+    seconds. Indicator frames, together with their all-pairs statistics and
+    summary, are cached by a content hash of the data and the indicator
+    parameters, so a refetch that returns the same bars reuses the frame.
+    Changing only the compared indicators or signal types is answered from
+    the cached all-pairs statistics without touching the frame.
     
-    # Combine all signals into one dataframe
-    combined_data = data.copy()
-    combined_data["RSI_Signal"] = rsi_data["RSI_Signal"]
-    combined_data["MACD_Strategy_Signal"] = macd_data["MACD_Strategy_Signal"]
-    combined_data["BB_Strategy_Signal"] = bb_data["BB_Strategy_Signal"]
+    With a results store, every run is written to it, and a request whose
+    data and parameters were analysed before (in this process or an
+    earlier one) takes its comparison, ranking and summary from the store.
     
-    # Add indicator components for visualization
-    combined_data["RSI"] = rsi_data["RSI"]
-    combined_data["MACD"] = macd_data["MACD"]
-    combined_data["MACD_Signal"] = macd_data["MACD_Signal"]
-    combined_data["BB_Upper"] = bb_data["BB_Upper"]
-    combined_data["BB_Middle"] = bb_data["BB_Middle"]
-    combined_data["BB_Lower"] = bb_data["BB_Lower"]
+    Cached frames are shared between callers and must not be modified.
     
-    # Compare indicators
-    comparison_results = compare_indicators(combined_data, indicator1, indicator2, signal1, signal2)
+    Args:
+        data_ttl: Seconds fetched data stays valid
+        max_entries: Entries kept per layer
+        provider: Data provider passed to fetch_data (default: Yahoo Finance)
+        compact: Cache compact indicator frames (see utils.compact)
+        store: data.results_store.ResultsStore to read and record results (default: none)
+    """
     
-    # Rank indicators
-    indicator_ranking = rank_indicators(comparison_results)
+    def __init__(self, data_ttl: float = 15 * 60, max_entries: int = 64, provider=None, compact: bool = False,
+                 store=None):
+        from utils.result_cache import TTLCache
+        
+        self.provider = provider
+        self.compact = compact
+        self.store = store
+        self.data = TTLCache(ttl=data_ttl, max_entries=max_entries)
+        self.frames = TTLCache(max_entries=max_entries)
     
-    # Get summary statistics
-    summary = get_indicator_summary(combined_data)
+    def run(self, ticker: str, period: str = "6mo", indicator1: str = "RSI", indicator2: str = "MACD",
+            signal1: str = "All", signal2: str = "All", interval: str = "1d", parameters: dict = None,
+            compact: bool = None) -> tuple:
+        """
+        Cached equivalent of run_indicator_comparison
+        
+        Args:
+            ticker: Stock ticker symbol
+            period: Time period for data
+            indicator1, indicator2: Indicator names ("RSI", "MACD", "Bollinger")
+            signal1, signal2: Signal types ("All", "Buy", "Sell")
+            interval: Bar interval
+            parameters: Indicator parameters passed to build_indicator_frame
+            compact: Use a compact frame (default: the cache's compact setting)
+            
+        Returns:
+            Tuple of (data, comparison_results, indicator_ranking, summary, all_pairs, status)
+            where all_pairs is the cached compare_all_indicators result of the
+            frame and status maps each layer ("data", "frame", and "store"
+            when there is one) to "hit" or "miss"
+        """
+        from analysis.indicator_comparison import compare_indicators, rank_indicators
+        from data.data_fetcher import fetch_data
+        from utils.result_cache import frame_fingerprint
+        
+        compact = self.compact if compact is None else compact
+        with span("CachedAnalysis.run", ticker=ticker):
+            data, data_hit = self.data.get_or_compute(
+                (ticker.upper(), period, interval),
+                lambda: fetch_data(ticker, period, provider=self.provider, interval=interval))
+            with span("frame_fingerprint"):
+                fingerprint = frame_fingerprint(data)
+            stored = request = None
+            if self.store is not None:
+                from data.results_store import request_key
+                
+                request = request_key(ticker, period, interval, indicator1, indicator2, signal1, signal2, parameters,
+                                      fingerprint)
+                stored = self.store.get(request)
+            (frame, all_pairs, summary), frame_hit = self._frame(data, parameters, compact, fingerprint)
+            
+            if stored is not None:
+                comparison_results, indicator_ranking, summary = stored["comparison"], stored["ranking"], stored["summary"]
+            else:
+                comparison_results = compare_indicators(frame, indicator1, indicator2, signal1, signal2, all_pairs=all_pairs)
+                indicator_ranking = rank_indicators(comparison_results)
+                if self.store is not None:
+                    self.store.put(request, comparison_results, indicator_ranking, summary, frame)
+        status = {"data": "hit" if data_hit else "miss", "frame": "hit" if frame_hit else "miss"}
+        if self.store is not None:
+            status["store"] = "hit" if stored is not None else "miss"
+        return frame, comparison_results, indicator_ranking, summary, all_pairs, status
     
-    return combined_data, comparison_results, indicator_ranking, summary
+    def _frame(self, data: pd.DataFrame, parameters: dict, compact: bool, fingerprint: str = None) -> tuple:
+        # ((frame, all-pairs statistics, summary), hit) for the data's content and the parameters
+        from analysis.indicator_comparison import compare_all_indicators, get_indicator_summary
+        from utils.result_cache import frame_fingerprint
+        
+        frozen = tuple(sorted((name, tuple(sorted(values.items()))) for name, values in (parameters or {}).items()))
+        
+        def _build():
+            frame = build_indicator_frame(data.copy(), parameters, compact=compact)
+            return frame, compare_all_indicators(frame), get_indicator_summary(frame)
+        
+        if fingerprint is None:
+            with span("frame_fingerprint"):
+                fingerprint = frame_fingerprint(data)
+        return self.frames.get_or_compute((fingerprint, frozen, compact), _build)
+    
+    def prime(self, ticker: str, data: pd.DataFrame, period: str = "6mo", interval: str = "1d",
+              parameters: dict = None, compact: bool = None) -> bool:
+        """
+        Store freshly fetched data and compute its indicator frame ahead of the first request
+        
+        Args:
+            ticker: Stock ticker symbol
+            data: Output of fetch_data for ticker, period and interval
+            period: Time period the data was fetched for
+            interval: Bar interval
+            parameters: Indicator parameters passed to build_indicator_frame
+            compact: Use a compact frame (default: the cache's compact setting)
+            
+        Returns:
+            True if the indicator frame had to be computed, False if it was already cached
+        """
+        compact = self.compact if compact is None else compact
+        with span("CachedAnalysis.prime", ticker=ticker):
+            self.data.put((ticker.upper(), period, interval), data)
+            _, frame_hit = self._frame(data, parameters, compact)
+        return not frame_hit
+    
+    @property
+    def stats(self) -> dict:
+        """Hit and miss counters of each layer"""
+        return {"data": self.data.stats, "frame": self.frames.stats}
+    
+    def clear(self):
+        """Drop every cached entry"""
+        self.data.invalidate()
+        self.frames.invalidate()
+
+def _json_value(value):
+    # NaN is not valid JSON; numpy scalars and timestamps need plain types
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        value = value.item()
+        return None if isinstance(value, float) and math.isnan(value) else value
+    return value
+
+class JSONLWriter:
+    """Write result rows as JSON lines, flushing after every batch"""
+    
+    def __init__(self, path: str):
+        self.file = sys.stdout if path == "-" else open(path, "w")
+    
+    def write(self, rows: list):
+        for row in rows:
+            self.file.write(json.dumps({key: _json_value(value) for key, value in row.items()}) + "\n")
+        self.file.flush()
+    
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+class ParquetWriter:
+    """
+    Write result rows to a Parquet file in row groups of row_group_size rows
+    
+    The schema is fixed by the first row group that contains a successful
+    result; later rows are aligned to it, with missing fields left null.
+    """
+    
+    def __init__(self, path: str, row_group_size: int = 100):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows = []
+        self.writer = None
+    
+    def write(self, rows: list):
+        self.rows.extend(rows)
+        ready = self.writer is not None or any(row.get("status", "ok") == "ok" for row in self.rows)
+        if ready and len(self.rows) >= self.row_group_size:
+            self._flush()
+    
+    def _flush(self):
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        if not self.rows:
+            return
+        batch = pd.DataFrame(self.rows)
+        self.rows = []
+        if self.writer is None:
+            schema = pa.Schema.from_pandas(batch, preserve_index=False)
+            # Columns that are empty in the first batch hold text in later ones
+            for i, field in enumerate(schema):
+                if pa.types.is_null(field.type):
+                    schema = schema.set(i, pa.field(field.name, pa.string()))
+            self.writer = pq.ParquetWriter(self.path, schema)
+        batch = batch.reindex(columns=self.writer.schema.names)
+        self.writer.write_table(pa.Table.from_pandas(batch, schema=self.writer.schema, preserve_index=False))
+    
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+def report_import_times(argv: list, top: int = 15) -> int:
+    """
+    Re-run the command under python -X importtime and summarize the slowest imports
+    
+    Args:
+        argv: Command line arguments without --import-time
+        top: Number of modules to list
+        
+    Returns:
+        Exit code of the re-run command
+    """
+    import subprocess
+    
+    process = subprocess.run([sys.executable, "-X", "importtime", sys.argv[0], *argv],
+                             stderr=subprocess.PIPE, text=True)
+    times = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            sys.stderr.write(line + "\n")
+            continue
+        fields = line[len("import time:"):].split("|")
+        if fields[0].strip().isdigit():
+            times.append((int(fields[1]), fields[2].rstrip()))
+    
+    # Top-level imports have no indentation; their cumulative times add up to the total
+    total = sum(cumulative for cumulative, name in times if not name.startswith("  "))
+    print(f"Imports: {len(times)} modules, {total / 1000:.1f} ms", file=sys.stderr)
+    for cumulative, name in sorted(times, reverse=True)[:top]:
+        print(f"{cumulative / 1000:9.1f} ms  {name.strip()}", file=sys.stderr)
+    return process.returncode
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """Parse command line arguments for the batch comparison"""
+    parser = argparse.ArgumentParser(
+        description="Run the RSI/MACD/Bollinger indicator comparison for a list of tickers "
+                    "and stream one result row per ticker to JSONL or Parquet.")
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols (e.g. AAPL MSFT TCS.NS)")
+    parser.add_argument("-f", "--tickers-file", help="File with one ticker per line ('-' for stdin)")
+    parser.add_argument("-p", "--period", default="6mo", help="Time period (default: 6mo)")
+    parser.add_argument("-i", "--interval", default="1d",
+                        help="Bar interval: 1m, 2m, 5m, 15m, 30m, 60m, 1h or 1d (default: 1d)")
+    parser.add_argument("--indicators", nargs=2, default=["RSI", "MACD"], metavar=("IND1", "IND2"),
+                        help="Indicators to compare: RSI, MACD, Bollinger (default: RSI MACD)")
+    parser.add_argument("--signals", nargs=2, default=["All", "All"], metavar=("SIG1", "SIG2"),
+                        help="Signal types: All, Buy, Sell (default: All All)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="Output file; .parquet writes Parquet, anything else JSON lines (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Worker processes (default: 1)")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed per ticker (default: 120)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Use compact frames (float32 indicators, unused columns dropped) and "
+                             "report bytes per row")
+    parser.add_argument("--store", metavar="PATH",
+                        help="SQLite results store: answer repeated requests from it and record new results")
+    parser.add_argument("--cached-only", action="store_true",
+                        help="Only use the local price cache; tickers that are not cached fail")
+    parser.add_argument("--rolling-output", metavar="PATH",
+                        help="Also write the compared pair's rolling t-statistic and p-value per window "
+                             "(.parquet or JSON lines)")
+    parser.add_argument("--rolling-window", type=int, default=63, help="Bars per rolling window (default: 63)")
+    parser.add_argument("--rolling-step", type=int, default=1, help="Bars between window ends (default: 1)")
+    parser.add_argument("--expanding", action="store_true",
+                        help="Anchor rolling windows at the first bar (anchored walk-forward)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Record per-stage timings and write a Chrome trace-event JSON file")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Record per-stage timings and write per-stage percentiles in Prometheus text format")
+    parser.add_argument("--import-time", action="store_true",
+                        help="Re-run under python -X importtime and report the slowest imports")
+    return parser.parse_args(argv)
+
+def read_tickers(args: argparse.Namespace) -> list:
+    """Collect tickers from the command line and the tickers file"""
+    tickers = list(args.tickers)
+    if args.tickers_file:
+        with (sys.stdin if args.tickers_file == "-" else open(args.tickers_file)) as f:
+            tickers += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return tickers
+
+def cli(argv: list = None) -> int:
+    """
+    Command line entry point
+    
+    Args:
+        argv: Arguments (default: sys.argv[1:])
+        
+    Returns:
+        Exit code: 0 if every ticker succeeded, 1 if some failed, 2 on usage errors
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parse_args(argv)
+    if args.import_time:
+        return report_import_times([arg for arg in argv if arg != "--import-time"])
+    
+    tickers = read_tickers(args)
+    if not tickers:
+        print("No tickers given", file=sys.stderr)
+        return 2
+    
+    from scanner import scan_universe
+    
+    provider = None
+    if args.cached_only:
+        from data.providers import CacheOnlyProvider
+        provider = CacheOnlyProvider()
+    
+    store = None
+    if args.store:
+        from data.results_store import ResultsStore
+        store = ResultsStore(args.store)
+    
+    writer = ParquetWriter(args.output) if args.output.endswith(".parquet") else JSONLWriter(args.output)
+    rolling = rolling_writer = None
+    if args.rolling_output:
+        rolling = {"window": args.rolling_window, "step": args.rolling_step, "expanding": args.expanding}
+        rolling_writer = (ParquetWriter(args.rolling_output, row_group_size=10_000)
+                          if args.rolling_output.endswith(".parquet") else JSONLWriter(args.rolling_output))
+    failed = stored = 0
+    frame_bytes = [0.0, 0.0, 0]
+    tracer = None
+    if args.trace or args.metrics:
+        from utils import tracing
+        tracer = tracing.enable()
+    
+    def _on_rows(rows):
+        nonlocal failed, stored
+        failed += sum(row["status"] != "ok" for row in rows)
+        stored += sum(bool(row.get("stored")) for row in rows)
+        for row in rows:
+            if row["status"] == "ok" and row["bytes_per_row"] is not None:
+                frame_bytes[0] += row["bytes_per_row_before"]
+                frame_bytes[1] += row["bytes_per_row"]
+                frame_bytes[2] += 1
+            windows = row.pop("rolling", None)
+            if windows is not None and len(windows):
+                rolling_writer.write(windows.to_dict("records"))
+        writer.write(rows)
+    
+    def _progress(done, total):
+        print(f"\r{done}/{total} tickers", end="", file=sys.stderr, flush=True)
+    
+    try:
+        # One ticker per task so every result is written as soon as it is ready
+        scan_universe(tickers, args.period, *args.indicators, *args.signals, provider=provider,
+                      max_workers=args.workers, chunksize=1, timeout=args.timeout,
+                      retries=0 if args.cached_only else 2, progress=_progress, on_rows=_on_rows, rolling=rolling,
+                      interval=args.interval, compact=args.compact, store=store)
+    finally:
+        writer.close()
+        if rolling_writer is not None:
+            rolling_writer.close()
+    print(f"\n{len(set(tickers))} tickers, {failed} failed", file=sys.stderr)
+    if store is not None:
+        # Lookups run in the worker processes, so hits are counted from the rows
+        print(f"Results store: {stored} answered from {args.store}, "
+              f"{store.stats['runs_written']} new results recorded", file=sys.stderr)
+    if args.compact and frame_bytes[2]:
+        before, after, count = frame_bytes
+        print(f"Frame memory: {before / count:.1f} -> {after / count:.1f} bytes per row "
+              f"({1 - after / before:.0%} less)", file=sys.stderr)
+    if tracer is not None:
+        if args.trace:
+            tracer.write_json(args.trace)
+        if args.metrics:
+            tracer.write_prometheus(args.metrics)
+        for row in tracer.summary(by="name"):
+            print(f"{row['stage']:<28}{row['count']:>6} calls  p50 {row['p50'] * 1e3:8.2f} ms  "
+                  f"p90 {row['p90'] * 1e3:8.2f} ms  p99 {row['p99'] * 1e3:8.2f} ms", file=sys.stderr)
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    _, ttest_results, grades = run_strategy_grading("AAPL")
-    print("T-test Results:", ttest_results)
-    print("Grades:", grades)
+    sys.exit(cli())
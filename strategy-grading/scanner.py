@@ -0,0 +1,282 @@
+import math
+import os
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+import pandas as pd
+from data.data_fetcher import fetch_data, get_default_provider
+from data.results_store import ResultsStore, request_key
+from data.providers import LimitedProvider
+from analysis.rolling_significance import rolling_records, rolling_significance
+from main import run_indicator_comparison
+from utils import tracing
+from utils.compact import bytes_per_row
+from utils.result_cache import frame_fingerprint
+
+class ScanTimeout(BaseException):
+    """
+    Raised inside a worker when one ticker runs past its time limit
+
+    Derives from BaseException so the broad except blocks in the data and
+    analysis code cannot swallow it.
+    """
+
+@contextmanager
+def time_limit(seconds: float):
+    """
+    Raise ScanTimeout if the body runs longer than seconds
+
+    Uses SIGALRM, so the limit only applies on platforms that have it and
+    in the main thread; elsewhere the body runs without a limit.
+
+    Args:
+        seconds: Time limit (None or 0 for no limit)
+    """
+    if (not seconds or not hasattr(signal, "setitimer")
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def _expired(signum, frame):
+        raise ScanTimeout(f"Timed out after {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, _expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _failed_row(ticker: str, status: str, error: str) -> dict:
+    return {"ticker": ticker, "status": status, "error": error}
+
+def scan_ticker(ticker: str, period: str = "6mo", indicator1: str = "RSI", indicator2: str = "MACD",
+                signal1: str = "All", signal2: str = "All", provider=None, timeout: float = None,
+                rolling: dict = None, interval: str = "1d", compact: bool = False,
+                store: ResultsStore = None) -> dict:
+    """
+    Run the indicator comparison for one ticker and flatten the results into a row
+
+    Errors and timeouts are recorded in the row instead of being raised.
+    With a results store, a request whose data was analysed before is
+    answered from the store (the row's "stored" field is True and its
+    frame-size fields are empty); otherwise the row carries a "record"
+    for the store, which scan_universe writes.
+
+    Args:
+        ticker: Stock ticker symbol
+        period: Time period for data
+        indicator1: First indicator name ("RSI", "MACD", "Bollinger")
+        indicator2: Second indicator name ("RSI", "MACD", "Bollinger")
+        signal1: Signal type for first indicator ("All", "Buy", "Sell")
+        signal2: Signal type for second indicator ("All", "Buy", "Sell")
+        provider: Data provider (default: Yahoo Finance)
+        timeout: Seconds allowed for this ticker (None for no limit)
+        rolling: Keyword arguments for rolling_significance (window, step,
+            expanding); when given, a successful row also holds a "rolling"
+            DataFrame with the compared pair's t-statistic and p-value per window
+        interval: Bar interval ('1m', '5m', '1h', '1d', ...)
+        compact: Analyse a compact frame (see utils.compact)
+        store: Results store to answer repeated requests from (rolling runs are always computed)
+
+    Returns:
+        Dict with ticker, status ("ok", "error" or "timeout"), error and result fields
+    """
+    started = time.perf_counter()
+    stored = record = None
+    try:
+        with time_limit(timeout):
+            if store is None:
+                data, comparison, ranking, summary = run_indicator_comparison(
+                    ticker, period, indicator1, indicator2, signal1, signal2, provider=provider, interval=interval, compact=compact)
+            else:
+                data = fetch_data(ticker, period, provider=provider, interval=interval)
+                request = request_key(ticker, period, interval, indicator1, indicator2, signal1, signal2, None,
+                                      frame_fingerprint(data))
+                stored = store.get(request) if rolling is None else None
+                if stored is not None:
+                    comparison, ranking, summary = stored["comparison"], stored["ranking"], stored["summary"]
+                else:
+                    data, comparison, ranking, summary = run_indicator_comparison(
+                        ticker, period, indicator1, indicator2, signal1, signal2, provider=provider, interval=interval,
+                        compact=compact, data=data)
+                    record = store.record(request, comparison, ranking, summary, data)
+            if rolling is not None:
+                pair = (f"{indicator1}_{signal1}", f"{indicator2}_{signal2}")
+                windows = rolling_records(rolling_significance(data, pairs=[pair], **rolling), ticker)
+    except ScanTimeout as e:
+        row = _failed_row(ticker, "timeout", str(e))
+    except Exception as e:
+        row = _failed_row(ticker, "error", str(e))
+    else:
+        if stored is not None:
+            row = {
+                "ticker": ticker,
+                "status": "ok",
+                "error": None,
+                "bars": stored["bars"],
+                "bytes_per_row": None,
+                "bytes_per_row_before": None,
+                "start": pd.Timestamp(stored["start"]),
+                "end": pd.Timestamp(stored["end"]),
+                "comparison": None,
+            }
+        else:
+            row = {
+                "ticker": ticker,
+                "status": "ok",
+                "error": None,
+                "bars": len(data),
+                "bytes_per_row": bytes_per_row(data),
+                "bytes_per_row_before": data.attrs.get("bytes_per_row_before", bytes_per_row(data)),
+                "start": data.index[0],
+                "end": data.index[-1],
+                "comparison": None,
+            }
+        for key, result in comparison.items():
+            row["comparison"] = key
+            row.update(result)
+        row["top_indicator"] = ranking[0][0] if ranking and ranking[0][1] > 0 else None
+        for indicator, stats in summary.items():
+            for name, value in stats.items():
+                row[f"{indicator.lower()}_{name}"] = value
+        if rolling is not None:
+            row["rolling"] = windows
+        if store is not None:
+            row["stored"] = stored is not None
+            if record is not None:
+                row["record"] = record
+    row["seconds"] = time.perf_counter() - started
+    return row
+
+def _scan_chunk(tickers: list, options: dict) -> tuple:
+    # Returns (rows, spans); spans are only collected here when running in a worker process
+    provider = options.pop("provider")
+    retries = options.pop("retries")
+    backoff = options.pop("backoff")
+    trace = options.pop("trace")
+    provider = LimitedProvider(provider or get_default_provider(), retries=retries, backoff=backoff)
+    tracer = tracing.enable() if trace else None
+    rows = [scan_ticker(ticker, provider=provider, **options) for ticker in tickers]
+    return rows, tracer.drain() if tracer is not None else []
+
+def _run_chunks(chunks: deque, options: dict, max_workers: int, max_in_flight: int, collect) -> list:
+    # Run chunks on one pool until they are done or a worker dies; returns the chunks lost with the pool
+    lost = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {}
+        while (chunks and not lost) or in_flight:
+            while chunks and not lost and len(in_flight) < max_in_flight:
+                chunk = chunks.popleft()
+                in_flight[executor.submit(_scan_chunk, chunk, dict(options))] = chunk
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                chunk = in_flight.pop(future)
+                try:
+                    collect(*future.result())
+                except BrokenProcessPool:
+                    lost.append(chunk)
+                except Exception as e:
+                    collect([_failed_row(ticker, "error", str(e)) for ticker in chunk])
+    return lost
+
+def scan_universe(tickers: list, period: str = "6mo", indicator1: str = "RSI", indicator2: str = "MACD",
+                  signal1: str = "All", signal2: str = "All", provider=None, max_workers: int = None,
+                  chunksize: int = None, timeout: float = 120, retries: int = 2, backoff: float = 0.5,
+                  progress=None, on_rows=None, rolling: dict = None, interval: str = "1d",
+                  compact: bool = False, store: ResultsStore = None) -> pd.DataFrame:
+    """
+    Run the indicator comparison across a universe of tickers on a process pool
+
+    Tickers are split into chunks and at most two chunks per worker are in
+    flight at once, so memory stays flat however large the universe is.
+    A ticker that fails or runs past the timeout becomes an error row and
+    the scan carries on. If a worker process dies, a new pool is started
+    and the tickers that were in flight are rerun one by one, so only the
+    ticker that killed the worker is reported as failed.
+
+    With a results store, tickers whose data and request were analysed
+    before are answered from it, and the new results of every chunk are
+    written to it in one transaction as the chunk arrives.
+
+    When tracing is enabled in the caller (see utils.tracing), the spans
+    recorded in the worker processes are merged into the caller's tracer,
+    so tracer.summary() gives per-stage percentiles across all tickers.
+
+    Args:
+        tickers: List of ticker symbols
+        period: Time period for data
+        indicator1: First indicator name ("RSI", "MACD", "Bollinger")
+        indicator2: Second indicator name ("RSI", "MACD", "Bollinger")
+        signal1: Signal type for first indicator ("All", "Buy", "Sell")
+        signal2: Signal type for second indicator ("All", "Buy", "Sell")
+        provider: Picklable data provider (default: Yahoo Finance in every worker)
+        max_workers: Number of worker processes (default: CPU count; 1 runs in-process)
+        chunksize: Tickers per task (default: about four tasks per worker, at most 32 tickers)
+        timeout: Seconds allowed per ticker (None for no limit)
+        retries: Retries per provider call after the first failure
+        backoff: Base backoff delay in seconds
+        progress: Callable(done, total) called after every finished chunk
+        on_rows: Callable(list of row dicts) called with each chunk's rows as they arrive
+        rolling: Keyword arguments for rolling_significance; adds a "rolling"
+            column of per-window results (see scan_ticker)
+        interval: Bar interval ('1m', '5m', '1h', '1d', ...)
+        compact: Analyse compact frames (see utils.compact)
+        store: data.results_store.ResultsStore to read and record results (see scan_ticker)
+
+    Returns:
+        DataFrame with one row per ticker, in input order
+    """
+    tickers = list(dict.fromkeys(tickers))
+    total = len(tickers)
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, min(32, math.ceil(total / (max_workers * 4))))
+    chunks = deque(tickers[start:start + chunksize] for start in range(0, total, chunksize))
+    options = {"period": period, "indicator1": indicator1, "indicator2": indicator2, "signal1": signal1,
+               "signal2": signal2, "provider": provider, "timeout": timeout, "retries": retries,
+               "backoff": backoff, "rolling": rolling, "interval": interval, "compact": compact, "store": store,
+               "trace": False}
+    tracer = tracing.get_tracer()
+
+    rows = []
+    done = 0
+
+    def _collect(chunk_rows, spans=()):
+        nonlocal done
+        if spans:
+            tracer.add(spans)
+        records = [row.pop("record") for row in chunk_rows if "record" in row]
+        if records:
+            store.put_many(records)
+        rows.extend(chunk_rows)
+        done += len(chunk_rows)
+        if on_rows is not None:
+            on_rows(chunk_rows)
+        if progress is not None:
+            progress(done, total)
+
+    if max_workers == 1:
+        while chunks:
+            # Spans recorded in-process go straight to the caller's tracer
+            _collect(*_scan_chunk(chunks.popleft(), dict(options)))
+    else:
+        options["trace"] = tracer is not None
+        suspects = deque()
+        while chunks:
+            for chunk in _run_chunks(chunks, options, max_workers, 2 * max_workers, _collect):
+                suspects.extend([ticker] for ticker in chunk)
+        # A dead worker takes every in-flight chunk down with it, so rerun those
+        # tickers one at a time to pin the failure on the ticker that caused it
+        while suspects:
+            for chunk in _run_chunks(suspects, options, 1, 1, _collect):
+                _collect([_failed_row(ticker, "error", "Worker process terminated") for ticker in chunk])
+
+    if not rows:
+        return pd.DataFrame(columns=["ticker", "status", "error"])
+    return pd.DataFrame(rows).set_index("ticker").reindex(tickers).reset_index()
@@ -1,47 +1,27 @@
 import pandas as pd
-import numpy as np
-from utils.helpers import calculate_bollinger_bands
+from strategies.registry import compute_indicators
+from utils.indicator_kernels import DEFAULT_CHUNK_SIZE
+from utils.tracing import traced
 
-def generate_bollinger_signals(data: pd.DataFrame) -> pd.DataFrame:
+@traced()
+def generate_bollinger_signals(data: pd.DataFrame, window: int = 20, num_std: float = 2,
+                               chunk_size: int = DEFAULT_CHUNK_SIZE, warmup: int = 0) -> pd.DataFrame:
     """
     Generate buy/sell/hold signals based on Bollinger Bands strategy
     
+    Computes the registered Bollinger indicator alone (see
+    strategies.registry.compute_indicators), so its columns are the same
+    as in build_indicator_frame.
+    
     Args:
-        data: DataFrame with stock price data
+        data: DataFrame with stock price data (columns are added in place)
+        window: Moving average window
+        num_std: Number of standard deviations for the bands
+        chunk_size: Bars per chunk for the indicator calculation (None for one pass)
+        warmup: Leading bars that only warm up the indicator; they get Hold signals
         
     Returns:
         DataFrame with Bollinger Bands signals added
     """
-    # Calculate Bollinger Bands
-    upper_band, middle_band, lower_band = calculate_bollinger_bands(data, window=20, num_std=2)
-    
-    # Add Bollinger Bands components to data
-    data["BB_Upper"] = upper_band
-    data["BB_Middle"] = middle_band
-    data["BB_Lower"] = lower_band
-    
-    # Initialize signal column
-    data["BB_Strategy_Signal"] = 0
-    
-    # Generate signals based on Bollinger Bands
-    # Buy when price touches or goes below lower band (oversold)
-    # Sell when price touches or goes above upper band (overbought)
-    
-    # Handle multi-level columns for Close price
-    if isinstance(data["Close"], pd.DataFrame):
-        close_prices = data["Close"].iloc[:, 0]
-    else:
-        close_prices = data["Close"]
-    
-    data.loc[close_prices <= data["BB_Lower"], "BB_Strategy_Signal"] = 1   # Buy (oversold)
-    data.loc[close_prices >= data["BB_Upper"], "BB_Strategy_Signal"] = -1  # Sell (overbought)
-    # Hold remains 0 (price between bands)
-    
-    # Ensure we have some signals by adding a simple momentum strategy if needed
-    if data["BB_Strategy_Signal"].sum() == 0:
-        # Fallback: use price momentum
-        data["Price_Change"] = data["Close"].pct_change()
-        data.loc[data["Price_Change"] > 0.005, "BB_Strategy_Signal"] = 1   # Buy on positive momentum
-        data.loc[data["Price_Change"] < -0.005, "BB_Strategy_Signal"] = -1  # Sell on negative momentum
-    
-    return data
+    return compute_indicators(data, {"Bollinger": {"window": window, "num_std": num_std}}, indicators=["Bollinger"],
+                              chunk_size=chunk_size, warmup=warmup)
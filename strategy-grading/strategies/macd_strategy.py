@@ -1,67 +1,28 @@
 import pandas as pd
-import numpy as np
-from utils.helpers import calculate_macd
+from strategies.registry import compute_indicators
+from utils.indicator_kernels import DEFAULT_CHUNK_SIZE
+from utils.tracing import traced
 
-def generate_macd_signals(data: pd.DataFrame) -> pd.DataFrame:
+@traced()
+def generate_macd_signals(data: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE, warmup: int = 0) -> pd.DataFrame:
     """
     Generate buy/sell/hold signals based on MACD strategy
     
+    Computes the registered MACD indicator alone (see
+    strategies.registry.compute_indicators), so its columns are the same
+    as in build_indicator_frame.
+    
     Args:
-        data: DataFrame with stock price data
+        data: DataFrame with stock price data (columns are added in place)
+        fast: Fast EMA period
+        slow: Slow EMA period
+        signal: Signal line EMA period
+        chunk_size: Bars per chunk for the indicator calculation (None for one pass)
+        warmup: Leading bars that only warm up the indicator; they get Hold signals
         
     Returns:
         DataFrame with MACD signals added
     """
-    # Handle multi-level columns for Close price
-    if isinstance(data["Close"], pd.DataFrame):
-        close_prices = data["Close"].iloc[:, 0]
-    else:
-        close_prices = data["Close"]
-    
-    # Create a temporary dataframe with single-level Close column
-    temp_data = data.copy()
-    temp_data["Close"] = close_prices
-    
-    # Calculate MACD
-    macd_line, signal_line, histogram = calculate_macd(temp_data, fast=12, slow=26, signal=9)
-    
-    # Add MACD components to data
-    data["MACD"] = macd_line
-    data["MACD_Signal"] = signal_line
-    data["MACD_Histogram"] = histogram
-    
-    # Initialize signal column
-    data["MACD_Strategy_Signal"] = 0
-    
-    # Generate signals based on MACD crossover
-    # Buy when MACD line crosses above signal line
-    # Sell when MACD line crosses below signal line
-    
-    # Create crossover signals using simple loop
-    # Initialize with zeros
-    data["MACD_Strategy_Signal"] = 0
-    
-    # Use simple loop to avoid indexing issues
-    for i in range(len(data)):
-        try:
-            macd_val = macd_line.iloc[i]
-            signal_val = signal_line.iloc[i]
-            
-            # Check if values are not NaN and are comparable
-            if not pd.isna(macd_val) and not pd.isna(signal_val):
-                if macd_val > signal_val:
-                    data.iloc[i, data.columns.get_loc("MACD_Strategy_Signal")] = 1   # Buy
-                elif macd_val < signal_val:
-                    data.iloc[i, data.columns.get_loc("MACD_Strategy_Signal")] = -1  # Sell
-        except:
-            # Skip problematic rows
-            continue
-    
-    # Ensure we have some signals by adding a simple momentum strategy if needed
-    if data["MACD_Strategy_Signal"].sum() == 0:
-        # Fallback: use price momentum
-        data["Price_Change"] = data["Close"].pct_change()
-        data.loc[data["Price_Change"] > 0.005, "MACD_Strategy_Signal"] = 1   # Buy on positive momentum
-        data.loc[data["Price_Change"] < -0.005, "MACD_Strategy_Signal"] = -1  # Sell on negative momentum
-    
-    return data
+    return compute_indicators(data, {"MACD": {"fast": fast, "slow": slow, "signal": signal}}, indicators=["MACD"],
+                              chunk_size=chunk_size, warmup=warmup)
@@ -0,0 +1,408 @@
+import contextvars
+import functools
+import hashlib
+import inspect
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
+import pandas as pd
+from strategies.signal_kernels import (bollinger_signal_kernel, macd_signal_kernel, pct_change, rsi_signal_kernel,
+                                       skip_warmup)
+from utils import indicator_kernels as kernels
+from utils.helpers import ema_warmup, indicator_memo
+from utils.indicator_kernels import DEFAULT_CHUNK_SIZE
+from utils.result_cache import ArrayMemo, array_digest
+from utils.tracing import traced
+
+# Registered indicators by name, in the order their columns are written
+INDICATORS = {}
+
+# Signal column of each registered indicator and the indicator value
+# columns they write; both are updated in place by register_indicator, so
+# modules that imported them see indicators registered later
+SIGNAL_COLUMNS = {}
+INDICATOR_COLUMNS = []
+
+class Indicator:
+    """
+    A pluggable indicator: its parameters, warm-up, output columns and how to compute them
+
+    The build function adds the indicator's computations to a
+    ComputeGraph and returns the node of every column it writes. Nodes
+    for the same function, inputs and parameters are shared, so two
+    indicators that need the same moving average compute it once.
+
+    Args:
+        name: Name used by the analysis and the UI, e.g. "RSI"
+        build: Callable(graph, **parameters) -> dict of column -> node,
+            including the signal column
+        signal_column: Column holding the Buy/Sell/Hold signals (+1/-1/0)
+        columns: Indicator value columns written besides the signal column
+        defaults: Default parameters
+        lookback: Callable(**parameters) -> bars of history needed before
+            the first analysed bar
+        label: Display name (default: name)
+    """
+
+    def __init__(self, name: str, build, signal_column: str, columns: list, defaults: dict = None, lookback=None,
+                 label: str = None):
+        self.name = name
+        self.build = build
+        self.signal_column = signal_column
+        self.columns = list(columns)
+        self.defaults = dict(defaults or {})
+        self.lookback = lookback
+        self.label = label or name
+
+    def warmup(self, **parameters) -> int:
+        """Warm-up bars for the given parameters (defaults for the rest)"""
+        return self.lookback(**{**self.defaults, **parameters}) if self.lookback is not None else 0
+
+def register_indicator(indicator: Indicator, replace: bool = False) -> Indicator:
+    """
+    Make an indicator available to build_indicator_frame and every analysis
+
+    Args:
+        indicator: Indicator to add
+        replace: Allow replacing an indicator of the same name
+
+    Returns:
+        The indicator
+    """
+    if indicator.name in INDICATORS and not replace:
+        raise ValueError(f"Indicator {indicator.name!r} is already registered")
+    INDICATORS[indicator.name] = indicator
+    SIGNAL_COLUMNS.clear()
+    SIGNAL_COLUMNS.update((name, registered.signal_column) for name, registered in INDICATORS.items())
+    INDICATOR_COLUMNS[:] = [column for registered in INDICATORS.values() for column in registered.columns]
+    return indicator
+
+def warmup_bars(parameters: dict = None, indicators: list = None) -> int:
+    """
+    Bars of history every indicator needs before the first analysed bar
+
+    Args:
+        parameters: Optional dict of indicator name -> parameters
+        indicators: Indicator names (default: all registered)
+
+    Returns:
+        Largest warm-up of the indicators
+    """
+    parameters = parameters or {}
+    return max((INDICATORS[name].warmup(**parameters.get(name, {})) for name in indicators or INDICATORS), default=0)
+
+@functools.lru_cache(maxsize=None)
+def _parameters(func) -> frozenset:
+    return frozenset(inspect.signature(func).parameters)
+
+class ComputeGraph:
+    """
+    Deduplicated graph of array computations over the columns of a frame
+
+    A node is a function, its input nodes and its keyword parameters;
+    adding the same triple again returns the existing node. Inputs are
+    other nodes or column names of the frame being computed. The graph's
+    chunk_size and warmup are passed to every function that takes them.
+
+    Args:
+        chunk_size: Bars per chunk for windowed kernels (None for one pass)
+        warmup: Leading warm-up bars that get Hold signals
+    """
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, warmup: int = 0):
+        self.chunk_size = chunk_size
+        self.warmup = warmup
+        self.nodes = {}
+
+    def add(self, func, *inputs, **parameters) -> tuple:
+        """
+        Add a computation, or find the identical one already in the graph
+
+        Args:
+            func: Function taking one array per input plus the parameters
+            *inputs: Nodes returned by add, or frame column names
+            **parameters: Keyword arguments for func (must be hashable)
+
+        Returns:
+            Node key
+        """
+        accepted = _parameters(func)
+        for name in ("chunk_size", "warmup"):
+            if name in accepted and name not in parameters:
+                parameters[name] = getattr(self, name)
+        key = (func, inputs, tuple(sorted(parameters.items())))
+        self.nodes.setdefault(key, None)
+        return key
+
+    def compute(self, data: pd.DataFrame, targets: list, max_workers: int = 1, memo: ArrayMemo = None) -> dict:
+        """
+        Evaluate the nodes needed for targets, each exactly once
+
+        Nodes whose inputs are ready run as soon as a worker is free, so
+        with max_workers > 1 independent branches (say the RSI and the
+        Bollinger bands) overlap wherever NumPy releases the GIL.
+        Intermediate results are dropped once their last consumer has run.
+
+        With a memo, targets are looked up by a key built from the content
+        of the input columns and the functions and parameters leading to
+        them; a hit skips everything only that target needs, and computed
+        targets are stored. Functions without a stable name (lambdas and
+        nested functions) are never memoized.
+
+        Args:
+            data: Frame (or dict of arrays) whose columns are the graph's inputs
+            targets: Nodes to return
+            max_workers: Threads evaluating nodes (1 runs them in order on the caller's thread)
+            memo: ArrayMemo for the targets (default: none)
+
+        Returns:
+            Dict of node -> array for the targets (read-only when memoized)
+        """
+        values, stored = {}, {}
+        if memo is not None and memo.enabled:
+            keys = {}
+            for node in dict.fromkeys(targets):
+                key = _lineage_key(node, data, keys)
+                if key is None:
+                    continue
+                hit = memo.get(key)
+                if hit is None:
+                    stored[node] = key
+                else:
+                    values[node] = hit[0]
+
+        # Nodes reachable from the targets that are not memoized, and how many consumers each has
+        needed, stack = {}, [node for node in targets if node not in values]
+        while stack:
+            node = stack.pop()
+            if node not in needed:
+                needed[node] = None
+                stack.extend(input for input in node[1] if isinstance(input, tuple) and input not in values)
+        waiting = {node: {input for input in node[1] if isinstance(input, tuple) and input not in values}
+                   for node in needed}
+        consumers = {node: [] for node in needed}
+        for node, inputs in waiting.items():
+            for input in inputs:
+                consumers[input].append(node)
+        remaining = {node: len(consumers[node]) for node in needed}
+        keep = set(targets)
+        columns = {}
+
+        def _input(input):
+            if isinstance(input, tuple):
+                return values[input]
+            if input not in columns:
+                columns[input] = _column(data, input)
+            return columns[input]
+
+        def _evaluate(node):
+            func, inputs, parameters = node
+            return func(*map(_input, inputs), **dict(parameters))
+
+        def _finish(node, value):
+            if node in stored and isinstance(value, np.ndarray):
+                (value,) = memo.put(stored[node], (value,))
+            values[node] = value
+            ready = []
+            for consumer in consumers[node]:
+                waiting[consumer].discard(node)
+                if not waiting[consumer]:
+                    ready.append(consumer)
+            for input in set(node[1]):
+                if input in remaining:
+                    remaining[input] -= 1
+                    if not remaining[input] and input not in keep:
+                        del values[input]
+            return ready
+
+        ready = [node for node, inputs in waiting.items() if not inputs]
+        if max_workers <= 1:
+            while ready:
+                node = ready.pop(0)
+                ready.extend(_finish(node, _evaluate(node)))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Each task runs in a copy of the caller's context so tracing spans nest under it
+                running = {executor.submit(contextvars.copy_context().run, _evaluate, node): node for node in ready}
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for node in _finish(running.pop(future), future.result()):
+                            running[executor.submit(contextvars.copy_context().run, _evaluate, node)] = node
+        return {node: values[node] for node in targets}
+
+def _lineage_key(node: tuple, data: pd.DataFrame, keys: dict) -> str:
+    # Content key of a node: its function and parameters and the keys of its
+    # inputs, down to digests of the frame columns (kept in keys by column
+    # name); None if any function on the way has no stable name
+    if node not in keys:
+        func, inputs, parameters = node
+        name = f"{func.__module__}.{func.__qualname__}"
+        for input in inputs:
+            if not isinstance(input, tuple) and input not in keys:
+                keys[input] = array_digest(_column(data, input))
+        parts = [_lineage_key(input, data, keys) if isinstance(input, tuple) else keys[input] for input in inputs]
+        if "<" in name or None in parts:
+            keys[node] = None
+        else:
+            keys[node] = hashlib.sha1(f"{name}{parameters}{parts}".encode(), usedforsecurity=False).hexdigest()
+    return keys[node]
+
+def _column(data: pd.DataFrame, name: str) -> np.ndarray:
+    # A frame column (or dict entry) as floats; yfinance can return a one-column frame per field
+    values = data[name]
+    if isinstance(values, pd.DataFrame):
+        values = values.iloc[:, 0]
+    return np.asarray(values, dtype=np.float64)
+
+@traced()
+def compute_indicators(data: pd.DataFrame, parameters: dict = None, indicators: list = None,
+                       chunk_size: int | None = DEFAULT_CHUNK_SIZE, warmup: int = 0, max_workers: int = 1) -> pd.DataFrame:
+    """
+    Compute registered indicators and their signals into a frame
+
+    All indicators are built into one ComputeGraph, so shared
+    intermediates (the close prices, price changes, moving averages and
+    EMAs with the same parameters) are computed once per call. Columns
+    are memoized in utils.helpers.indicator_memo, so a frame with the
+    same prices and parameters is filled without computing anything.
+
+    Args:
+        data: DataFrame with price data (columns are added in place)
+        parameters: Optional dict of indicator name -> parameters for its build function
+        indicators: Indicator names (default: all registered)
+        chunk_size: Bars per chunk for the windowed kernels (None for one pass)
+        warmup: Leading bars that only warm up the indicators; they get Hold signals
+        max_workers: Threads evaluating independent nodes
+
+    Returns:
+        The DataFrame with indicator and signal columns added
+    """
+    parameters = parameters or {}
+    graph = ComputeGraph(chunk_size=chunk_size, warmup=warmup)
+    columns = {}
+    for name in indicators or list(INDICATORS):
+        indicator = INDICATORS[name]
+        columns.update(indicator.build(graph, **{**indicator.defaults, **parameters.get(name, {})}))
+    values = graph.compute(data, list(dict.fromkeys(columns.values())), max_workers=max_workers, memo=indicator_memo)
+    for column, node in columns.items():
+        data[column] = values[node]
+    return data
+
+# Building blocks shared by the built-in indicators and available to plugins.
+# Each takes arrays and returns one array; see ComputeGraph.add. Frame
+# columns such as "Close" are inputs by name.
+
+@traced()
+def price_changes(close: np.ndarray) -> np.ndarray:
+    return pct_change(close)
+
+@traced()
+def rolling_mean(values: np.ndarray, window: int, chunk_size: int = None) -> np.ndarray:
+    return kernels.chunked(lambda part: kernels.rolling_mean(part, window), values, lookback=window - 1,
+                           chunk_size=chunk_size)
+
+@traced()
+def rolling_std(values: np.ndarray, mean: np.ndarray, window: int, chunk_size: int = None) -> np.ndarray:
+    return kernels.chunked(lambda part, part_mean: kernels.rolling_std(part, window, mean=part_mean), values,
+                           lookback=window - 1, chunk_size=chunk_size, extra=(mean,))
+
+@traced()
+def ema(values: np.ndarray, span: float, chunk_size: int = None) -> np.ndarray:
+    return kernels.chunked_ema(values, span, chunk_size=chunk_size)
+
+@traced()
+def rsi(close: np.ndarray, window: int, chunk_size: int = None) -> np.ndarray:
+    return kernels.chunked(lambda part: kernels.rsi(part, window), close, lookback=window, chunk_size=chunk_size)
+
+@traced()
+def difference(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    return first - second
+
+@traced()
+def offset(center: np.ndarray, width: np.ndarray, scale: float) -> np.ndarray:
+    return center + width * scale
+
+def price_change_node(graph: ComputeGraph) -> tuple:
+    """Close-to-close changes shared by every momentum fallback"""
+    return graph.add(price_changes, "Close")
+
+# Values of the built-in indicators, also evaluated by the calculate_* helpers (see evaluate_nodes)
+
+def rsi_nodes(graph: ComputeGraph, window: int = 14) -> tuple:
+    """RSI node; its gains and losses feed nothing else, so they stay chunk-sized inside it"""
+    return (graph.add(rsi, "Close", window=window),)
+
+def macd_nodes(graph: ComputeGraph, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple:
+    """MACD line, signal line and histogram nodes"""
+    macd_line = graph.add(difference, graph.add(ema, "Close", span=fast), graph.add(ema, "Close", span=slow))
+    signal_line = graph.add(ema, macd_line, span=signal)
+    return macd_line, signal_line, graph.add(difference, macd_line, signal_line)
+
+def bollinger_nodes(graph: ComputeGraph, window: int = 20, num_std: float = 2) -> tuple:
+    """Upper, middle and lower band nodes"""
+    middle = graph.add(rolling_mean, "Close", window=window)
+    std = graph.add(rolling_std, "Close", middle, window=window)
+    return graph.add(offset, middle, std, scale=num_std), middle, graph.add(offset, middle, std, scale=-num_std)
+
+def evaluate_nodes(close: np.ndarray, nodes, chunk_size: int | None = DEFAULT_CHUNK_SIZE, **parameters) -> tuple:
+    """
+    Evaluate indicator value nodes over a close price array, memoized in indicator_memo
+
+    Args:
+        close: 1-D array of closing prices
+        nodes: Function adding the nodes to a graph, e.g. macd_nodes
+        chunk_size: Bars per chunk for the windowed kernels (None for one pass)
+        **parameters: Parameters for nodes
+
+    Returns:
+        Tuple of arrays, one per node (read-only unless the memo is off)
+    """
+    graph = ComputeGraph(chunk_size=chunk_size)
+    targets = nodes(graph, **parameters)
+    values = graph.compute({"Close": close}, list(targets), memo=indicator_memo)
+    return tuple(values[node] for node in targets)
+
+# Built-in indicators
+
+@traced()
+def rsi_signals(rsi: np.ndarray, close: np.ndarray, price_change: np.ndarray, lower_quantile: float,
+                upper_quantile: float, warmup: int = 0) -> np.ndarray:
+    return skip_warmup(rsi_signal_kernel, warmup, rsi, close, price_change,
+                       lower_quantile=lower_quantile, upper_quantile=upper_quantile)
+
+def build_rsi(graph: ComputeGraph, window: int = 14, lower_quantile: float = 0.25, upper_quantile: float = 0.75) -> dict:
+    (values,) = rsi_nodes(graph, window)
+    signal = graph.add(rsi_signals, values, "Close", price_change_node(graph),
+                       lower_quantile=lower_quantile, upper_quantile=upper_quantile)
+    return {"RSI": values, "RSI_Signal": signal}
+
+@traced()
+def macd_signals(macd_line: np.ndarray, signal_line: np.ndarray, close: np.ndarray, price_change: np.ndarray,
+                 warmup: int = 0) -> np.ndarray:
+    return skip_warmup(macd_signal_kernel, warmup, macd_line, signal_line, close, price_change)
+
+def build_macd(graph: ComputeGraph, fast: int = 12, slow: int = 26, signal: int = 9) -> dict:
+    macd_line, signal_line, histogram = macd_nodes(graph, fast, slow, signal)
+    strategy = graph.add(macd_signals, macd_line, signal_line, "Close", price_change_node(graph))
+    return {"MACD": macd_line, "MACD_Signal": signal_line, "MACD_Histogram": histogram,
+            "MACD_Strategy_Signal": strategy}
+
+@traced()
+def bollinger_signals(close: np.ndarray, lower_band: np.ndarray, upper_band: np.ndarray, price_change: np.ndarray,
+                      warmup: int = 0) -> np.ndarray:
+    return skip_warmup(bollinger_signal_kernel, warmup, close, lower_band, upper_band, price_change)
+
+def build_bollinger(graph: ComputeGraph, window: int = 20, num_std: float = 2) -> dict:
+    upper, middle, lower = bollinger_nodes(graph, window, num_std)
+    strategy = graph.add(bollinger_signals, "Close", lower, upper, price_change_node(graph))
+    return {"BB_Upper": upper, "BB_Middle": middle, "BB_Lower": lower, "BB_Strategy_Signal": strategy}
+
+register_indicator(Indicator("RSI", build_rsi, "RSI_Signal", ["RSI"],
+                             defaults={"window": 14, "lower_quantile": 0.25, "upper_quantile": 0.75},
+                             lookback=lambda window, **_: window + 1))
+register_indicator(Indicator("MACD", build_macd, "MACD_Strategy_Signal", ["MACD", "MACD_Signal", "MACD_Histogram"],
+                             defaults={"fast": 12, "slow": 26, "signal": 9},
+                             lookback=lambda slow, signal, **_: ema_warmup(slow) + ema_warmup(signal)))
+register_indicator(Indicator("Bollinger", build_bollinger, "BB_Strategy_Signal", ["BB_Upper", "BB_Middle", "BB_Lower"],
+                             defaults={"window": 20, "num_std": 2},
+                             lookback=lambda window, **_: window, label="Bollinger Bands"))
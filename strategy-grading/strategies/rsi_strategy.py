@@ -1,53 +1,29 @@
 import pandas as pd
-import numpy as np
-from utils.helpers import calculate_rsi
+from strategies.registry import compute_indicators
+from utils.indicator_kernels import DEFAULT_CHUNK_SIZE
+from utils.tracing import traced
 
-def generate_rsi_signals(data: pd.DataFrame) -> pd.DataFrame:
+@traced()
+def generate_rsi_signals(data: pd.DataFrame, window: int = 14, lower_quantile: float = 0.25,
+                         upper_quantile: float = 0.75, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         warmup: int = 0) -> pd.DataFrame:
     """
     Generate buy/sell/hold signals based on RSI strategy with adaptive thresholds
     
+    Computes the registered RSI indicator alone (see
+    strategies.registry.compute_indicators), so its columns are the same
+    as in build_indicator_frame.
+    
     Args:
-        data: DataFrame with stock price data
+        data: DataFrame with stock price data (columns are added in place)
+        window: RSI calculation window
+        lower_quantile: RSI quantile below which to Buy
+        upper_quantile: RSI quantile above which to Sell
+        chunk_size: Bars per chunk for the indicator calculation (None for one pass)
+        warmup: Leading bars that only warm up the indicator; they get Hold signals
         
     Returns:
         DataFrame with RSI signals added
     """
-    # Handle multi-level columns for Close price
-    if isinstance(data["Close"], pd.DataFrame):
-        close_prices = data["Close"].iloc[:, 0]
-    else:
-        close_prices = data["Close"]
-    
-    # Create a temporary dataframe with single-level Close column
-    temp_data = data.copy()
-    temp_data["Close"] = close_prices
-    
-    # Calculate RSI
-    data["RSI"] = calculate_rsi(temp_data, window=14)
-    
-    # Initialize signal column
-    data["RSI_Signal"] = 0
-    
-    # Use adaptive RSI thresholds based on the RSI distribution
-    rsi_25 = data["RSI"].quantile(0.25)  # Bottom 25% -> Buy
-    rsi_75 = data["RSI"].quantile(0.75)  # Top 25% -> Sell
-    
-    # Generate signals based on adaptive RSI levels
-    data.loc[data["RSI"] < rsi_25, "RSI_Signal"] = 1   # Buy (bottom quartile)
-    data.loc[data["RSI"] > rsi_75, "RSI_Signal"] = -1  # Sell (top quartile)
-    # Hold remains 0 (middle 50%)
-    
-    # If we still don't have enough signals, use standard RSI thresholds
-    if data["RSI_Signal"].sum() == 0 or (data["RSI_Signal"] == 1).sum() < 2 or (data["RSI_Signal"] == -1).sum() < 2:
-        # Fallback to standard RSI thresholds
-        data.loc[data["RSI"] < 35, "RSI_Signal"] = 1   # Buy (slightly less strict)
-        data.loc[data["RSI"] > 65, "RSI_Signal"] = -1  # Sell (slightly less strict)
-    
-    # Final fallback: use price momentum if still insufficient
-    if (data["RSI_Signal"] == 1).sum() < 2 or (data["RSI_Signal"] == -1).sum() < 2:
-        data["Price_Change"] = data["Close"].pct_change()
-        # Use more aggressive momentum thresholds
-        data.loc[data["Price_Change"] > 0.005, "RSI_Signal"] = 1   # Buy on positive momentum
-        data.loc[data["Price_Change"] < -0.005, "RSI_Signal"] = -1  # Sell on negative momentum
-    
-    return data
+    parameters = {"window": window, "lower_quantile": lower_quantile, "upper_quantile": upper_quantile}
+    return compute_indicators(data, {"RSI": parameters}, indicators=["RSI"], chunk_size=chunk_size, warmup=warmup)
@@ -0,0 +1,204 @@
+import warnings
+import numpy as np
+
+# Signal encoding shared by every strategy
+BUY = 1
+SELL = -1
+HOLD = 0
+SIGNAL_DTYPE = np.int8
+
+# Daily price change used by the momentum fallback
+MOMENTUM_THRESHOLD = 0.005
+
+def pct_change(close: np.ndarray) -> np.ndarray:
+    """
+    Percentage change between consecutive prices (same values as pandas pct_change)
+
+    Args:
+        close: Array of closing prices
+
+    Returns:
+        Float array with NaN in the first position
+    """
+    close = np.asarray(close, dtype=np.float64)
+    change = np.empty_like(close)
+    if len(close):
+        change[0] = np.nan
+        change[1:] = close[1:] / close[:-1] - 1
+    return change
+
+def overlay_signals(signals: np.ndarray, buy_mask: np.ndarray, sell_mask: np.ndarray) -> np.ndarray:
+    """
+    Overlay buy and sell masks on existing signals
+
+    Sell takes precedence over buy, matching the order of the original
+    row-by-row assignments. Rows outside both masks keep their signal.
+
+    Args:
+        signals: Current int8 signal array
+        buy_mask: Boolean array of rows to mark as Buy
+        sell_mask: Boolean array of rows to mark as Sell
+
+    Returns:
+        New int8 signal array
+    """
+    return np.select([sell_mask, buy_mask], [SELL, BUY], default=signals).astype(SIGNAL_DTYPE, copy=False)
+
+def momentum_fallback(signals: np.ndarray, close: np.ndarray, price_change: np.ndarray = None,
+                      threshold: float = MOMENTUM_THRESHOLD, rows: np.ndarray = None) -> np.ndarray:
+    """
+    Overlay price momentum signals (Buy on rises, Sell on drops above the threshold)
+
+    Args:
+        signals: Current int8 signal array (1-D, or 2-D with one row per variant)
+        close: Array of closing prices
+        price_change: Precomputed price changes (computed from close if None)
+        threshold: Absolute price change needed for a signal
+        rows: Boolean array selecting which rows get the fallback (default: all)
+
+    Returns:
+        New int8 signal array
+    """
+    if price_change is None:
+        price_change = pct_change(close)
+    buy_mask = price_change > threshold
+    sell_mask = price_change < -threshold
+    if rows is not None:
+        buy_mask = buy_mask & rows[..., None]
+        sell_mask = sell_mask & rows[..., None]
+    return overlay_signals(signals, buy_mask, sell_mask)
+
+def signal_counts(signals: np.ndarray) -> tuple:
+    """
+    Count signals along the time axis
+
+    Args:
+        signals: int8 signal array (1-D, or 2-D with one row per variant)
+
+    Returns:
+        Tuple of (net sum, Buy count, Sell count), one value per row
+    """
+    return (signals.sum(axis=-1, dtype=np.int64),
+            np.count_nonzero(signals == BUY, axis=-1),
+            np.count_nonzero(signals == SELL, axis=-1))
+
+def skip_warmup(kernel, warmup: int, *arrays, **kwargs) -> np.ndarray:
+    """
+    Run a signal kernel on the bars after warmup; warm-up bars get Hold
+
+    Warm-up bars only feed the indicators, so they neither get a signal
+    nor count towards adaptive thresholds and fallbacks.
+
+    Args:
+        kernel: Signal kernel taking the arrays positionally
+        warmup: Number of leading warm-up bars
+        *arrays: Kernel array arguments (None is passed through)
+        **kwargs: Other kernel arguments
+
+    Returns:
+        int8 signal array covering every bar
+    """
+    if not warmup:
+        return kernel(*arrays, **kwargs)
+    signals = kernel(*(None if values is None else np.asarray(values)[..., warmup:] for values in arrays), **kwargs)
+    out = np.zeros(signals.shape[:-1] + (signals.shape[-1] + warmup,), dtype=SIGNAL_DTYPE)
+    out[..., warmup:] = signals
+    return out
+
+def rsi_signal_kernel(rsi: np.ndarray, close: np.ndarray, price_change: np.ndarray = None,
+                      lower_quantile: float = 0.25, upper_quantile: float = 0.75,
+                      lower_level: float = 35, upper_level: float = 65) -> np.ndarray:
+    """
+    RSI signals with adaptive quantile thresholds and two fallbacks
+
+    A 2-D rsi array (one row per parameter variant) is processed in one
+    pass; thresholds and fallbacks are then decided row by row.
+
+    Args:
+        rsi: Array of RSI values (NaN during warm-up)
+        close: Array of closing prices
+        price_change: Precomputed price changes for the momentum fallback
+        lower_quantile: RSI quantile below which to Buy
+        upper_quantile: RSI quantile above which to Sell
+        lower_level: Fixed RSI level below which to Buy in the first fallback
+        upper_level: Fixed RSI level above which to Sell in the first fallback
+
+    Returns:
+        int8 signal array with the same shape as rsi
+    """
+    rsi = np.asarray(rsi, dtype=np.float64)
+    signals = np.zeros(rsi.shape, dtype=SIGNAL_DTYPE)
+
+    # Adaptive thresholds from the RSI distribution (NaN-skipping like pandas quantile)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows give NaN thresholds
+        thresholds = np.nanquantile(rsi, [lower_quantile, upper_quantile], axis=-1)
+    rsi_low, rsi_high = thresholds[0][..., None], thresholds[1][..., None]
+    signals = overlay_signals(signals, rsi < rsi_low, rsi > rsi_high)
+
+    # Fallback to standard RSI thresholds
+    total, buys, sells = signal_counts(signals)
+    need = (total == 0) | (buys < 2) | (sells < 2)
+    if need.any():
+        signals = overlay_signals(signals, (rsi < lower_level) & need[..., None],
+                                  (rsi > upper_level) & need[..., None])
+        total, buys, sells = signal_counts(signals)
+
+    # Final fallback: price momentum
+    need = (buys < 2) | (sells < 2)
+    if need.any():
+        signals = momentum_fallback(signals, close, price_change, rows=need)
+
+    return signals
+
+def macd_signal_kernel(macd_line: np.ndarray, signal_line: np.ndarray, close: np.ndarray,
+                       price_change: np.ndarray = None) -> np.ndarray:
+    """
+    MACD signals: Buy while the MACD line is above its signal line, Sell while below
+
+    Args:
+        macd_line: Array of MACD values (1-D, or 2-D with one row per variant)
+        signal_line: Array of MACD signal line values, same shape as macd_line
+        close: Array of closing prices
+        price_change: Precomputed price changes for the momentum fallback
+
+    Returns:
+        int8 signal array with the same shape as macd_line
+    """
+    macd_line = np.asarray(macd_line, dtype=np.float64)
+    signal_line = np.asarray(signal_line, dtype=np.float64)
+
+    # NaN rows compare False on both sides and stay Hold
+    signals = np.where(macd_line > signal_line, BUY,
+                       np.where(macd_line < signal_line, SELL, HOLD)).astype(SIGNAL_DTYPE)
+
+    need = signal_counts(signals)[0] == 0
+    if need.any():
+        signals = momentum_fallback(signals, close, price_change, rows=need)
+
+    return signals
+
+def bollinger_signal_kernel(close: np.ndarray, lower_band: np.ndarray, upper_band: np.ndarray,
+                            price_change: np.ndarray = None) -> np.ndarray:
+    """
+    Bollinger Band signals: Buy at or below the lower band, Sell at or above the upper band
+
+    Args:
+        close: Array of closing prices
+        lower_band: Array of lower band values (1-D, or 2-D with one row per variant)
+        upper_band: Array of upper band values, same shape as lower_band
+        price_change: Precomputed price changes for the momentum fallback
+
+    Returns:
+        int8 signal array with the same shape as the bands
+    """
+    close = np.asarray(close, dtype=np.float64)
+    lower_band = np.asarray(lower_band, dtype=np.float64)
+    signals = np.zeros(np.broadcast_shapes(close.shape, lower_band.shape), dtype=SIGNAL_DTYPE)
+    signals = overlay_signals(signals, close <= lower_band, close >= upper_band)
+
+    need = signal_counts(signals)[0] == 0
+    if need.any():
+        signals = momentum_fallback(signals, close, price_change, rows=need)
+
+    return signals
@@ -0,0 +1,131 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from data.cache import OHLCVCache, slice_bars
+from data.data_fetcher import lead_start, load_bars
+from data.price_store import PriceStore
+from data.providers import SyntheticProvider, period_start
+
+@pytest.fixture(params=[OHLCVCache, PriceStore])
+def cache(request, tmp_path):
+    return request.param(str(tmp_path / "cache"))
+
+def bars(start, periods, base=100.0):
+    index = pd.bdate_range(start, periods=periods, name="Date")
+    close = base + np.arange(periods, dtype=np.float64)
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(periods, 1000.0)}, index=index)
+
+def assert_bars_equal(left, right):
+    # Price store columns are memory maps, so compare the values rather than the array types
+    assert left.index.equals(right.index)
+    assert list(left.columns) == list(right.columns)
+    np.testing.assert_array_equal(left.to_numpy(), right.to_numpy())
+
+class RecordingProvider(SyntheticProvider):
+    """Synthetic provider remembering the start of every fetch"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.starts = []
+
+    def fetch(self, ticker, period=None, interval="1d", start=None):
+        self.starts.append(start)
+        return super().fetch(ticker, period=period, interval=interval, start=start)
+
+def test_append_overlapping_bars_take_the_new_values(cache):
+    cache.write("AAA", "1d", bars("2024-01-01", 10), covered_from=pd.Timestamp("2024-01-01"))
+    newer = bars("2024-01-12", 5, base=500.0)
+
+    merged = cache.append("AAA", "1d", newer)
+
+    assert len(merged) == 14
+    assert merged.index.is_monotonic_increasing and merged.index.is_unique
+    assert merged.loc["2024-01-12", "Close"] == 500.0
+    assert merged.loc["2024-01-11", "Close"] == 108.0
+    entry = cache.entry("AAA", "1d")
+    assert entry["covered_from"] == pd.Timestamp("2024-01-01").isoformat()
+    assert entry["last_bar"] == pd.Timestamp("2024-01-18").isoformat()
+    assert cache.stats["appends"] == 1
+    assert_bars_equal(cache.read("AAA", "1d"), merged)
+
+def test_write_extends_coverage_backwards(cache):
+    cache.write("AAA", "1d", bars("2024-03-01", 10), covered_from=pd.Timestamp("2024-03-01"))
+    assert not cache.covers("AAA", "1d", pd.Timestamp("2024-02-01"))
+    assert cache.covers("AAA", "1d", pd.Timestamp("2024-03-04"))
+
+    cache.write("AAA", "1d", bars("2024-02-01", 10), covered_from=pd.Timestamp("2024-02-01"))
+
+    assert cache.covers("AAA", "1d", pd.Timestamp("2024-02-01"))
+    assert len(cache.read("AAA", "1d")) == 20
+    # Full history covers any start, including None
+    cache.write("BBB", "1d", bars("2024-01-01", 5))
+    assert cache.covers("BBB", "1d", None)
+    assert not cache.covers("CCC", "1d", pd.Timestamp("2024-01-01"))
+
+def test_read_does_not_rewrite_the_index(cache):
+    cache.write("AAA", "1d", bars("2024-01-01", 10))
+    index_path = os.path.join(cache.cache_dir, "index.json")
+    with open(index_path) as f:
+        before = f.read()
+    written = cache.entry("AAA", "1d")["last_access"]
+
+    assert cache.read("AAA", "1d") is not None
+
+    with open(index_path) as f:
+        assert f.read() == before
+    assert cache.entry("AAA", "1d")["last_access"] >= written
+    assert cache.stats["hits"] == 1
+
+def test_slice_bars_adds_warmup_in_front():
+    data = bars("2024-01-01", 100)
+    start = data.index[50]
+
+    sliced = slice_bars(data, start, warmup=10)
+
+    assert sliced.index[0] == data.index[40]
+    assert sliced.attrs["analysis_start"] == start
+    assert len(sliced) == 60
+
+def test_slice_bars_moves_start_back_for_min_bars():
+    data = bars("2024-01-01", 100)
+
+    sliced = slice_bars(data, data.index[95], warmup=10, min_bars=20)
+
+    assert sliced.attrs["analysis_start"] == data.index[80]
+    assert sliced.index[0] == data.index[70]
+    # Not enough bars for both: the warm-up is cut at the first bar
+    short = slice_bars(data, data.index[5], warmup=10)
+    assert short.index[0] == data.index[0]
+    assert short.attrs["analysis_start"] == data.index[5]
+
+def test_first_download_covers_the_period_and_its_warmup(cache):
+    provider = RecordingProvider(origin="2015-01-02")
+
+    data = load_bars("AAA", "1mo", provider=provider, cache=cache, warmup=30, min_bars=60)
+
+    first = lead_start(period_start("1mo"), 90)
+    assert provider.starts == [first]
+    assert pd.Timestamp(cache.entry("AAA", "1d")["covered_from"]) == first
+    analysed = data.index.searchsorted(data.attrs["analysis_start"])
+    assert analysed >= 30
+    assert len(data) - analysed >= 60
+
+def test_longer_period_extends_the_cached_history(cache):
+    provider = RecordingProvider(origin="2015-01-02")
+    load_bars("AAA", "1mo", provider=provider, cache=cache, warmup=30, min_bars=60)
+
+    data = load_bars("AAA", "1y", provider=provider, cache=cache, warmup=30)
+
+    first = lead_start(period_start("1y"), 30)
+    assert provider.starts[-1] == first
+    assert pd.Timestamp(cache.entry("AAA", "1d")["covered_from"]) == first
+    assert data.attrs["analysis_start"] >= period_start("1y")
+    expected = provider.bars("AAA", end=pd.Timestamp.now())
+    assert_bars_equal(cache.read("AAA", "1d"), expected.loc[first:])
+
+    # Shorter periods are now slices of the cached history
+    calls = provider.calls
+    load_bars("AAA", "3mo", provider=provider, cache=cache, warmup=30, min_bars=60)
+    assert provider.calls == calls
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from analysis.indicator_comparison import (SIGNAL_TYPES, compare_all_indicators, compare_all_indicators_batch,
+                                           compare_indicators, filter_returns_by_signal)
+from analysis.ttest_analysis import perform_pairwise_ttest
+from strategies.registry import SIGNAL_COLUMNS
+
+def signal_frame(seed, n=400):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({"Return": rng.standard_t(4, n) * 0.01 + 0.0005},
+                        index=pd.bdate_range("2024-01-01", periods=n))
+    data.iloc[rng.choice(n, 10, replace=False), 0] = np.nan
+    for i, column in enumerate(SIGNAL_COLUMNS.values()):
+        # Indicators with different Buy/Sell mixes
+        data[column] = rng.choice([-1, 0, 1], n, p=[0.2 + 0.1 * i, 0.4, 0.4 - 0.1 * i]).astype(np.int8)
+    return data
+
+@pytest.fixture
+def data():
+    return signal_frame(11)
+
+def groups(data):
+    return {f"{name}_{signal_type}": filter_returns_by_signal(data, column, signal_type)
+            for name, column in SIGNAL_COLUMNS.items() for signal_type in SIGNAL_TYPES}
+
+def test_all_pairs_match_scipy(data):
+    pairs = compare_all_indicators(data)
+    returns = groups(data)
+
+    assert pairs["t_statistic"].shape == (9, 9)
+    for first in pairs["t_statistic"].index:
+        for second in pairs["t_statistic"].columns:
+            t_stat, p_val = stats.ttest_ind(returns[first], returns[second], equal_var=False)
+            np.testing.assert_allclose(pairs["t_statistic"].loc[first, second], t_stat, rtol=1e-9, atol=1e-12)
+            np.testing.assert_allclose(pairs["p_value"].loc[first, second], p_val, rtol=1e-9, atol=1e-12)
+
+    statistics = pairs["statistics"]
+    for label, group in returns.items():
+        assert statistics.loc[label, "count"] == len(group)
+        np.testing.assert_allclose(statistics.loc[label, "mean"], group.mean(), rtol=1e-12)
+        np.testing.assert_allclose(statistics.loc[label, "var"], group.var(), rtol=1e-9)
+
+@pytest.mark.parametrize("indicator1, signal1, indicator2, signal2", [
+    ("RSI", "All", "MACD", "All"),
+    ("RSI", "Buy", "RSI", "Sell"),
+    ("MACD", "Sell", "Bollinger", "Buy"),
+    ("Bollinger", "All", "Bollinger", "Buy"),
+])
+def test_compare_indicators_reads_the_same_result_from_all_pairs(data, indicator1, signal1, indicator2, signal2):
+    direct = compare_indicators(data, indicator1, indicator2, signal1, signal2)
+    cached = compare_indicators(data, indicator1, indicator2, signal1, signal2, all_pairs=compare_all_indicators(data))
+
+    assert direct.keys() == cached.keys()
+    for key, result in direct.items():
+        for name, value in result.items():
+            if isinstance(value, str):
+                assert cached[key][name] == value
+            else:
+                np.testing.assert_allclose(cached[key][name], value, rtol=1e-9)
+
+def test_pairwise_ttest_matches_the_buy_sell_entry(data):
+    pairs = compare_all_indicators(data)
+
+    result = perform_pairwise_ttest(data.assign(Signal=data["RSI_Signal"]), "Buy", "Sell")
+
+    np.testing.assert_allclose(result["t_statistic"], pairs["t_statistic"].loc["RSI_Buy", "RSI_Sell"], rtol=1e-9)
+    np.testing.assert_allclose(result["p_value"], pairs["p_value"].loc["RSI_Buy", "RSI_Sell"], rtol=1e-9)
+
+def test_batch_matches_each_frame():
+    # Different lengths are padded; a batch size of 2 splits the universe
+    frames = {"AAA": signal_frame(1, 300), "BBB": signal_frame(2, 450), "CCC": signal_frame(3, 120)}
+
+    batch = compare_all_indicators_batch(frames, batch_size=2)
+
+    for row, (ticker, data) in enumerate(frames.items()):
+        single = compare_all_indicators(data)
+        np.testing.assert_allclose(batch["t_statistic"][row], single["t_statistic"].to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(batch["p_value"][row], single["p_value"].to_numpy(), rtol=1e-9, atol=1e-15)
+        np.testing.assert_array_equal(batch["count"][row], single["statistics"]["count"].to_numpy())
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from analysis.indicator_comparison import compare_all_indicators
+from analysis.parameter_sweep import sweep_parameters
+from data.data_fetcher import fetch_data
+from data.price_store import PriceStore
+from data.providers import SyntheticProvider
+from main import build_indicator_frame
+from strategies.registry import SIGNAL_COLUMNS
+
+@pytest.fixture
+def data(tmp_path):
+    # The price store adds warm-up bars in front of the period
+    data = fetch_data("AAA", "6mo", provider=SyntheticProvider(origin="2015-01-02"),
+                      cache=PriceStore(str(tmp_path / "prices")))
+    assert data.index.searchsorted(data.attrs["analysis_start"]) > 0
+    return data
+
+def test_default_parameters_match_the_comparison(data):
+    sweep = sweep_parameters(data).set_index("indicator")
+    combined = build_indicator_frame(data.copy())
+    pairs = compare_all_indicators(combined)
+    returns = combined["Return"].notna()
+
+    for indicator, column in SIGNAL_COLUMNS.items():
+        row = sweep.loc[indicator]
+        assert row["buy_count"] == ((combined[column] == 1) & returns).sum()
+        assert row["sell_count"] == ((combined[column] == -1) & returns).sum()
+        buy, sell = f"{indicator}_Buy", f"{indicator}_Sell"
+        np.testing.assert_allclose(row["t_statistic"], pairs["t_statistic"].loc[buy, sell], rtol=1e-9)
+        np.testing.assert_allclose(row["p_value"], pairs["p_value"].loc[buy, sell], rtol=1e-9)
+
+def test_batches_and_workers_give_the_same_table(data):
+    grids = {"rsi_grid": {"window": [10, 14]}, "macd_grid": {"fast": [8, 12], "slow": [26]},
+             "bollinger_grid": {"num_std": [1.5, 2]}}
+    whole = sweep_parameters(data, **grids)
+
+    assert len(whole) == 6
+    for kwargs in ({"batch_size": 1}, {"batch_size": 1, "n_jobs": 2}):
+        split = sweep_parameters(data, **grids, **kwargs)
+        np.testing.assert_allclose(split.select_dtypes("number"), whole.select_dtypes("number"), rtol=1e-12)
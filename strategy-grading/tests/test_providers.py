@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+from data.providers import LimitedProvider, RateLimiter, SyntheticProvider, is_transient
+
+def limited(provider, retries=2, backoff=0.5):
+    sleeps = []
+    return LimitedProvider(provider, retries=retries, backoff=backoff, sleep=sleeps.append), sleeps
+
+def synthetic(**kwargs):
+    return SyntheticProvider(origin="2024-01-02", clock=lambda: pd.Timestamp("2024-06-28 17:00"), **kwargs)
+
+def test_transient_failures_are_retried_with_backoff():
+    provider = synthetic(transient_failures=2)
+    wrapped, sleeps = limited(provider, retries=2, backoff=0.5)
+
+    data = wrapped.fetch("AAA", period="1mo")
+
+    assert not data.empty
+    assert provider.calls == 3
+    assert len(sleeps) == 2
+    # Jittered exponential backoff: attempt n waits backoff * 2**n * [0.5, 1.5)
+    for attempt, delay in enumerate(sleeps):
+        assert 0.5 * 2 ** attempt * 0.5 <= delay < 0.5 * 2 ** attempt * 1.5
+
+def test_last_transient_failure_is_raised():
+    provider = synthetic(transient_failures=3)
+    wrapped, sleeps = limited(provider, retries=2)
+
+    with pytest.raises(ConnectionError):
+        wrapped.fetch("AAA", period="1mo")
+    assert provider.calls == 3
+    assert len(sleeps) == 2
+
+def test_permanent_failures_are_not_retried():
+    provider = synthetic(fail_tickers=["BAD"])
+    wrapped, sleeps = limited(provider, retries=2)
+
+    with pytest.raises(ValueError):
+        wrapped.fetch("BAD", period="1mo")
+    assert provider.calls == 1
+    assert sleeps == []
+
+class HTTPError(OSError):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+class YFRateLimitError(Exception):
+    pass
+
+@pytest.mark.parametrize("error, expected", [
+    (ConnectionError("reset"), True),
+    (TimeoutError("timed out"), True),
+    (HTTPError(503), True),
+    (HTTPError(429), True),
+    (HTTPError(404), False),
+    (YFRateLimitError("Too Many Requests"), True),
+    (ValueError("Unknown ticker"), False),
+    (KeyError("Close"), False),
+])
+def test_is_transient(error, expected):
+    assert is_transient(error) is expected
+
+def test_rate_limiter_spaces_out_reservations():
+    now = [100.0]
+    limiter = RateLimiter(rate=4, clock=lambda: now[0])
+
+    assert [limiter.reserve() for _ in range(3)] == [0.0, 0.25, 0.5]
+    now[0] += 1.0
+    assert limiter.reserve() == 0.0
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+from strategies.registry import (ComputeGraph, bollinger_nodes, build_bollinger, build_macd, build_rsi, ema,
+                                 evaluate_nodes, macd_nodes, rolling_mean, rsi_nodes)
+from utils.result_cache import ArrayMemo
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, 3000)))
+    return pd.DataFrame({"Close": close}, index=pd.bdate_range("2015-01-01", periods=len(close)))
+
+def test_built_ins_share_nodes():
+    graph = ComputeGraph()
+    build_rsi(graph)
+    build_macd(graph)
+    build_bollinger(graph)
+    nodes = len(graph.nodes)
+
+    # A plugin asking for the 20-bar mean and the 12/26 EMAs reuses the built-ins' nodes
+    middle = graph.add(rolling_mean, "Close", window=20)
+    fast = graph.add(ema, "Close", span=12)
+    slow = graph.add(ema, "Close", span=26)
+
+    assert len(graph.nodes) == nodes
+    assert middle == bollinger_nodes(graph)[1]
+    assert macd_nodes(graph)[0][1] == (fast, slow)
+
+def test_shared_nodes_are_computed_once(frame):
+    calls = []
+
+    def doubled(values):
+        calls.append(len(values))
+        return values * 2
+
+    graph = ComputeGraph()
+    first = graph.add(doubled, "Close")
+    second = graph.add(doubled, "Close")
+    values = graph.compute(frame, [first, second])
+
+    assert first == second
+    assert len(calls) == 1
+    np.testing.assert_array_equal(values[first], frame["Close"].to_numpy() * 2)
+
+def test_built_in_values_match_pandas(frame):
+    close = frame["Close"]
+
+    (rsi,) = evaluate_nodes(close.to_numpy(), rsi_nodes, window=14)
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0.0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0.0)).rolling(14).mean()
+    np.testing.assert_allclose(rsi, 100 - 100 / (1 + gain / loss), rtol=1e-9)
+
+    macd_line, signal_line, histogram = evaluate_nodes(close.to_numpy(), macd_nodes)
+    expected = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+    np.testing.assert_allclose(macd_line, expected, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(signal_line, expected.ewm(span=9).mean(), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(histogram, macd_line - signal_line)
+
+    upper, middle, lower = evaluate_nodes(close.to_numpy(), bollinger_nodes, window=20, num_std=2)
+    std = close.rolling(20).std()
+    np.testing.assert_allclose(middle, close.rolling(20).mean(), rtol=1e-12)
+    np.testing.assert_allclose(upper, close.rolling(20).mean() + 2 * std, rtol=1e-9)
+    np.testing.assert_allclose(lower, close.rolling(20).mean() - 2 * std, rtol=1e-9)
+
+@pytest.mark.parametrize("nodes", [rsi_nodes, macd_nodes, bollinger_nodes])
+def test_chunked_nodes_equal_one_pass(nodes):
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0, 0.01, 20_000)))
+
+    chunked = evaluate_nodes(close, nodes, chunk_size=4096)
+    for part, whole in zip(chunked, evaluate_nodes(close, nodes, chunk_size=None)):
+        np.testing.assert_array_equal(part, whole)
+
+def test_memo_skips_computed_targets(frame):
+    memo = ArrayMemo(max_bytes=2**26)
+    calls = []
+
+    def shifted(values):
+        calls.append(1)
+        return values + 1
+
+    graph = ComputeGraph()
+    targets = list(macd_nodes(graph))
+    first = graph.compute(frame, targets, memo=memo)
+    assert memo.stats["misses"] == 3 and memo.stats["entries"] == 3
+    assert not first[targets[0]].flags.writeable
+
+    second = ComputeGraph().compute(frame, targets, memo=memo)
+    assert memo.stats["hits"] == 3
+    for node in targets:
+        np.testing.assert_array_equal(second[node], first[node])
+
+    # Other prices miss
+    other = frame.assign(Close=frame["Close"] * 1.01)
+    ComputeGraph().compute(other, targets, memo=memo)
+    assert memo.stats["misses"] == 6
+
+    # Nested functions have no stable name and are never looked up
+    lookups = memo.stats["hits"] + memo.stats["misses"]
+    node = graph.add(shifted, "Close")
+    graph.compute(frame, [node], memo=memo)
+    graph.compute(frame, [node], memo=memo)
+    assert len(calls) == 2
+    assert memo.stats["hits"] + memo.stats["misses"] == lookups
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from analysis.regression import OLSAccumulator, design_matrix, regress_universe
+from data.providers import SyntheticProvider
+from main import build_indicator_frame
+
+def ols(X, y):
+    # Reference fit on the stacked design
+    coef, _, rank, _ = np.linalg.lstsq(X, y, rcond=None)
+    residuals = y - X @ coef
+    df = len(y) - rank
+    sigma2 = residuals @ residuals / df
+    se = np.sqrt(sigma2 * np.diag(np.linalg.pinv(X.T @ X)))
+    r_squared = 1 - residuals @ residuals / ((y - y.mean()) @ (y - y.mean()))
+    return coef, se, r_squared, rank
+
+def random_design(rng, n, k=4):
+    X = np.column_stack([np.ones(n), rng.normal(size=(n, k - 1)) * [1, 10, 0.01][:k - 1]])
+    y = X @ rng.normal(size=k) + rng.normal(0, 0.5, n)
+    return X, y
+
+@pytest.fixture
+def frames():
+    provider = SyntheticProvider(origin="2020-01-02")
+    frames = {}
+    for ticker, end in (("AAA", "2021-06-30"), ("BBB", "2021-03-31"), ("CCC", "2020-12-31")):
+        data = provider.bars(ticker, end=pd.Timestamp(end))
+        data["Return"] = data["Close"].pct_change()
+        frames[ticker] = build_indicator_frame(data.iloc[1:].copy())
+    return frames
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 10_000])
+def test_incremental_qr_matches_lstsq(chunk_size):
+    X, y = random_design(np.random.default_rng(0), 500)
+
+    result = OLSAccumulator(["Intercept", "a", "b", "c"]).update(X, y, chunk_size).fit()
+    coef, se, r_squared, rank = ols(X, y)
+
+    np.testing.assert_allclose(result["coef"][0], coef, rtol=1e-9)
+    np.testing.assert_allclose(result["se"][0], se, rtol=1e-9)
+    np.testing.assert_allclose(result["r_squared"][0], r_squared, rtol=1e-9)
+    assert result["rank"][0] == rank and result["count"][0] == 500
+    df = 500 - rank
+    np.testing.assert_allclose(result["p_value"][0], 2 * stats.t.sf(np.abs(coef / se), df), rtol=1e-7)
+
+def test_padded_series_match_separate_fits():
+    rng = np.random.default_rng(1)
+    designs = [random_design(rng, n) for n in (300, 120, 40)]
+    X = np.full((3, 300, 4), np.nan)
+    y = np.full((3, 300), np.nan)
+    for i, (series_x, series_y) in enumerate(designs):
+        X[i, :len(series_y)], y[i, :len(series_y)] = series_x, series_y
+
+    result = OLSAccumulator(["Intercept", "a", "b", "c"], ["A", "B", "C"]).update(X, y, chunk_size=50).fit()
+
+    for i, (series_x, series_y) in enumerate(designs):
+        coef, se, r_squared, _ = ols(series_x, series_y)
+        np.testing.assert_allclose(result["coef"][i], coef, rtol=1e-9)
+        np.testing.assert_allclose(result["se"][i], se, rtol=1e-9)
+        np.testing.assert_allclose(result["r_squared"][i], r_squared, rtol=1e-9)
+
+def test_aliased_columns_are_left_out():
+    rng = np.random.default_rng(2)
+    X, y = random_design(rng, 200)
+    # A signal that never fires and a column repeating two earlier ones
+    aliased = np.column_stack([X[:, :2], np.zeros(len(y)), X[:, 2:], X[:, 1] - 3 * X[:, 2]])
+
+    result = OLSAccumulator(["Intercept", "a", "never", "b", "c", "a - 3b"]).update(aliased, y).fit()
+    coef, se, r_squared, _ = ols(X, y)
+
+    assert result["rank"][0] == 4
+    assert np.isnan(result["coef"][0, [2, 5]]).all() and np.isnan(result["p_value"][0, [2, 5]]).all()
+    np.testing.assert_allclose(result["coef"][0, [0, 1, 3, 4]], coef, rtol=1e-8)
+    np.testing.assert_allclose(result["se"][0, [0, 1, 3, 4]], se, rtol=1e-8)
+    np.testing.assert_allclose(result["r_squared"][0], r_squared, rtol=1e-9)
+
+def test_universe_matches_lstsq(frames):
+    result = regress_universe(frames, chunk_size=100).fit()
+
+    for i, data in enumerate(frames.values()):
+        X, y, _ = design_matrix(data)
+        coef, se, _, rank = ols(X, y)
+        assert result["count"][i] == len(y) and result["rank"][i] == rank
+        np.testing.assert_allclose(result["coef"][i], coef, rtol=1e-7, atol=1e-12)
+        np.testing.assert_allclose(result["se"][i], se, rtol=1e-7)
+
+def test_later_bars_update_the_fit(frames):
+    # The first call sees the history up to a cut-off, the second only the bars after each ticker's last row
+    cut = pd.Timestamp("2020-10-30")
+    accumulator = regress_universe({ticker: data.loc[:cut] for ticker, data in frames.items()})
+    assert all(last < cut for last in accumulator.last.values())
+    count = accumulator.count.copy()
+
+    regress_universe(frames, accumulator=accumulator)
+
+    expected = regress_universe(frames).fit()
+    result = accumulator.fit()
+    assert (result["count"] > count).all()
+    np.testing.assert_array_equal(result["count"], expected["count"])
+    np.testing.assert_allclose(result["coef"], expected["coef"], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(result["r_squared"], expected["r_squared"], rtol=1e-9)
+
+    # Nothing new: the fit is unchanged
+    regress_universe(frames, accumulator=accumulator)
+    np.testing.assert_array_equal(accumulator.count, expected["count"])
+
+    with pytest.raises(ValueError):
+        regress_universe(frames, features=["RSI"], accumulator=accumulator)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from analysis.resampling import (RESAMPLE_BLOCK, block_bootstrap_starts, bootstrap_mean_difference,
+                                 circular_block_sums, permutation_mean_difference, resampling_tests)
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(5)
+    return rng.standard_t(4, 150) * 0.01 + 0.002, rng.standard_t(4, 90) * 0.01
+
+def test_fixed_seed_reproduces_the_results(returns):
+    first = resampling_tests(*returns, n_resamples=500, seed=42)
+
+    assert resampling_tests(*returns, n_resamples=500, seed=42) == first
+    assert resampling_tests(*returns, n_resamples=500, seed=43) != first
+    assert first["bootstrap_ci_low"] < first["mean_difference"] < first["bootstrap_ci_high"]
+
+def test_seed_sequence_is_not_advanced(returns):
+    seed = np.random.SeedSequence(42)
+
+    first = resampling_tests(*returns, n_resamples=500, seed=seed)
+    second = resampling_tests(*returns, n_resamples=500, seed=seed)
+
+    assert second == first
+    assert seed.n_children_spawned == 0
+    # A SeedSequence and its integer seed give the same streams
+    assert resampling_tests(*returns, n_resamples=500, seed=42) == first
+
+@pytest.mark.parametrize("kwargs", [
+    {"batch_size": 1},
+    {"batch_size": RESAMPLE_BLOCK},
+    {"batch_size": 3 * RESAMPLE_BLOCK + 5},
+    {"batch_size": RESAMPLE_BLOCK, "n_jobs": 2},
+])
+def test_batches_and_workers_do_not_change_the_results(returns, kwargs):
+    n_resamples = 5 * RESAMPLE_BLOCK + 17
+
+    expected = resampling_tests(*returns, n_resamples=n_resamples, seed=7, batch_size=10_000)
+
+    assert resampling_tests(*returns, n_resamples=n_resamples, seed=7, **kwargs) == expected
+
+def test_block_sums_match_the_gathered_resamples():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=23)
+    block_size = 5
+
+    full, last = circular_block_sums(values, block_size)
+    starts = block_bootstrap_starts(len(values), 50, block_size, rng)
+
+    wrapped = np.concatenate([values, values])
+    for row in starts:
+        resample = np.concatenate([wrapped[start:start + block_size] for start in row])[:len(values)]
+        np.testing.assert_allclose(full[row[:-1]].sum() + last[row[-1]], resample.sum())
+
+def test_p_values_detect_a_shift():
+    rng = np.random.default_rng(9)
+    same = rng.normal(0, 0.01, 300), rng.normal(0, 0.01, 300)
+    shifted = rng.normal(0.004, 0.01, 300), rng.normal(0, 0.01, 300)
+
+    assert bootstrap_mean_difference(*shifted, n_resamples=2000, seed=0)["bootstrap_p_value"] < 0.01
+    assert permutation_mean_difference(*shifted, n_resamples=2000, seed=0)["permutation_p_value"] < 0.01
+    assert bootstrap_mean_difference(*same, n_resamples=2000, seed=0)["bootstrap_p_value"] > 0.05
+    assert permutation_mean_difference(*same, n_resamples=2000, seed=0)["permutation_p_value"] > 0.05
@@ -0,0 +1,129 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from strategies import registry
+from utils.helpers import calculate_bollinger_bands, calculate_macd, calculate_rsi
+from utils.result_cache import ArrayMemo
+
+def values(seed, n=100):
+    return (np.random.default_rng(seed).normal(size=n),)
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(6)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, 400)))
+    return pd.DataFrame({"Close": close}, index=pd.bdate_range("2024-01-01", periods=len(close)))
+
+@pytest.fixture
+def memo(monkeypatch):
+    # A fresh memo for the registry, so hits do not depend on what other tests computed
+    memo = ArrayMemo(max_bytes=2**24)
+    monkeypatch.setattr(registry, "indicator_memo", memo)
+    return memo
+
+def test_least_recently_used_entries_are_evicted_beyond_the_budget():
+    # Room for two 800-byte entries
+    memo = ArrayMemo(max_bytes=2000)
+    memo.put("a", values(1))
+    memo.put("b", values(2))
+    assert memo.get("a") is not None
+
+    memo.put("c", values(3))
+
+    assert memo.get("b") is None
+    assert memo.get("a") is not None and memo.get("c") is not None
+    assert memo.stats == {"hits": 3, "disk_hits": 0, "misses": 1, "evictions": 1, "disk_evictions": 0,
+                          "entries": 2, "bytes": 1600}
+
+    # Replacing a key does not count its old bytes twice; an entry over the whole budget is not kept
+    memo.put("c", values(4))
+    memo.put("d", values(5, n=300))
+    assert memo.stats["bytes"] == 1600 and memo.stats["entries"] == 2
+    assert memo.get("d") is None
+
+def test_returned_arrays_are_read_only():
+    memo = ArrayMemo()
+    computed = values(1)
+    key = memo.memo_key("f", computed[0], window=3)
+
+    first, hit = memo.get_or_compute(key, lambda: computed)
+    second, second_hit = memo.get_or_compute(key, lambda: pytest.fail("computed on a hit"))
+
+    assert not hit and second_hit
+    assert second[0] is first[0]
+    with pytest.raises(ValueError):
+        second[0][0] = 0.0
+    # Keys follow the values and parameters, not the array object
+    assert memo.memo_key("f", computed[0].copy(), window=3) == key
+    assert memo.memo_key("f", computed[0], window=4) != key
+
+def test_disabled_memo_keeps_nothing():
+    memo = ArrayMemo(max_bytes=0)
+    result, hit = memo.get_or_compute("a", lambda: values(1))
+
+    assert not memo.enabled and not hit
+    assert result[0].flags.writeable
+    assert memo.get("a") is None
+
+def test_disk_tier_is_shared_between_memos(tmp_path):
+    directory = str(tmp_path / "memo")
+    lines = values(1) + values(2)
+    ArrayMemo(directory=directory).put("a", lines)
+
+    # A new memo on the same directory, as in another process, reads the file
+    memo = ArrayMemo(directory=directory)
+    result = memo.get("a")
+
+    assert memo.stats["disk_hits"] == 1 and memo.stats["entries"] == 1
+    for line, expected in zip(result, lines):
+        np.testing.assert_array_equal(line, expected)
+        assert not line.flags.writeable
+    # Now in memory
+    assert memo.get("a") is result and memo.stats["hits"] == 1
+
+    memo.clear(disk=True)
+    assert ArrayMemo(directory=directory).get("a") is None
+
+def test_disk_tier_drops_the_least_recently_used_files(tmp_path):
+    directory = str(tmp_path / "memo")
+    # Room on disk for one file; nothing in memory
+    memo = ArrayMemo(max_bytes=0, directory=directory, max_disk_bytes=1000)
+    memo.put("a", values(1))
+    path = os.path.join(directory, "a.npy")
+    os.utime(path, (0, 0))
+
+    memo.put("b", values(2))
+
+    assert not os.path.exists(path)
+    assert memo.stats["disk_evictions"] == 1
+    assert memo.get("a") is None and memo.get("b") is not None
+
+@pytest.mark.parametrize("calculate", [calculate_rsi, calculate_macd, calculate_bollinger_bands])
+def test_calculated_series_are_writable_copies(memo, data, calculate):
+    first = calculate(data)
+    first = first if isinstance(first, tuple) else (first,)
+    expected = [series.copy() for series in first]
+
+    for series in first:
+        series.iloc[-5:] = 0.0
+    second = calculate(data)
+    second = second if isinstance(second, tuple) else (second,)
+
+    # The second call came from the memo, which the writes above did not reach
+    assert memo.stats["hits"] >= 1
+    for series, reference in zip(second, expected):
+        pd.testing.assert_series_equal(series, reference)
+        series.iloc[0] = 1.0
+
+def test_calculated_columns_can_be_edited_in_the_frame(memo, data):
+    rsi = calculate_rsi(data)
+    data["RSI"] = calculate_rsi(data)
+
+    rsi.fillna(50.0, inplace=True)
+    data.loc[data.index[:3], "RSI"] = 50.0
+
+    assert memo.stats["hits"] == 1
+    assert not rsi.isna().any()
+    assert (data["RSI"].iloc[:3] == 50.0).all()
+    assert np.isnan(calculate_rsi(data).iloc[3])
@@ -0,0 +1,100 @@
+import functools
+import pandas as pd
+import pytest
+from data import data_fetcher
+from data.providers import SyntheticProvider
+from data.results_store import ResultsStore, request_key
+from main import run_indicator_comparison
+from scanner import scan_ticker, scan_universe
+from utils.result_cache import frame_fingerprint
+
+@pytest.fixture(autouse=True)
+def no_price_store(monkeypatch):
+    monkeypatch.setenv("STRATEGY_GRADING_CACHE_DIR", "")
+    monkeypatch.setattr(data_fetcher, "_default_cache", None)
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(str(tmp_path / "results.sqlite"))
+
+@pytest.fixture
+def provider():
+    # A partial rather than a lambda, so the provider can be pickled to worker processes
+    return SyntheticProvider(origin="2024-01-02", clock=functools.partial(pd.Timestamp, "2025-06-30 17:00"))
+
+@pytest.fixture
+def run(provider):
+    data, comparison, ranking, summary = run_indicator_comparison("AAA", "6mo", provider=provider)
+    request = request_key("AAA", "6mo", "1d", "RSI", "MACD", "All", "All", None, frame_fingerprint(data))
+    return request, comparison, ranking, summary, data
+
+def test_put_get_round_trip(store, run):
+    request, comparison, ranking, summary, data = run
+
+    assert store.get(request) is None
+    assert store.put(request, comparison, ranking, summary, data)
+    stored = store.get(request)
+
+    assert stored["comparison"] == comparison
+    assert stored["ranking"] == ranking
+    assert stored["summary"] == summary
+    assert stored["bars"] == len(data)
+    assert pd.Timestamp(stored["start"]) == data.index[0]
+    assert pd.Timestamp(stored["end"]) == data.index[-1]
+    assert store.stats == {"hits": 1, "misses": 1, "runs_written": 1}
+
+    # The indexed rows carry the same numbers
+    rows = store.comparisons(ticker="aaa")
+    result = comparison["RSI_All vs MACD_All"]
+    assert len(rows) == 1
+    assert rows.loc[0, "p_value"] == result["p_value"] and rows.loc[0, "count1"] == result["rsi_count"]
+    assert len(store.summaries(ticker="AAA")) == len(summary)
+    assert store.comparisons(ticker="BBB").empty
+
+def test_changed_data_or_parameters_miss(store, run):
+    request, comparison, ranking, summary, data = run
+    store.put(request, comparison, ranking, summary, data)
+
+    assert store.get({**request, "data_hash": "other"}) is None
+    parameters = request_key("AAA", "6mo", "1d", "RSI", "MACD", "All", "All", {"RSI": {"window": 10}},
+                             request["data_hash"])
+    assert store.get(parameters) is None
+
+def test_duplicate_requests_are_not_written_again(store, run):
+    request, comparison, ranking, summary, data = run
+    record = store.record(request, comparison, ranking, summary, data)
+
+    # Duplicates within one batch and across batches
+    assert store.put_many([record, record]) == 1
+    assert store.put_many([record]) == 0
+    assert not store.put(request, comparison, ranking, summary, data)
+
+    assert len(store) == 1
+    assert len(store.comparisons()) == 1
+    assert len(store.summaries()) == len(summary)
+    assert store.stats["runs_written"] == 1
+
+def test_scan_ticker_answers_repeats_from_the_store(store, provider):
+    first = scan_ticker("AAA", provider=provider, store=store)
+    assert first["status"] == "ok" and first["stored"] is False
+    store.put_many([first.pop("record")])
+
+    second = scan_ticker("AAA", provider=provider, store=store)
+
+    assert second["stored"] is True and "record" not in second
+    assert store.stats["hits"] == 1
+    for name in ("comparison", "t_statistic", "p_value", "top_indicator", "bars", "start", "end"):
+        assert second[name] == first[name]
+
+def test_scan_universe_on_workers_writes_and_reads_the_store(store, provider):
+    tickers = ["AAA", "BBB", "CCC"]
+
+    first = scan_universe(tickers, provider=provider, max_workers=2, chunksize=1, store=store)
+    assert list(first["status"]) == ["ok"] * 3
+    assert not first["stored"].any()
+    assert len(store) == 3
+
+    second = scan_universe(tickers, provider=provider, max_workers=2, chunksize=1, store=store)
+    assert second["stored"].all()
+    assert len(store) == 3
+    pd.testing.assert_series_equal(second["p_value"], first["p_value"])
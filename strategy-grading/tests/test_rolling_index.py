@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+from utils.rolling_index import BLOCK_SIZE, RollingIndex
+
+WINDOWS = [2, 20, 250]
+
+def two_pass_std(values, window, ddof=1):
+    out = np.full(len(values), np.nan)
+    out[window - 1:] = sliding_window_view(values, window).std(axis=-1, ddof=ddof)
+    return out
+
+@pytest.fixture
+def close():
+    rng = np.random.default_rng(8)
+    # Longer than a block, so whole-series passes cross block boundaries
+    return 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, 2 * BLOCK_SIZE + 1000)))
+
+def test_rolling_statistics_match_pandas(close):
+    index = RollingIndex(close)
+    series = pd.Series(close)
+
+    means, stds = index.rolling_mean(WINDOWS), index.rolling_std(WINDOWS)
+
+    assert means.shape == stds.shape == (len(WINDOWS), len(close))
+    for row, window in enumerate(WINDOWS):
+        np.testing.assert_allclose(means[row], series.rolling(window).mean(), rtol=1e-12)
+        # pandas' online update loses digits on short windows; two-pass deviations are the exact reference
+        np.testing.assert_allclose(stds[row], series.rolling(window).std(), rtol=1e-8)
+        np.testing.assert_allclose(stds[row], two_pass_std(close, window), rtol=1e-13)
+    np.testing.assert_array_equal(index.rolling_mean(20), means[1])
+    np.testing.assert_allclose(index.rolling_std(20, ddof=0), two_pass_std(close, 20, ddof=0), rtol=1e-13)
+
+    upper, middle, lower = index.bollinger_bands(20, num_std=2)
+    np.testing.assert_array_equal(middle, means[1])
+    np.testing.assert_allclose(upper - lower, 4 * stds[1], rtol=1e-12)
+
+def test_point_queries_match_the_rolling_series(close):
+    index = RollingIndex(close)
+    ends = np.array([0, 18, 19, 500, len(close) - 1])
+
+    np.testing.assert_array_equal(index.mean(ends, 20), index.rolling_mean(20)[ends])
+    np.testing.assert_array_equal(index.std(ends, 20), index.rolling_std(20)[ends])
+    np.testing.assert_allclose(index.sum(ends, 20), pd.Series(close).rolling(20).sum()[ends], rtol=1e-12)
+    # Windows broadcast with the end points
+    np.testing.assert_array_equal(index.mean(500, np.array(WINDOWS)), index.rolling_mean(WINDOWS)[:, 500])
+    assert np.isnan(index.mean(len(close), 20))
+    with pytest.raises(ValueError):
+        index.mean(10, 0)
+
+def test_small_deviations_on_a_large_level():
+    rng = np.random.default_rng(3)
+    values = 1e6 + rng.normal(0, 1e-3, 5000)
+    index = RollingIndex(values)
+
+    stds = index.rolling_std(50)
+
+    np.testing.assert_allclose(stds, two_pass_std(values, 50), rtol=1e-8)
+
+def test_extend_equals_a_rebuild(close):
+    dates = pd.bdate_range("2000-01-03", periods=len(close))
+    split = BLOCK_SIZE + 123
+
+    extended = RollingIndex(close[:split], dates[:split])
+    extended.extend(close[split:split + 10], dates[split:split + 10]).extend(close[split + 10:], dates[split + 10:])
+
+    rebuilt = RollingIndex(close, dates)
+    np.testing.assert_array_equal(extended.state, rebuilt.state)
+    assert extended.index.equals(dates)
+    np.testing.assert_array_equal(extended.rolling_std(WINDOWS), rebuilt.rolling_std(WINDOWS))
+    np.testing.assert_array_equal(RollingIndex.from_state(rebuilt.state).rolling_mean(20), rebuilt.rolling_mean(20))
+    with pytest.raises(ValueError):
+        RollingIndex.from_state(rebuilt.state[:4])
+
+def test_windows_with_missing_values_are_nan(close):
+    close = close[:2000].copy()
+    close[[100, 1500]] = np.nan
+    close[700:705] = np.nan
+    index = RollingIndex(close)
+    series = pd.Series(close)
+
+    for window in WINDOWS:
+        expected_mean = series.rolling(window).mean()
+        mean, std = index.rolling_mean(window), index.rolling_std(window)
+        np.testing.assert_array_equal(np.isnan(mean), expected_mean.isna())
+        np.testing.assert_allclose(mean, expected_mean, rtol=1e-12)
+        np.testing.assert_allclose(std, series.rolling(window).std(), rtol=1e-8)
+    # Windows clear of the gaps recover
+    assert np.isnan(index.mean(100 + 19, 20)) and not np.isnan(index.mean(100 + 20, 20))
+    # One value has no sample deviation
+    assert np.isnan(index.rolling_std(1)).all()
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+from strategies.registry import bollinger_nodes, evaluate_nodes, macd_nodes
+from strategies.signal_kernels import bollinger_signal_kernel, macd_signal_kernel, rsi_signal_kernel
+from utils.indicator_kernels import rsi
+
+# Signal rules of the original strategy modules, row by row, on the same indicator values
+
+def baseline_rsi_signals(rsi_values, close):
+    data = pd.DataFrame({"Close": close, "RSI": rsi_values})
+    data["RSI_Signal"] = 0
+    rsi_25 = data["RSI"].quantile(0.25)
+    rsi_75 = data["RSI"].quantile(0.75)
+    data.loc[data["RSI"] < rsi_25, "RSI_Signal"] = 1
+    data.loc[data["RSI"] > rsi_75, "RSI_Signal"] = -1
+    if data["RSI_Signal"].sum() == 0 or (data["RSI_Signal"] == 1).sum() < 2 or (data["RSI_Signal"] == -1).sum() < 2:
+        data.loc[data["RSI"] < 35, "RSI_Signal"] = 1
+        data.loc[data["RSI"] > 65, "RSI_Signal"] = -1
+    if (data["RSI_Signal"] == 1).sum() < 2 or (data["RSI_Signal"] == -1).sum() < 2:
+        data["Price_Change"] = data["Close"].pct_change()
+        data.loc[data["Price_Change"] > 0.005, "RSI_Signal"] = 1
+        data.loc[data["Price_Change"] < -0.005, "RSI_Signal"] = -1
+    return data["RSI_Signal"].to_numpy()
+
+def baseline_macd_signals(macd_values, signal_values, close):
+    data = pd.DataFrame({"Close": close})
+    macd_line, signal_line = pd.Series(macd_values), pd.Series(signal_values)
+    data["MACD_Strategy_Signal"] = 0
+    for i in range(len(data)):
+        macd_val = macd_line.iloc[i]
+        signal_val = signal_line.iloc[i]
+        if not pd.isna(macd_val) and not pd.isna(signal_val):
+            if macd_val > signal_val:
+                data.iloc[i, data.columns.get_loc("MACD_Strategy_Signal")] = 1
+            elif macd_val < signal_val:
+                data.iloc[i, data.columns.get_loc("MACD_Strategy_Signal")] = -1
+    if data["MACD_Strategy_Signal"].sum() == 0:
+        data["Price_Change"] = data["Close"].pct_change()
+        data.loc[data["Price_Change"] > 0.005, "MACD_Strategy_Signal"] = 1
+        data.loc[data["Price_Change"] < -0.005, "MACD_Strategy_Signal"] = -1
+    return data["MACD_Strategy_Signal"].to_numpy()
+
+def baseline_bollinger_signals(close, lower_band, upper_band):
+    data = pd.DataFrame({"Close": close, "BB_Upper": upper_band, "BB_Lower": lower_band})
+    data["BB_Strategy_Signal"] = 0
+    data.loc[data["Close"] <= data["BB_Lower"], "BB_Strategy_Signal"] = 1
+    data.loc[data["Close"] >= data["BB_Upper"], "BB_Strategy_Signal"] = -1
+    if data["BB_Strategy_Signal"].sum() == 0:
+        data["Price_Change"] = data["Close"].pct_change()
+        data.loc[data["Price_Change"] > 0.005, "BB_Strategy_Signal"] = 1
+        data.loc[data["Price_Change"] < -0.005, "BB_Strategy_Signal"] = -1
+    return data["BB_Strategy_Signal"].to_numpy()
+
+@pytest.fixture(params=[0, 1, 2])
+def close(request):
+    rng = np.random.default_rng(request.param)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, 500)))
+    # Missing closes, including a run of them
+    close[rng.choice(np.arange(30, 500), 8, replace=False)] = np.nan
+    close[200:204] = np.nan
+    return close
+
+def test_rsi_kernel_matches_baseline(close):
+    values = rsi(close, 14)
+
+    np.testing.assert_array_equal(rsi_signal_kernel(values, close), baseline_rsi_signals(values, close))
+
+def test_macd_kernel_matches_baseline(close):
+    macd_line, signal_line, _ = evaluate_nodes(close, macd_nodes)
+
+    np.testing.assert_array_equal(macd_signal_kernel(macd_line, signal_line, close),
+                                  baseline_macd_signals(macd_line, signal_line, close))
+
+def test_bollinger_kernel_matches_baseline(close):
+    upper, _, lower = evaluate_nodes(close, bollinger_nodes)
+
+    np.testing.assert_array_equal(bollinger_signal_kernel(close, lower, upper),
+                                  baseline_bollinger_signals(close, lower, upper))
+
+def test_momentum_fallbacks_match_baseline(close):
+    # RSI without values: neither threshold rule gives two Buys and two Sells
+    flat = np.full_like(close, np.nan)
+    signals = rsi_signal_kernel(flat, close)
+    np.testing.assert_array_equal(signals, baseline_rsi_signals(flat, close))
+    assert (signals == 1).sum() > 0 and (signals == -1).sum() > 0
+
+    # RSI whose lowest third sits at the lower quantile, so only the fixed levels give Buys
+    levels = np.full_like(close, 50.0)
+    levels[::3], levels[[10, 20]] = 30.0, 70.0
+    signals = rsi_signal_kernel(levels, close)
+    np.testing.assert_array_equal(signals, baseline_rsi_signals(levels, close))
+    np.testing.assert_array_equal(signals, np.select([levels < 35, levels > 65], [1, -1], 0))
+
+    # MACD signals netting to zero fall back to momentum, like no signals at all
+    line = np.zeros_like(close)
+    alternating = np.where(np.arange(len(close)) % 2, 1.0, -1.0)
+    for signal_line in (line, alternating):
+        np.testing.assert_array_equal(macd_signal_kernel(line, signal_line, close),
+                                      baseline_macd_signals(line, signal_line, close))
+
+    # Bands that are never touched
+    np.testing.assert_array_equal(bollinger_signal_kernel(close, close - 1, close + 1),
+                                  baseline_bollinger_signals(close, close - 1, close + 1))
+
+def test_variant_rows_match_the_single_series_baseline(close):
+    variants = np.stack([rsi(close, window) for window in (5, 14, 30)] + [np.full_like(close, np.nan)])
+
+    signals = rsi_signal_kernel(variants, close)
+
+    for row, values in zip(signals, variants):
+        np.testing.assert_array_equal(row, baseline_rsi_signals(values, close))
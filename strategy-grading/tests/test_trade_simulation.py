@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from analysis.trade_simulation import positions_from_signals, simulate_batch, simulate_trades
+
+RETURNS = [np.nan, 0.01, 0.02, -0.01, 0.03, 0.02, -0.01, 0.0, 0.02, -0.01]
+SIGNALS = [0, 1, 0, 0, -1, 0, 0, 1, 0, 0]
+
+@pytest.fixture
+def data():
+    returns = np.array(RETURNS)
+    index = pd.bdate_range("2024-01-01", periods=len(returns))
+    close = 100 * np.cumprod(1 + np.nan_to_num(returns))
+    return pd.DataFrame({"Close": close, "Return": returns, "RSI_Signal": np.array(SIGNALS, dtype=np.int8)}, index=index)
+
+def test_positions_hold_the_last_signal():
+    np.testing.assert_array_equal(positions_from_signals(SIGNALS), [0, 1, 1, 1, -1, -1, -1, 1, 1, 1])
+    np.testing.assert_array_equal(positions_from_signals(SIGNALS, "long_only"), [0, 1, 1, 1, 0, 0, 0, 1, 1, 1])
+    with pytest.raises(ValueError):
+        positions_from_signals(SIGNALS, "short_only")
+
+def test_long_short_trades(data):
+    # Long 1 -> 4, short 4 -> 7 (a reversal at each), long from 7 still open at the end
+    result = simulate_trades(data, "RSI", commission=0.001, slippage=0.0005)
+    trades = result["trades"]
+
+    assert list(trades["entry_date"]) == list(data.index[[1, 4, 7]])
+    assert list(trades["exit_date"]) == list(data.index[[4, 7, 9]])
+    np.testing.assert_array_equal(trades["entry_price"], data["Close"].to_numpy()[[1, 4, 7]])
+    assert list(trades["direction"]) == [1, -1, 1]
+    assert list(trades["bars"]) == [3, 3, 2]
+    assert list(trades["closed"]) == [True, True, False]
+    # Each trade earns the returns of the bars after its entry, with the sign of its position
+    np.testing.assert_allclose(trades["gross_pnl"], [0.02 - 0.01 + 0.03, -0.02 + 0.01 + 0.0, 0.02 - 0.01])
+    # 15 bps per side; the open trade has paid its entry only
+    np.testing.assert_allclose(trades["cost"], [0.003, 0.003, 0.0015])
+    np.testing.assert_allclose(trades["net_pnl"], [0.037, -0.013, 0.0085])
+
+    bars = result["bars"]
+    np.testing.assert_allclose(bars["cost"], np.array([0, 1, 0, 0, 2, 0, 0, 2, 0, 0]) * 0.0015)
+    np.testing.assert_allclose(bars["net_pnl"].sum(), trades["net_pnl"].sum())
+
+    summary = result["summary"]
+    assert summary["trades"] == 3
+    assert summary["win_rate"] == pytest.approx(2 / 3)
+    assert summary["total_pnl"] == pytest.approx(0.0325)
+    assert summary["mean_trade"] == pytest.approx(0.0325 / 3)
+    # Peak 0.0355 after bar 4, trough 0.0155 after bar 5
+    assert summary["max_drawdown"] == pytest.approx(0.02)
+    assert summary["exposure"] == pytest.approx(0.9)
+
+def test_long_only_trades(data):
+    result = simulate_trades(data, "RSI_Signal", mode="long_only")
+    trades = result["trades"]
+
+    assert list(trades["entry_date"]) == list(data.index[[1, 7]])
+    assert list(trades["exit_date"]) == list(data.index[[4, 9]])
+    np.testing.assert_allclose(trades["gross_pnl"], [0.04, 0.01])
+    np.testing.assert_allclose(trades["cost"], 0.0)
+    assert result["summary"]["total_pnl"] == pytest.approx(0.05)
+    assert result["summary"]["max_drawdown"] == pytest.approx(0.01)
+
+def test_batch_matches_single_simulations():
+    rng = np.random.default_rng(4)
+    signals = rng.choice([-1, 0, 0, 0, 1], (5, 300)).astype(np.int8)
+    signals[3] = 0  # A series without trades
+    returns = rng.normal(0, 0.01, (5, 300))
+    index = pd.bdate_range("2024-01-01", periods=300)
+    commissions = np.array([0.0, 0.0005, 0.002])
+
+    batch = simulate_batch(signals, returns, commission=commissions, slippage=0.0001)
+
+    for row in range(len(signals)):
+        data = pd.DataFrame({"Close": 100.0, "Return": returns[row], "RSI_Signal": signals[row]}, index=index)
+        for i, commission in enumerate(commissions):
+            summary = simulate_trades(data, commission=commission, slippage=0.0001)["summary"]
+            assert batch["trades"][i, row] == summary["trades"]
+            for name in ("win_rate", "mean_trade", "total_pnl", "max_drawdown"):
+                np.testing.assert_allclose(batch[name][i, row], summary[name], rtol=1e-9, atol=1e-15)
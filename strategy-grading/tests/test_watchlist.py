@@ -0,0 +1,143 @@
+import pandas as pd
+import pytest
+from data import data_fetcher
+from data.price_store import PriceStore
+from data.providers import SyntheticProvider, period_start
+from main import CachedAnalysis
+from watchlist import WatchlistScheduler
+
+class Clock:
+    """Settable clock standing in for the market time"""
+
+    def __init__(self, now):
+        self.now = pd.Timestamp(now)
+
+    def __call__(self):
+        return self.now
+
+class RevisingProvider(SyntheticProvider):
+    """Synthetic provider that can revise the last close of a ticker"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.revisions = {}
+
+    def bars(self, ticker, interval="1d", end=None):
+        data = super().bars(ticker, interval, end=end)
+        if ticker in self.revisions:
+            data.iloc[-1, data.columns.get_loc("Close")] *= self.revisions[ticker]
+        return data
+
+@pytest.fixture(autouse=True)
+def no_price_store(monkeypatch):
+    # Every refresh goes to the provider, which follows the fake clock
+    monkeypatch.setenv("STRATEGY_GRADING_CACHE_DIR", "")
+    monkeypatch.setattr(data_fetcher, "_default_cache", None)
+
+@pytest.fixture
+def price_store(tmp_path, monkeypatch):
+    store = PriceStore(str(tmp_path / "prices"))
+    monkeypatch.setattr(data_fetcher, "_default_cache", store)
+    return store
+
+def scheduler(tickers, clock, provider=None, **kwargs):
+    provider = provider or SyntheticProvider(origin="2025-06-02", clock=clock)
+    return WatchlistScheduler(tickers, analysis=CachedAnalysis(provider=provider), provider=provider,
+                              run_at="16:30", clock=clock, retries=0, **kwargs)
+
+@pytest.mark.parametrize("now, expected", [
+    ("2026-10-14 09:00", "2026-10-14 16:30"),  # Wednesday morning: same day
+    ("2026-10-14 16:30", "2026-10-15 16:30"),  # Exactly at run_at: strictly after
+    ("2026-10-16 17:00", "2026-10-19 16:30"),  # Friday evening: Monday
+    ("2026-10-17 12:00", "2026-10-19 16:30"),  # Saturday
+    ("2026-10-18 23:59", "2026-10-19 16:30"),  # Sunday
+])
+def test_next_run_skips_weekends(now, expected):
+    schedule = scheduler(["AAA"], Clock(now))
+
+    assert schedule.next_run() == pd.Timestamp(expected)
+    assert schedule.due == pd.Timestamp(expected)
+
+def test_next_run_keeps_the_clock_timezone():
+    clock = Clock(pd.Timestamp("2026-10-17 10:00", tz="America/New_York"))
+
+    assert scheduler(["AAA"], clock).next_run() == pd.Timestamp("2026-10-19 16:30", tz="America/New_York")
+
+def test_run_pending_waits_for_run_at():
+    clock = Clock("2026-10-16 12:00")
+    schedule = scheduler(["AAA"], clock)
+
+    assert schedule.run_pending() is None
+    clock.now = pd.Timestamp("2026-10-16 16:45")
+    report = schedule.run_pending()
+
+    assert report["updated"] == ["AAA"]
+    assert schedule.due == pd.Timestamp("2026-10-19 16:30")
+    # Nothing more is due over the weekend
+    clock.now = pd.Timestamp("2026-10-17 16:45")
+    assert schedule.run_pending() is None
+
+def test_run_pending_recomputes_only_changed_tickers():
+    clock = Clock("2026-10-19 16:00")
+    provider = RevisingProvider(origin="2025-06-02", clock=clock)
+    schedule = scheduler(["AAA", "BBB"], clock, provider=provider, run_on_start=True)
+    frames = schedule.analysis.frames
+
+    first = schedule.run_pending()
+    assert first["updated"] == ["AAA", "BBB"]
+    assert first["unchanged"] == [] and first["failed"] == {}
+    assert frames.stats["misses"] == 2
+    assert schedule.due == pd.Timestamp("2026-10-19 16:30")
+
+    # The scheduled run after the close: only AAA's last bar was revised
+    provider.revisions["AAA"] = 1.01
+    clock.now = pd.Timestamp("2026-10-19 16:45")
+    second = schedule.run_pending()
+    assert second["updated"] == ["AAA"]
+    assert second["unchanged"] == ["BBB"]
+    assert frames.stats["misses"] == 3
+
+    # The next close brings a new bar for every ticker
+    clock.now = pd.Timestamp("2026-10-20 16:45")
+    assert schedule.run_pending()["updated"] == ["AAA", "BBB"]
+
+    # The primed frame answers the first request of the day
+    *_, status = schedule.analysis.run("AAA")
+    assert status == {"data": "hit", "frame": "hit"}
+
+def test_refresh_reports_failed_tickers():
+    clock = Clock("2026-10-16 16:45")
+    provider = SyntheticProvider(origin="2025-06-02", clock=clock, fail_tickers=["BAD"])
+    schedule = scheduler(["AAA", "BAD"], clock, provider=provider, run_on_start=True)
+
+    report = schedule.run_pending()
+
+    assert report["updated"] == ["AAA"]
+    assert list(report["failed"]) == ["BAD"]
+    assert "BAD" not in schedule.fingerprints
+
+@pytest.mark.parametrize("timezone", [None, "America/New_York"])
+def test_refresh_tops_up_the_price_store_at_the_clock_time(price_store, timezone):
+    # Far from the wall clock: periods and freshness must follow the scheduler's clock
+    clock = Clock(pd.Timestamp("2025-03-14 16:45", tz=timezone))
+    provider = SyntheticProvider(origin="2020-01-02", clock=clock)
+    schedule = scheduler(["AAA", "BBB"], clock, provider=provider, run_on_start=True)
+
+    first = schedule.run_pending()
+    assert first["updated"] == ["AAA", "BBB"] and first["failed"] == {}
+    assert provider.calls == 2
+    assert price_store.entry("AAA", "1d")["last_bar"] == pd.Timestamp("2025-03-14").isoformat()
+    assert schedule.analysis.frames.stats["misses"] == 2
+
+    # Monday's close: the stored history is topped up, not downloaded again
+    clock.now = pd.Timestamp("2025-03-17 16:45", tz=timezone)
+    second = schedule.run_pending()
+    assert second["updated"] == ["AAA", "BBB"]
+    assert provider.calls == 4
+    assert price_store.stats["appends"] == 2
+    assert price_store.entry("AAA", "1d")["last_bar"] == pd.Timestamp("2025-03-17").isoformat()
+
+    data = data_fetcher.fetch_data("AAA", "6mo", provider=provider, now=clock.now)
+    assert data.index[-1] == pd.Timestamp("2025-03-17")
+    assert data.attrs["analysis_start"] >= period_start("6mo", pd.Timestamp("2025-03-17"))
+    assert provider.calls == 4
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+# Indicator value columns and Buy/Sell/Hold (+1/-1/0) columns of the registered indicators
+from strategies.registry import INDICATOR_COLUMNS, SIGNAL_COLUMNS
+
+# Columns the comparison, summary and charts read; everything else is dropped
+KEEP_COLUMNS = ["Close", "Return"]
+
+# Relative error of a float32 indicator value against the float64 one (half
+# an ulp). Signals and statistics are computed before the downcast, so they
+# are the same as on the float64 path.
+FLOAT32_TOLERANCE = float(np.finfo(np.float32).eps) / 2
+
+def compact_frame(data: pd.DataFrame, keep: list = None) -> pd.DataFrame:
+    """
+    Shrink an indicator frame in place: int8 signals, float32 indicators, unused columns dropped
+
+    Close and Return stay float64 because the returns feed the t-tests
+    and prices can need more than float32's seven significant digits.
+    The frame's bytes per row before compacting are kept in
+    data.attrs["bytes_per_row_before"] for memory reports.
+
+    Args:
+        data: Frame from build_indicator_frame (modified in place)
+        keep: Extra columns to keep besides KEEP_COLUMNS, indicators and signals
+
+    Returns:
+        The same DataFrame
+    """
+    data.attrs.setdefault("bytes_per_row_before", bytes_per_row(data))
+    wanted = set(KEEP_COLUMNS + INDICATOR_COLUMNS + list(SIGNAL_COLUMNS.values()) + list(keep or []))
+    data.drop(columns=[column for column in data.columns if column not in wanted], inplace=True)
+    for column in INDICATOR_COLUMNS:
+        if column in data and data[column].dtype != np.float32:
+            data[column] = data[column].astype(np.float32)
+    for column in SIGNAL_COLUMNS.values():
+        if column in data and data[column].dtype != np.int8:
+            data[column] = data[column].astype(np.int8)
+    return data
+
+def bytes_per_row(data: pd.DataFrame) -> float:
+    """Memory of a frame, index included, divided by its number of rows"""
+    return data.memory_usage(index=True, deep=True).sum() / max(len(data), 1)
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-column dtypes and bytes per row of a frame before and after compacting
+
+    Args:
+        before: Full-precision frame
+        after: Compact frame
+
+    Returns:
+        DataFrame indexed by column (plus "Index" and "Total") with dtype and
+        bytes-per-row columns for both frames; dropped columns show 0 bytes after
+    """
+    rows = max(len(before), 1)
+    usage_before = before.memory_usage(index=True, deep=True) / rows
+    usage_after = after.memory_usage(index=True, deep=True) / max(len(after), 1)
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "bytes_before": usage_before,
+        "dtype_after": after.dtypes.astype(str).reindex(usage_before.index, fill_value="dropped"),
+        "bytes_after": usage_after.reindex(usage_before.index, fill_value=0.0),
+    }, index=usage_before.index)
+    report.loc["Index", ["dtype_before", "dtype_after"]] = str(before.index.dtype), str(after.index.dtype)
+    report.loc["Total"] = ["", usage_before.sum(), "", usage_after.sum()]
+    return report
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Most rows a chart is drawn from: a min/max pair per pixel column of a wide chart, for each line
+MAX_CHART_POINTS = 4000
+
+# Traces with more points than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 1000
+
+# Most Buy or Sell markers drawn per indicator; beyond that they are thinned to one per bucket
+MAX_MARKERS = 1000
+
+def minmax_positions(values: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    Positions of the first, last, lowest and highest value of every bucket (M4 decimation)
+
+    A line drawn through these points covers the same pixels as the line
+    through every point when each bucket is at most one pixel wide, so
+    spikes and gaps survive. The buckets are equal runs of consecutive
+    positions; NaN values are never a bucket's extreme, and an all-NaN
+    bucket keeps its first and last positions so the gap is still drawn.
+
+    Args:
+        values: 1-D array of values in x order
+        buckets: Number of buckets
+
+    Returns:
+        Sorted unique positions, at most 4 per bucket
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    buckets = max(1, min(buckets, n))
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = values
+    padded = padded.reshape(buckets, size)
+
+    starts = np.arange(buckets) * size
+    lowest = np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highest = np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    positions = np.concatenate([starts, np.minimum(starts + size, n) - 1, starts + lowest, starts + highest])
+    return np.unique(np.minimum(positions, n - 1))
+
+def decimate(frame: pd.DataFrame, columns: list, max_points: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    """
+    Rows of a frame to draw its columns as lines, at most max_points of them
+
+    Every column keeps its own bucket minima and maxima (see
+    minmax_positions), and all columns are drawn from the union of those
+    rows, so traces sharing an axis keep lining up in hover.
+
+    Args:
+        frame: Frame in x (time) order
+        columns: Columns that will be drawn
+        max_points: Most rows to keep
+
+    Returns:
+        The frame itself if it is short enough, else a subset of its rows
+    """
+    if len(frame) <= max_points:
+        return frame
+    # First and last rows of a bucket are shared; its extremes are not
+    buckets = max(1, max_points // (2 + 2 * len(columns)))
+    positions = np.unique(np.concatenate([minmax_positions(frame[column].to_numpy(dtype=np.float64), buckets)
+                                          for column in columns]))
+    return frame.iloc[positions]
+
+def signal_markers(frame: pd.DataFrame, signal_column: str, max_markers: int = MAX_MARKERS) -> dict:
+    """
+    Rows of a frame where a signal fires, thinned to at most max_markers per side
+
+    Markers are taken from the full-resolution frame, so they survive
+    the decimation of the lines and sit on the bar they belong to. When a
+    side has more markers than fit, the x range is split into
+    max_markers buckets and each keeps its first marker; one marker per
+    pixel column is all a chart can show anyway.
+
+    Args:
+        frame: Frame with the signal column (+1 Buy, -1 Sell)
+        signal_column: Name of the signal column
+        max_markers: Most markers to keep per side
+
+    Returns:
+        Dict of "Buy" and "Sell" -> rows of the frame
+    """
+    signals = frame[signal_column].to_numpy()
+    markers = {}
+    for side, value in (("Buy", 1), ("Sell", -1)):
+        positions = np.flatnonzero(signals == value)
+        if len(positions) > max_markers:
+            buckets = positions * max_markers // len(frame)
+            positions = positions[np.unique(buckets, return_index=True)[1]]
+        markers[side] = frame.iloc[positions]
+    return markers
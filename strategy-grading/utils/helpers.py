@@ -1,66 +1,177 @@
+import math
 import pandas as pd
 import numpy as np
+from utils.indicator_kernels import DEFAULT_CHUNK_SIZE
+from utils.result_cache import ArrayMemo
+from utils.tracing import traced
+
+# Indicator arrays by content of the close prices and the computations leading to
+# them, for the registry's compute graphs (and so the *_values functions below).
+# Configured by STRATEGY_GRADING_MEMO_BYTES and STRATEGY_GRADING_MEMO_DIR; see ArrayMemo.
+indicator_memo = ArrayMemo.from_environment()
+
+def get_close_prices(data: pd.DataFrame) -> pd.Series:
+    """
+    Get closing prices as a Series, handling multi-level columns from yfinance
+    
+    Args:
+        data: DataFrame with stock price data
+    
+    Returns:
+        Close prices as pandas Series
+    """
+    close_prices = data["Close"]
+    if isinstance(close_prices, pd.DataFrame):
+        close_prices = close_prices.iloc[:, 0]
+    return close_prices
 
 def moving_average(data: pd.DataFrame, window: int) -> pd.Series:
-    return data["Close"].rolling(window=window).mean()
+    return get_close_prices(data).rolling(window=window).mean()
+
+def indicator_warmup(rsi_window: int = 14, macd_slow: int = 26, macd_signal: int = 9, bb_window: int = 20,
+                     tolerance: float = 0.01) -> int:
+    """
+    Bars of history the indicators need before the first analysed bar
+    
+    Rolling windows need to be full; an EMA needs the weight it would give
+    to history it has not seen to drop below tolerance, and the MACD signal
+    line is an EMA of EMAs, so their warm-ups add up.
+    
+    Args:
+        rsi_window: RSI window
+        macd_slow: Slow MACD EMA span
+        macd_signal: MACD signal line EMA span
+        bb_window: Bollinger Band window
+        tolerance: Largest weight left on unseen history
+    
+    Returns:
+        Number of warm-up bars
+    """
+    return max(rsi_window + 1, bb_window, ema_warmup(macd_slow, tolerance) + ema_warmup(macd_signal, tolerance))
+
+def ema_warmup(span: float, tolerance: float = 0.01) -> int:
+    """Bars after which an EMA gives less than tolerance weight to history it has not seen"""
+    return math.ceil(math.log(tolerance) / math.log(1 - 2 / (span + 1)))
+
+def rsi_values(close: np.ndarray, window: int = 14, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """
+    RSI of a close price array, from the registry's RSI nodes (memoized in indicator_memo)
+    
+    Args:
+        close: 1-D array of closing prices
+        window: RSI calculation window
+        chunk_size: Bars per chunk (None for the whole series at once)
+    
+    Returns:
+        Read-only RSI array
+    """
+    from strategies.registry import evaluate_nodes, rsi_nodes
+    
+    (rsi,) = evaluate_nodes(close, rsi_nodes, chunk_size, window=window)
+    return rsi
+
+def macd_values(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple:
+    """
+    MACD of a close price array, from the registry's MACD nodes (memoized in indicator_memo)
+    
+    Args:
+        close: 1-D array of closing prices
+        fast: Fast EMA period
+        slow: Slow EMA period
+        signal: Signal line EMA period
+        chunk_size: Bars per chunk (None for the whole series at once)
+    
+    Returns:
+        Tuple of read-only (MACD line, Signal line, Histogram) arrays
+    """
+    from strategies.registry import evaluate_nodes, macd_nodes
+    
+    return evaluate_nodes(close, macd_nodes, chunk_size, fast=fast, slow=slow, signal=signal)
+
+def bollinger_values(close: np.ndarray, window: int = 20, num_std: float = 2,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple:
+    """
+    Bollinger Bands of a close price array, from the registry's Bollinger nodes (memoized in indicator_memo)
+    
+    Args:
+        close: 1-D array of closing prices
+        window: Moving average window
+        num_std: Number of standard deviations
+        chunk_size: Bars per chunk (None for the whole series at once)
+    
+    Returns:
+        Tuple of read-only (Upper Band, Middle Band, Lower Band) arrays
+    """
+    from strategies.registry import bollinger_nodes, evaluate_nodes
+    
+    return evaluate_nodes(close, bollinger_nodes, chunk_size, window=window, num_std=num_std)
 
-def calculate_rsi(data: pd.DataFrame, window: int = 14) -> pd.Series:
+@traced()
+def calculate_rsi(data: pd.DataFrame, window: int = 14, chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.Series:
     """
     Calculate RSI (Relative Strength Index)
     
+    Computed chunk by chunk with window bars of overlap; the result does
+    not depend on chunk_size. The values come from rsi_values (memoized);
+    the Series holds a copy, so callers may modify it.
+    
     Args:
         data: DataFrame with stock price data
         window: RSI calculation window (default 14)
+        chunk_size: Bars per chunk (None for the whole series at once)
     
     Returns:
         RSI values as pandas Series
     """
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    close_prices = get_close_prices(data)
+    rsi = rsi_values(close_prices.to_numpy(dtype=np.float64), window, chunk_size)
+    return pd.Series(rsi, index=close_prices.index, copy=True)
 
-def calculate_macd(data: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple:
+@traced()
+def calculate_macd(data: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple:
     """
     Calculate MACD (Moving Average Convergence Divergence)
     
+    The EMAs (pandas ewm(span=...).mean() semantics) are computed chunk by
+    chunk with their state carried over; the result does not depend on
+    chunk_size. The values come from macd_values (memoized); the Series
+    hold copies, so callers may modify them.
+    
     Args:
         data: DataFrame with stock price data
         fast: Fast EMA period (default 12)
         slow: Slow EMA period (default 26)
         signal: Signal line EMA period (default 9)
+        chunk_size: Bars per chunk (None for the whole series at once)
     
     Returns:
         Tuple of (MACD line, Signal line, Histogram)
     """
-    ema_fast = data['Close'].ewm(span=fast).mean()
-    ema_slow = data['Close'].ewm(span=slow).mean()
-    
-    macd_line = ema_fast - ema_slow
-    signal_line = macd_line.ewm(span=signal).mean()
-    histogram = macd_line - signal_line
-    
-    return macd_line, signal_line, histogram
+    close_prices = get_close_prices(data)
+    lines = macd_values(close_prices.to_numpy(dtype=np.float64), fast, slow, signal, chunk_size)
+    return tuple(pd.Series(line, index=close_prices.index, copy=True) for line in lines)
 
-def calculate_bollinger_bands(data: pd.DataFrame, window: int = 20, num_std: float = 2) -> tuple:
+@traced()
+def calculate_bollinger_bands(data: pd.DataFrame, window: int = 20, num_std: float = 2,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple:
     """
     Calculate Bollinger Bands
     
+    Computed chunk by chunk with window - 1 bars of overlap; the result
+    does not depend on chunk_size. The values come from bollinger_values
+    (memoized); the Series hold copies, so callers may modify them.
+    
     Args:
         data: DataFrame with stock price data
         window: Moving average window (default 20)
         num_std: Number of standard deviations (default 2)
+        chunk_size: Bars per chunk (None for the whole series at once)
     
     Returns:
         Tuple of (Upper Band, Middle Band, Lower Band)
     """
-    middle_band = data['Close'].rolling(window=window).mean()
-    std = data['Close'].rolling(window=window).std()
-    
-    upper_band = middle_band + (std * num_std)
-    lower_band = middle_band - (std * num_std)
-    
-    return upper_band, middle_band, lower_band
+    close_prices = get_close_prices(data)
+    bands = bollinger_values(close_prices.to_numpy(dtype=np.float64), window, num_std, chunk_size)
+    return tuple(pd.Series(band, index=close_prices.index, copy=True) for band in bands)
@@ -0,0 +1,283 @@
+from collections import deque
+import math
+import numpy as np
+import pandas as pd
+from utils.helpers import calculate_macd
+
+class EMAState:
+    """
+    Incremental exponential moving average
+
+    Matches pandas ewm(span=span, adjust=True).mean(), which calculate_macd
+    uses: the average is the decayed sum of prices divided by the decayed
+    sum of weights. Both sums are kept, so each update is O(1).
+
+    Args:
+        span: EMA span (alpha = 2 / (span + 1))
+    """
+
+    def __init__(self, span: int):
+        self.span = span
+        self.decay = 1 - 2 / (span + 1)
+        self.weighted_sum = 0.0
+        self.weight = 0.0
+        self.value = math.nan
+
+    def seed(self, values: np.ndarray) -> "EMAState":
+        """
+        Set the state from a history of values in one vectorized pass
+
+        Args:
+            values: Historical values, oldest first
+
+        Returns:
+            self
+        """
+        values = np.asarray(values, dtype=np.float64)
+        powers = self.decay ** np.arange(len(values) - 1, -1, -1, dtype=np.float64)
+        # NaNs still decay older weights (pandas ignore_na=False) but add nothing
+        valid = ~np.isnan(values)
+        self.weighted_sum = float(np.dot(np.where(valid, values, 0.0), powers))
+        self.weight = float(powers[valid].sum())
+        self.value = self.weighted_sum / self.weight if self.weight else math.nan
+        return self
+
+    def update(self, value: float) -> float:
+        """
+        Add one value
+
+        Args:
+            value: New value
+
+        Returns:
+            Updated EMA
+        """
+        self.weighted_sum *= self.decay
+        self.weight *= self.decay
+        if not math.isnan(value):
+            self.weighted_sum += value
+            self.weight += 1.0
+            self.value = self.weighted_sum / self.weight
+        return self.value
+
+class MACDState:
+    """
+    Incremental MACD matching calculate_macd
+
+    Args:
+        fast: Fast EMA period (default 12)
+        slow: Slow EMA period (default 26)
+        signal: Signal line EMA period (default 9)
+    """
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+
+    def seed(self, close: np.ndarray) -> "MACDState":
+        """
+        Set the state from historical closing prices
+
+        Args:
+            close: Historical closing prices, oldest first
+
+        Returns:
+            self
+        """
+        close = np.asarray(close, dtype=np.float64)
+        self.fast.seed(close)
+        self.slow.seed(close)
+        # The signal line needs the whole MACD history, so rebuild it once
+        macd_line, _, _ = calculate_macd(pd.DataFrame({"Close": close}), self.fast.span, self.slow.span, self.signal.span)
+        self.signal.seed(macd_line.to_numpy())
+        return self
+
+    def update(self, close: float) -> tuple:
+        """
+        Add one closing price
+
+        Args:
+            close: New closing price
+
+        Returns:
+            Tuple of (MACD line, Signal line, Histogram)
+        """
+        macd_value = self.fast.update(close) - self.slow.update(close)
+        signal_value = self.signal.update(macd_value)
+        return macd_value, signal_value, macd_value - signal_value
+
+class RollingWindow:
+    """
+    Fixed-size window keeping a running mean and sum of squared deviations
+
+    Values enter and leave with Welford-style updates. The sums are
+    rebuilt from the window contents once every window-size updates to
+    stop rounding drift, which keeps the amortized cost O(1).
+
+    Args:
+        window: Number of values in the window
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._updates = 0
+
+    def seed(self, values: np.ndarray) -> "RollingWindow":
+        """Fill the window with the last values of a history"""
+        self.values.clear()
+        self.values.extend(float(v) for v in np.asarray(values, dtype=np.float64)[-self.window:])
+        self._rebuild()
+        return self
+
+    def _rebuild(self):
+        n = len(self.values)
+        self.mean = math.fsum(self.values) / n if n else 0.0
+        self.m2 = math.fsum((v - self.mean) ** 2 for v in self.values)
+        self._updates = 0
+
+    def push(self, value: float):
+        """Add a value, dropping the oldest one if the window is full"""
+        if len(self.values) == self.window:
+            old = self.values[0]
+            self.values.append(value)
+            delta = value - old
+            old_mean = self.mean
+            self.mean += delta / self.window
+            self.m2 += delta * (value - self.mean + old - old_mean)
+        else:
+            self.values.append(value)
+            delta = value - self.mean
+            self.mean += delta / len(self.values)
+            self.m2 += delta * (value - self.mean)
+
+        self._updates += 1
+        if self._updates >= self.window:
+            self._rebuild()
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1) like pandas rolling std"""
+        if len(self.values) < 2:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (len(self.values) - 1))
+
+class RSIState:
+    """
+    Incremental RSI matching calculate_rsi (rolling-mean gains and losses)
+
+    Like calculate_rsi, the first bar counts as a zero gain and zero loss,
+    so the first RSI value appears after window bars.
+
+    Args:
+        window: RSI calculation window (default 14)
+    """
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.gains = RollingWindow(window)
+        self.losses = RollingWindow(window)
+        self.previous_close = math.nan
+        self.value = math.nan
+
+    def seed(self, close: np.ndarray) -> "RSIState":
+        """
+        Set the state from historical closing prices
+
+        Args:
+            close: Historical closing prices, oldest first
+
+        Returns:
+            self
+        """
+        close = np.asarray(close, dtype=np.float64)
+        if not len(close):
+            return self
+        tail = close[-(self.window + 1):]
+        delta = np.diff(tail)
+        if len(close) <= self.window:
+            # The first bar's missing change counts as zero
+            delta = np.concatenate([[0.0], delta])
+        self.gains.seed(np.where(delta > 0, delta, 0.0))
+        self.losses.seed(np.where(delta < 0, -delta, 0.0))
+        self.previous_close = float(close[-1])
+        self.value = self._rsi()
+        return self
+
+    def _rsi(self) -> float:
+        if not self.gains.full:
+            return math.nan
+        gain, loss = self.gains.mean, self.losses.mean
+        if loss == 0:
+            return 100.0 if gain > 0 else math.nan
+        return 100 - 100 / (1 + gain / loss)
+
+    def update(self, close: float) -> float:
+        """
+        Add one closing price
+
+        Args:
+            close: New closing price
+
+        Returns:
+            Updated RSI (NaN during warm-up)
+        """
+        delta = 0.0 if math.isnan(self.previous_close) else close - self.previous_close
+        self.previous_close = close
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+        self.value = self._rsi()
+        return self.value
+
+class BollingerState:
+    """
+    Incremental Bollinger Bands matching calculate_bollinger_bands
+
+    Args:
+        window: Moving average window (default 20)
+        num_std: Number of standard deviations (default 2)
+    """
+
+    def __init__(self, window: int = 20, num_std: float = 2):
+        self.num_std = num_std
+        self.prices = RollingWindow(window)
+
+    def seed(self, close: np.ndarray) -> "BollingerState":
+        """
+        Set the state from historical closing prices
+
+        Args:
+            close: Historical closing prices, oldest first
+
+        Returns:
+            self
+        """
+        self.prices.seed(close)
+        return self
+
+    def bands(self) -> tuple:
+        """Current (Upper Band, Middle Band, Lower Band), NaN during warm-up"""
+        if not self.prices.full:
+            return math.nan, math.nan, math.nan
+        middle = self.prices.mean
+        width = self.prices.std() * self.num_std
+        return middle + width, middle, middle - width
+
+    def update(self, close: float) -> tuple:
+        """
+        Add one closing price
+
+        Args:
+            close: New closing price
+
+        Returns:
+            Tuple of (Upper Band, Middle Band, Lower Band)
+        """
+        self.prices.push(close)
+        return self.bands()
@@ -0,0 +1,284 @@
+import functools
+import math
+import numpy as np
+
+# Chunk boundaries are rounded to this many bars so the blocked EMA scan
+# splits a chunked series exactly where it splits the whole series
+CHUNK_ALIGNMENT = 4096
+
+# Default bars per chunk; small enough for the temporaries to stay in cache
+DEFAULT_CHUNK_SIZE = 8 * CHUNK_ALIGNMENT
+
+def chunk_bounds(n: int, chunk_size: int = None) -> list:
+    """
+    Start and end positions of the chunks covering n bars
+
+    Args:
+        n: Number of bars
+        chunk_size: Bars per chunk, rounded up to a multiple of CHUNK_ALIGNMENT
+            (None for a single chunk)
+
+    Returns:
+        List of (start, end) tuples
+    """
+    if chunk_size is None or chunk_size >= n:
+        return [(0, n)]
+    chunk_size = -(-max(chunk_size, 1) // CHUNK_ALIGNMENT) * CHUNK_ALIGNMENT
+    return [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum over a trailing window along the last axis
+
+    Every window is summed from its own values in a fixed order, so a
+    result depends only on the window's bars and not on where the array
+    starts; a chunk with window - 1 bars of context reproduces the
+    whole-series values exactly.
+
+    Args:
+        values: 1-D or 2-D array (rows are independent series)
+        window: Window length
+
+    Returns:
+        Float array with the same shape, NaN during the first window - 1 bars
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[-1]
+    out = np.full(values.shape, np.nan)
+    if n >= window:
+        total = values[..., window - 1:].copy()
+        for lag in range(1, window):
+            total += values[..., window - 1 - lag:n - lag]
+        out[..., window - 1:] = total
+    return out
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window mean along the last axis (NaN during warm-up, like pandas rolling().mean())"""
+    total = rolling_sum(values, window)
+    total /= window
+    return total
+
+def rolling_std(values: np.ndarray, window: int, mean: np.ndarray = None) -> np.ndarray:
+    """
+    Trailing window sample standard deviation (ddof=1) along the last axis
+
+    Deviations are taken from each window's own mean (two passes), which is
+    exact for constant windows and independent of earlier bars.
+
+    Args:
+        values: 1-D or 2-D array (rows are independent series)
+        window: Window length
+        mean: rolling_mean(values, window) if already computed
+
+    Returns:
+        Float array with the same shape, NaN during the first window - 1 bars
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[-1]
+    out = np.full(values.shape, np.nan)
+    if n >= window > 1:
+        if mean is None:
+            mean = rolling_sum(values, window)[..., window - 1:] / window
+        else:
+            mean = np.asarray(mean, dtype=np.float64)[..., window - 1:]
+        squares = np.zeros_like(mean)
+        deviation = np.empty_like(mean)
+        for lag in range(window):
+            np.subtract(values[..., window - 1 - lag:n - lag], mean, out=deviation)
+            deviation *= deviation
+            squares += deviation
+        squares /= window - 1
+        np.sqrt(squares, out=out[..., window - 1:])
+    return out
+
+def _scan_block(decay: float, limit: int) -> int:
+    # Largest power of two block (up to limit) whose decay factors stay within float64 range
+    if decay <= 0:
+        return 1
+    size = max(1, min(limit, int(250 / -math.log10(decay)) + 1 if decay < 1 else limit))
+    return 1 << (size.bit_length() - 1)
+
+def _decayed_cumsum(values: np.ndarray, decay: float, carry: np.ndarray) -> tuple:
+    # y[t] = values[t] + decay * y[t - 1] along the last axis, starting from carry.
+    # Two vectorized levels (blocks, then blocks of blocks, each a scaled
+    # cumsum) and a sequential loop over superblocks; the superblocks start
+    # at position 0 of values, so chunks that start on a CHUNK_ALIGNMENT
+    # boundary go through exactly the same operations as the whole series.
+    lead, n = values.shape[:-1], values.shape[-1]
+    if decay == 0 or not n:
+        return values.copy(), values[..., -1].copy() if n else carry
+    inner = _scan_block(decay, 64)
+    outer_decay = decay ** inner
+    outer = _scan_block(outer_decay, CHUNK_ALIGNMENT // inner)
+    size = inner * outer
+    blocks = -(-n // size)
+    if blocks == 1:
+        # A lone partial superblock only needs its own blocks: the leading blocks
+        # of a padded superblock go through exactly the same operations
+        outer = -(-n // inner)
+    steps = np.arange(inner)
+    outer_steps = np.arange(outer)
+
+    # Within each block: scaled cumsum; padding past the end does not affect earlier bars
+    if n % (inner * outer):
+        local = np.zeros(lead + (blocks * inner * outer,))
+        local[..., :n] = values
+        local = local.reshape(lead + (blocks, outer, inner))
+        local *= decay ** -steps
+    else:
+        local = values.reshape(lead + (blocks, outer, inner)) * decay ** -steps
+    np.cumsum(local, axis=-1, out=local)
+    local *= decay ** steps
+    # Across the blocks of a superblock: the same scan on the block-end values
+    ends = np.cumsum(local[..., -1] * outer_decay ** -outer_steps, axis=-1) * outer_decay ** outer_steps
+    before = np.zeros_like(ends)
+    before[..., 1:] = ends[..., :-1]
+
+    superblock_decay = decay ** size
+    carries = np.empty(lead + (blocks,))
+    for block in range(blocks):
+        carries[..., block] = carry
+        carry = superblock_decay * carry + ends[..., block, -1]
+
+    incoming = before + carries[..., None] * outer_decay ** outer_steps
+    local += incoming[..., None] * decay ** (steps + 1)
+    result = local.reshape(lead + (blocks * inner * outer,))[..., :n]
+    # After a whole number of superblocks the loop's carry is what the next
+    # superblock of a whole-series run would start from
+    if n % size:
+        carry = result[..., -1].copy()
+    return result, carry
+
+def _ema_weights(decay: float, bars: int) -> np.ndarray:
+    # Running sum of the EMA weights by bar position for the first bars, or up to where it stops changing
+    length = CHUNK_ALIGNMENT if decay == 0 else int(math.log(np.finfo(np.float64).eps) / math.log(decay)) + CHUNK_ALIGNMENT
+    length = -(-length // CHUNK_ALIGNMENT) * CHUNK_ALIGNMENT
+    # Power-of-two lengths keep short series from building (and caching) the whole table
+    return _weight_table(decay, min(length, 1 << max(bars - 1, 0).bit_length()))
+
+@functools.lru_cache(maxsize=64)
+def _weight_table(decay: float, length: int) -> np.ndarray:
+    weights, _ = _decayed_cumsum(np.ones(length), decay, 0.0)
+    weights.flags.writeable = False
+    return weights
+
+def ema(values: np.ndarray, span: float, state: tuple = None, missing: bool = False) -> tuple:
+    """
+    Exponential moving average matching pandas ewm(span=span).mean() (adjust=True)
+
+    The running weighted sum is carried in state, so a long series can be
+    processed chunk by chunk; chunks starting on a CHUNK_ALIGNMENT boundary
+    give exactly the whole-series result.
+
+    NaN values are skipped like pandas (ignore_na=False) and
+    utils.incremental.EMAState: they decay the weights of earlier values
+    but add nothing, and the average carries on through them. Once a NaN
+    is met the weight sums are accumulated alongside the values instead of
+    read from a table by position. Start with missing=True (as
+    chunked_ema does when the series has NaN anywhere) for chunks to match
+    the whole series exactly; a NaN first met in a later chunk continues
+    from the positional weights, which can differ in the last bit.
+
+    Args:
+        values: 1-D or 2-D array (rows are independent series)
+        span: EMA span
+        state: State returned for the previous chunk (None at the start)
+        missing: Accumulate weight sums from the start, for series known to contain NaN
+
+    Returns:
+        Tuple of (EMA array with the same shape as values, state for the next chunk)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    decay = 1 - 2 / (span + 1)
+    n = values.shape[-1]
+    nan = np.isnan(values)
+    if state is None:
+        state = (np.zeros(values.shape[:-1]), 0, np.zeros(values.shape[:-1]) if missing or nan.any() else None)
+    carry, seen, weight = state
+    if weight is None and not nan.any():
+        weighted, carry = _decayed_cumsum(values, decay, carry)
+        # The weight sum depends only on the bar's position in the whole series;
+        # past the table it has converged to 1 / (1 - decay)
+        table = _ema_weights(decay, seen + n)
+        head = table[seen:seen + n]
+        weighted[..., :len(head)] /= head
+        weighted[..., len(head):] /= table[-1]
+        return weighted, (carry, seen + n, None)
+
+    if weight is None:
+        # First NaN after NaN-free chunks: continue from the weight sum of the last bar
+        table = _ema_weights(decay, seen)
+        weight = np.full(values.shape[:-1], table[min(seen, len(table)) - 1] if seen else 0.0)
+    weighted, carry = _decayed_cumsum(np.where(nan, 0.0, values), decay, carry)
+    weights, weight = _decayed_cumsum((~nan).astype(np.float64), decay, weight)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weighted /= weights
+    return weighted, (carry, seen + n, weight)
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """
+    RSI from rolling mean gains and losses (needs window bars of context per chunk)
+
+    Args:
+        close: 1-D or 2-D array of closing prices
+        window: RSI window
+
+    Returns:
+        RSI array with the same shape as close
+    """
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.diff(close, prepend=np.nan)
+    gain = rolling_mean(np.where(delta > 0, delta, 0.0), window)
+    loss = rolling_mean(np.where(delta < 0, -delta, 0.0), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - (100 / (1 + gain / loss))
+
+def chunked(func, close: np.ndarray, lookback: int, chunk_size: int = None, outputs: int = 1, extra: tuple = ()):
+    """
+    Run a windowed indicator kernel chunk by chunk
+
+    Each chunk is computed with lookback extra bars in front of it and
+    only its own bars are kept, so the result equals func(close) exactly
+    while temporaries stay proportional to the chunk size.
+
+    Args:
+        func: Kernel taking a close array and returning one array or a tuple of arrays
+        close: 1-D array of closing prices
+        lookback: Bars of context the kernel needs before each chunk
+        chunk_size: Bars per chunk (None for one chunk)
+        outputs: Number of arrays func returns
+        extra: Further arrays aligned with close, sliced the same way and
+            passed to func after it
+
+    Returns:
+        Array, or tuple of arrays, with the same length as close
+    """
+    close = np.asarray(close, dtype=np.float64)
+    bounds = chunk_bounds(len(close), chunk_size)
+    if len(bounds) == 1:
+        return func(close, *extra)
+    results = [np.empty(len(close)) for _ in range(outputs)]
+    for start, end in bounds:
+        context = max(0, start - lookback)
+        values = func(close[context:end], *(array[context:end] for array in extra))
+        for out, part in zip(results, values if outputs > 1 else (values,)):
+            out[start:end] = part[start - context:]
+    return tuple(results) if outputs > 1 else results[0]
+
+def chunked_ema(values: np.ndarray, span: float, chunk_size: int = None) -> np.ndarray:
+    """
+    EMA computed chunk by chunk with its state carried across chunks
+
+    Returns:
+        Array equal to ema(values, span)[0]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    bounds = chunk_bounds(len(values), chunk_size)
+    missing = bool(np.isnan(values).any())
+    if len(bounds) == 1:
+        return ema(values, span, missing=missing)[0]
+    result = np.empty(values.shape[-1])
+    state = None
+    for start, end in bounds:
+        result[start:end], state = ema(values[start:end], span, state, missing)
+    return result
@@ -0,0 +1,347 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Default in-memory budget of an ArrayMemo
+DEFAULT_MEMO_BYTES = 128 * 2**20
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with optional expiry and least-recently-used eviction
+
+    Args:
+        ttl: Seconds an entry stays valid (None for no expiry)
+        max_entries: Number of entries kept before the least recently used is dropped
+        clock: Callable returning the current time in seconds
+    """
+
+    def __init__(self, ttl: float = None, max_entries: int = 128, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    @property
+    def stats(self) -> dict:
+        """Snapshot of cache counters and the current number of entries"""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+    def get(self, key, default=None):
+        """
+        Look up a key, counting a hit or a miss
+
+        Args:
+            key: Hashable key
+            default: Value returned on a miss
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and self.clock() - entry[1] > self.ttl:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries beyond max_entries"""
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_or_compute(self, key, compute) -> tuple:
+        """
+        Return the cached value for key, computing and storing it on a miss
+
+        The lock is not held while computing, so two threads missing on the
+        same key at once may both compute it.
+
+        Args:
+            key: Hashable key
+            compute: Callable with no arguments producing the value
+
+        Returns:
+            Tuple of (value, True if it came from the cache)
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value, True
+        value = compute()
+        self.put(key, value)
+        return value, False
+
+    def invalidate(self, key=None):
+        """Drop one key, or every entry if key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+def frame_fingerprint(data: pd.DataFrame) -> str:
+    """
+    Content hash of a DataFrame (values, index and column names)
+
+    Args:
+        data: DataFrame to hash
+
+    Returns:
+        Hex digest that changes whenever any value, timestamp or column changes
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    digest.update(repr(list(data.columns)).encode())
+    return digest.hexdigest()
+
+def array_digest(array: np.ndarray) -> str:
+    """
+    Content hash of a NumPy array (dtype, shape and values)
+
+    SHA-1 is used for speed, not security: it runs at several GB/s
+    with the CPU's hash instructions, a few percent of the cost of an
+    indicator over the same array.
+
+    Args:
+        array: Array to hash
+
+    Returns:
+        Hex digest that changes whenever any value changes
+    """
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha1(f"{array.dtype.str}{array.shape}".encode(), usedforsecurity=False)
+    digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+def _read_only(arrays: tuple) -> tuple:
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+class ArrayMemo:
+    """
+    Thread-safe memo of array results, evicting the least recently used beyond a byte budget
+
+    Values are tuples of NumPy arrays, keyed by memo_key (a content hash
+    of the input array plus the parameters), so the same prices give a
+    hit whichever frame or index they come in. Cached arrays are made
+    read-only, so a caller writing into a result gets an error rather
+    than corrupting what the next caller receives; copy a result to
+    modify it.
+
+    With a directory, results also go to an on-disk tier of .npy files
+    (one per key, outputs stacked, so they must share a shape), which
+    outlives the process and is shared between processes. A memory miss
+    that finds the file memory-maps it. The directory is trimmed to
+    max_disk_bytes, least recently used files first.
+
+    Args:
+        max_bytes: Bytes of arrays held in memory (0 disables the memo)
+        directory: Directory for the on-disk tier (None for memory only)
+        max_disk_bytes: Bytes of files kept in the directory
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMO_BYTES, directory: str = None, max_disk_bytes: int = 2**30):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_environment(cls) -> "ArrayMemo":
+        """
+        Memo configured by STRATEGY_GRADING_MEMO_BYTES (in-memory budget, 0 disables it)
+        and STRATEGY_GRADING_MEMO_DIR (on-disk tier, off unless set)
+
+        Returns:
+            ArrayMemo
+        """
+        return cls(max_bytes=int(os.environ.get("STRATEGY_GRADING_MEMO_BYTES", DEFAULT_MEMO_BYTES)),
+                   directory=os.environ.get("STRATEGY_GRADING_MEMO_DIR") or None)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether results are kept at all"""
+        return self.max_bytes > 0 or bool(self.directory)
+
+    @property
+    def stats(self) -> dict:
+        """Snapshot of memo counters, the current number of entries and their bytes"""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+    @staticmethod
+    def memo_key(name: str, array: np.ndarray, **parameters) -> str:
+        """
+        Key of a function applied to an array with parameters
+
+        Args:
+            name: Name of the function
+            array: Its input array
+            **parameters: Parameters that change its result
+
+        Returns:
+            Hex key
+        """
+        digest = hashlib.sha1(f"{name}{sorted(parameters.items())}".encode(), usedforsecurity=False)
+        digest.update(array_digest(array).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """
+        Look up a key in memory, then on disk, counting a hit or a miss
+
+        Args:
+            key: Key from memo_key
+
+        Returns:
+            Tuple of read-only arrays, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry
+        arrays = self._read(key)
+        with self._lock:
+            if arrays is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._insert(key, arrays)
+        return arrays
+
+    def put(self, key: str, arrays: tuple) -> tuple:
+        """
+        Store a result, evicting the least recently used entries beyond max_bytes
+
+        The arrays are made read-only in place.
+
+        Args:
+            key: Key from memo_key
+            arrays: Tuple of arrays
+
+        Returns:
+            The arrays
+        """
+        arrays = _read_only(tuple(arrays))
+        with self._lock:
+            self._insert(key, arrays)
+        if self.directory:
+            self._write(key, arrays)
+        return arrays
+
+    def get_or_compute(self, key: str, compute) -> tuple:
+        """
+        Return the memoized result for key, computing and storing it on a miss
+
+        The lock is not held while computing, so two threads missing on the
+        same key at once may both compute it.
+
+        Args:
+            key: Key from memo_key
+            compute: Callable with no arguments returning a tuple of arrays
+
+        Returns:
+            Tuple of (tuple of read-only arrays, True if it came from the memo)
+        """
+        if not self.enabled:
+            return tuple(compute()), False
+        arrays = self.get(key)
+        if arrays is not None:
+            return arrays, True
+        return self.put(key, compute()), False
+
+    def clear(self, disk: bool = False):
+        """Drop every entry in memory, and the on-disk tier's files if disk is True"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if disk and self.directory:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".npy"):
+                    os.remove(entry.path)
+
+    def _insert(self, key, arrays):
+        # Caller holds the lock
+        size = sum(array.nbytes for array in arrays)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= sum(array.nbytes for array in previous)
+        self._entries[key] = arrays
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= sum(array.nbytes for array in evicted)
+            self._stats["evictions"] += 1
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        path = os.path.join(self.directory, f"{key}.npy")
+        try:
+            stacked = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return tuple(stacked)
+
+    def _write(self, key, arrays):
+        path = os.path.join(self.directory, f"{key}.npy")
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                np.save(file, np.stack(arrays))
+            os.replace(temporary, path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        # Remove the least recently used files until the tier fits its budget
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npy"):
+                try:
+                    status = entry.stat()
+                except OSError:
+                    continue
+                files.append((status.st_mtime, status.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self._stats["disk_evictions"] += 1
@@ -0,0 +1,279 @@
+import numpy as np
+import pandas as pd
+
+# Rows of RollingIndex.state
+SUM, SUM_ERROR, SQUARES, SQUARES_ERROR, MISSING = range(5)
+
+# Bars per block of a whole-series pass, small enough for the temporaries to stay in cache
+BLOCK_SIZE = 16384
+
+def two_sum(a, b) -> tuple:
+    """Rounded sum of a and b and its exact rounding error (Knuth's TwoSum)"""
+    s = a + b
+    v = s - a
+    return s, (a - (s - v)) + (b - v)
+
+def two_product(a, b) -> tuple:
+    """Rounded product of a and b and its exact rounding error (Dekker's TwoProduct)"""
+    p = a * b
+    a_high, a_low = _split(a)
+    b_high, b_low = _split(b)
+    return p, ((a_high * b_high - p) + a_high * b_low + a_low * b_high) + a_low * b_low
+
+def _split(a):
+    # High 26 bits and the rest of a float64, so that products of halves are exact
+    c = 134217729.0 * a
+    high = c - (c - a)
+    return high, a - high
+
+def compensated_cumsum(values: np.ndarray, carry: tuple = (0.0, 0.0), low: np.ndarray = None) -> tuple:
+    """
+    Prefix sums with the rounding error of every addition kept alongside
+
+    The sums are a plain sequential np.cumsum. Each of its additions is
+    repeated with TwoSum to recover the exact amount it rounded away, and
+    those errors are summed in a second cumsum; total + error then equals
+    the exact prefix sum up to n * eps² relative error, so differences of
+    distant prefixes keep close to full double precision.
+
+    Args:
+        values: 1-D float array
+        carry: (total, error) of the values before these, to continue a prefix
+        low: Low-order parts of the values (e.g. TwoProduct errors), added to the errors
+
+    Returns:
+        Tuple of (totals, errors), each with one value per input value
+    """
+    if not len(values):
+        return np.zeros(0), np.zeros(0)
+    totals = np.cumsum(np.concatenate([[carry[0]], values]))
+    previous = totals[:-1]
+    totals = totals[1:]
+    # totals[i] is exactly fl(previous[i] + values[i]), so this is TwoSum's error term
+    v = totals - previous
+    errors = (previous - (totals - v)) + (values - v)
+    if low is not None:
+        errors += low
+    errors[0] += carry[1]
+    return totals, np.cumsum(errors)
+
+def _prefix_state(values: np.ndarray, carry: np.ndarray = None) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    carry = np.zeros(5) if carry is None else carry
+    missing = ~np.isfinite(values)
+    values = np.where(missing, 0.0, values)
+    squares, square_errors = two_product(values, values)
+    state = np.empty((5, len(values)))
+    state[SUM], state[SUM_ERROR] = compensated_cumsum(values, (carry[SUM], carry[SUM_ERROR]))
+    state[SQUARES], state[SQUARES_ERROR] = compensated_cumsum(squares, (carry[SQUARES], carry[SQUARES_ERROR]),
+                                                              low=square_errors)
+    state[MISSING] = carry[MISSING] + np.cumsum(missing)
+    return state
+
+class RollingIndex:
+    """
+    Prefix sums of a series that answer rolling means and deviations of any window
+
+    The index holds, for every bar, the sum and the sum of squares of the
+    values up to it, each as a total plus its accumulated rounding error
+    (see compensated_cumsum), and the count of missing values. A window's
+    sum is then the difference of two prefixes, so the mean and standard
+    deviation of any window ending at any bar take a constant number of
+    operations, and a whole rolling series is one vectorized pass per
+    window whatever its length. The variance is formed in double-double
+    arithmetic from the compensated sums, which avoids the cancellation of
+    the textbook sum-of-squares formula: results are within an ulp or
+    two of exact for ordinary windows, and only deviations below about
+    1e-10 of the price level lose relative precision. They are not
+    bit-identical to the fixed-order kernels of utils.indicator_kernels,
+    so the strategies and parameter sweeps keep using those.
+
+    Windows that contain a missing (NaN) value or reach before the first
+    bar give NaN, like pandas rolling with min_periods=window.
+
+    Args:
+        values: 1-D array of values, e.g. close prices
+        index: Labels of the values (e.g. bar timestamps), kept as .index
+    """
+
+    def __init__(self, values: np.ndarray, index: pd.Index = None):
+        values = np.asarray(values, dtype=np.float64)
+        self.state = np.concatenate([np.zeros((5, 1)), _prefix_state(values)], axis=1)
+        self.index = index
+
+    @classmethod
+    def from_state(cls, state: np.ndarray, index: pd.Index = None) -> "RollingIndex":
+        """
+        Wrap a stored state array (e.g. a memory map) without recomputing it
+
+        Args:
+            state: Array of shape (5, bars + 1) from RollingIndex.state
+            index: Labels of the values
+
+        Returns:
+            RollingIndex
+        """
+        if state.ndim != 2 or state.shape[0] != 5 or state.shape[1] < 1:
+            raise ValueError(f"Rolling index state must have shape (5, bars + 1), not {state.shape}")
+        rolling_index = cls.__new__(cls)
+        rolling_index.state = state
+        rolling_index.index = index
+        return rolling_index
+
+    def __len__(self) -> int:
+        return self.state.shape[1] - 1
+
+    def extend(self, values: np.ndarray, index: pd.Index = None) -> "RollingIndex":
+        """
+        Append new bars; the prefixes continue from the last one, exactly as a rebuild would
+
+        Args:
+            values: Values of the new bars
+            index: Labels of the new bars, appended to .index
+
+        Returns:
+            self
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.state = np.concatenate([self.state, _prefix_state(values, self.state[:, -1])], axis=1)
+        if self.index is not None and index is not None:
+            self.index = self.index.append(index)
+        return self
+
+    def _window_sums(self, end, window) -> tuple:
+        # Prefix columns at the stop and start of the windows of `window` bars ending at `end`
+        end, window = np.broadcast_arrays(np.asarray(end), np.asarray(window))
+        if np.any(window < 1):
+            raise ValueError("Windows must have at least one bar")
+        stop = end + 1
+        start = stop - window
+        incomplete = (start < 0) | (stop > len(self))
+        stop = np.clip(stop, 0, len(self))
+        start = np.clip(start, 0, len(self))
+        return self.state[:, stop], self.state[:, start], window, incomplete
+
+    def _statistic(self, stop: np.ndarray, start: np.ndarray, window, kind: str, ddof: int = 1) -> np.ndarray:
+        # Sum, mean or standard deviation of windows given the prefix columns at both ends
+        total, error = two_sum(stop[SUM], -start[SUM])
+        sum_high, sum_low = two_sum(total, error + (stop[SUM_ERROR] - start[SUM_ERROR]))
+        invalid = stop[MISSING] != start[MISSING]
+        window = np.asarray(window, dtype=np.float64)
+        if kind == "sum":
+            result = sum_high + sum_low
+        elif kind == "mean":
+            result = (sum_high + sum_low) / window
+        else:
+            # Squared deviations = sum of squares - sum² / window, in double-double
+            total, error = two_sum(stop[SQUARES], -start[SQUARES])
+            squares_low = error + (stop[SQUARES_ERROR] - start[SQUARES_ERROR])
+            square, square_error = two_product(sum_high, sum_high)
+            square_error += 2 * sum_high * sum_low
+            quotient = square / window
+            product, product_error = two_product(quotient, window)
+            remainder = ((square - product) - product_error + square_error) / window
+            high, low = two_sum(total, -quotient)
+            deviations = high + (low + (squares_low - remainder))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result = np.sqrt(np.maximum(deviations, 0.0) / (window - ddof))
+            invalid |= window <= ddof
+        return np.where(invalid, np.nan, result)
+
+    def sum(self, end, window) -> np.ndarray:
+        """
+        Sum of the window of bars ending at end (inclusive)
+
+        Args:
+            end: Bar position of the last value in the window; int or array
+            window: Bars in the window; int or array broadcastable with end
+
+        Returns:
+            float or array of sums (NaN where the window is incomplete)
+        """
+        stop, start, window, incomplete = self._window_sums(end, window)
+        return np.where(incomplete, np.nan, self._statistic(stop, start, window, "sum"))[()]
+
+    def mean(self, end, window) -> np.ndarray:
+        """
+        Mean of the window of bars ending at end (inclusive)
+
+        Args:
+            end: Bar position of the last value in the window; int or array
+            window: Bars in the window; int or array broadcastable with end
+
+        Returns:
+            float or array of means (NaN where the window is incomplete)
+        """
+        stop, start, window, incomplete = self._window_sums(end, window)
+        return np.where(incomplete, np.nan, self._statistic(stop, start, window, "mean"))[()]
+
+    def std(self, end, window, ddof: int = 1) -> np.ndarray:
+        """
+        Standard deviation of the window of bars ending at end (inclusive)
+
+        Args:
+            end: Bar position of the last value in the window; int or array
+            window: Bars in the window; int or array broadcastable with end
+            ddof: Delta degrees of freedom (1 for the sample deviation, as pandas)
+
+        Returns:
+            float or array of deviations (NaN where the window is incomplete)
+        """
+        stop, start, window, incomplete = self._window_sums(end, window)
+        return np.where(incomplete, np.nan, self._statistic(stop, start, window, "std", ddof))[()]
+
+    def _rolling(self, windows, kind: str, ddof: int = 1) -> np.ndarray:
+        # Every bar as a window end; the prefixes at both ends are plain slices of the state
+        single = np.ndim(windows) == 0
+        windows = np.atleast_1d(windows)
+        if np.any(windows < 1):
+            raise ValueError("Windows must have at least one bar")
+        n = len(self)
+        out = np.full((len(windows), n), np.nan)
+        for row, window in enumerate(windows):
+            window = int(window)
+            for begin in range(window, n + 1, BLOCK_SIZE):
+                stop = min(begin + BLOCK_SIZE, n + 1)
+                out[row, begin - 1:stop - 1] = self._statistic(self.state[:, begin:stop],
+                                                               self.state[:, begin - window:stop - window],
+                                                               window, kind, ddof)
+        return out[0] if single else out
+
+    def rolling_mean(self, windows) -> np.ndarray:
+        """
+        Trailing rolling mean of the whole series for one or many windows
+
+        Args:
+            windows: Window length, or a sequence of them
+
+        Returns:
+            Array of shape (bars,), or (windows, bars) for a sequence
+        """
+        return self._rolling(windows, "mean")
+
+    def rolling_std(self, windows, ddof: int = 1) -> np.ndarray:
+        """
+        Trailing rolling standard deviation of the whole series for one or many windows
+
+        Args:
+            windows: Window length, or a sequence of them
+            ddof: Delta degrees of freedom
+
+        Returns:
+            Array of shape (bars,), or (windows, bars) for a sequence
+        """
+        return self._rolling(windows, "std", ddof)
+
+    def bollinger_bands(self, window: int = 20, num_std: float = 2) -> tuple:
+        """
+        Bollinger Bands of the whole series
+
+        Args:
+            window: Moving average window, or a sequence of windows
+            num_std: Number of standard deviations
+
+        Returns:
+            Tuple of (upper, middle, lower) arrays
+        """
+        middle = self.rolling_mean(window)
+        width = num_std * self.rolling_std(window)
+        return middle + width, middle, middle - width
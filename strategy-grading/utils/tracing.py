@@ -0,0 +1,256 @@
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+class Span:
+    """
+    One timed stage; spans opened inside another span become its children
+
+    The path joins the names of all enclosing spans with "/", so the same
+    stage reached from different callers is reported separately.
+    """
+    __slots__ = ("tracer", "name", "path", "attrs", "start", "end", "pid", "tid", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.path = name
+        self.start = self.end = 0
+
+    def __enter__(self) -> "Span":
+        parent = _parent.get()
+        if parent is not None:
+            self.path = f"{parent.path}/{self.name}"
+        self._token = _parent.set(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter_ns()
+        _parent.reset(self._token)
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.spans.append(self)
+        return False
+
+    @property
+    def seconds(self) -> float:
+        return (self.end - self.start) / 1e9
+
+    def to_dict(self) -> dict:
+        """Plain-dict form, used to send spans between processes"""
+        return {"name": self.name, "path": self.path, "start": self.start, "end": self.end,
+                "pid": self.pid, "tid": self.tid, "attrs": self.attrs}
+
+class _NullSpan:
+    """Stand-in returned when tracing is off; entering and leaving it does nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _SpanRecord:
+    # A span received from another process (see Tracer.add)
+    __slots__ = ("name", "path", "start", "end", "pid", "tid", "attrs")
+
+    def __init__(self, record: dict):
+        for key in self.__slots__:
+            setattr(self, key, record[key])
+
+    seconds = Span.seconds
+    to_dict = Span.to_dict
+
+class Tracer:
+    """
+    Collects finished spans
+
+    Spans from any thread are appended to one list (appends are atomic
+    under the GIL), so a tracer can be shared by a thread pool.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.origin = time.perf_counter_ns()
+
+    def span(self, name: str, **attrs) -> Span:
+        """Open a span recorded by this tracer"""
+        return Span(self, name, attrs)
+
+    def add(self, records: list):
+        """Add spans exported with Span.to_dict, e.g. from worker processes"""
+        self.spans.extend(_SpanRecord(record) for record in records)
+
+    def drain(self) -> list:
+        """Remove and return every finished span as dicts"""
+        spans, self.spans = self.spans, []
+        return [span.to_dict() for span in spans]
+
+    def summary(self, by: str = "path") -> list:
+        """
+        Per-stage timing statistics
+
+        Args:
+            by: Group spans by "path" (stage within its callers) or "name"
+
+        Returns:
+            List of dicts with stage, count, total, mean, p50, p90, p99 and max
+            seconds, in order of first appearance
+        """
+        groups = {}
+        for span in sorted(self.spans, key=lambda s: s.start):
+            groups.setdefault(getattr(span, by), []).append(span.seconds)
+        rows = []
+        for stage, durations in groups.items():
+            durations.sort()
+            total = math.fsum(durations)
+            rows.append({
+                "stage": stage,
+                "count": len(durations),
+                "total": total,
+                "mean": total / len(durations),
+                "p50": percentile(durations, 50),
+                "p90": percentile(durations, 90),
+                "p99": percentile(durations, 99),
+                "max": durations[-1],
+            })
+        return rows
+
+    def to_chrome_trace(self) -> dict:
+        """Trace in the Chrome trace-event format (chrome://tracing, Perfetto)"""
+        events = [{
+            "name": span.name,
+            "cat": span.path,
+            "ph": "X",
+            "ts": (span.start - self.origin) / 1e3,
+            "dur": (span.end - span.start) / 1e3,
+            "pid": span.pid,
+            "tid": span.tid,
+            "args": span.attrs,
+        } for span in self.spans]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_json(self, path: str):
+        """Write the Chrome trace-event JSON file"""
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+
+    def to_prometheus(self, metric: str = "strategy_grading_stage_seconds") -> str:
+        """Per-stage summaries in the Prometheus text exposition format"""
+        lines = [f"# HELP {metric} Time spent in each analysis stage.", f"# TYPE {metric} summary"]
+        for row in self.summary():
+            stage = row["stage"].replace("\\", "\\\\").replace('"', '\\"')
+            for quantile in (50, 90, 99):
+                lines.append(f'{metric}{{stage="{stage}",quantile="{quantile / 100:g}"}} {row[f"p{quantile}"]:.9g}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {row["total"]:.9g}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {row["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write the Prometheus text-format file (e.g. for the node exporter textfile collector)"""
+        with open(path, "w") as f:
+            f.write(self.to_prometheus())
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Linearly interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return math.nan
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+# The tracer spans are recorded to in the current context, and the innermost open span
+_current = contextvars.ContextVar("strategy_grading_tracer", default=None)
+_parent = contextvars.ContextVar("strategy_grading_span", default=None)
+
+def get_tracer() -> Tracer:
+    """Tracer active in the current context, or None when tracing is off"""
+    return _current.get()
+
+def enable(tracer: Tracer = None) -> Tracer:
+    """
+    Turn tracing on for the current context and everything started from it
+
+    Args:
+        tracer: Tracer to record to (default: a new one)
+
+    Returns:
+        The active tracer
+    """
+    tracer = tracer or Tracer()
+    _current.set(tracer)
+    return tracer
+
+def disable():
+    """Turn tracing off for the current context"""
+    _current.set(None)
+
+class recording:
+    """
+    Context manager recording spans into a fresh tracer for the duration of a block
+
+    Only the current context is affected, so concurrent app sessions do not
+    record each other's work.
+    """
+
+    def __init__(self):
+        self.tracer = Tracer()
+
+    def __enter__(self) -> Tracer:
+        self._token = _current.set(self.tracer)
+        return self.tracer
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+def span(name: str, **attrs):
+    """
+    Time a block as a named stage
+
+    Args:
+        name: Stage name
+        **attrs: Extra fields stored with the span (e.g. ticker)
+
+    Returns:
+        Context manager; a shared no-op object when tracing is off
+    """
+    tracer = _current.get()
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, attrs)
+
+def traced(name: str = None):
+    """
+    Decorator timing every call of a function as a stage
+
+    Args:
+        name: Stage name (default: the function name)
+    """
+    def decorator(func):
+        stage = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _current.get()
+            if tracer is None:
+                return func(*args, **kwargs)
+            with Span(tracer, stage, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+if os.environ.get("STRATEGY_GRADING_TRACE"):
+    enable()
@@ -0,0 +1,211 @@
+import argparse
+import os
+import sys
+import threading
+import time
+import pandas as pd
+from data.data_fetcher import fetch_many
+from main import CachedAnalysis
+from utils import tracing
+from utils.result_cache import frame_fingerprint
+
+def read_watchlist(spec: str) -> list:
+    """
+    Parse a watchlist given as comma-separated tickers or as a file with one ticker per line
+
+    Args:
+        spec: "AAPL,MSFT" or a path; '#' starts a comment line in files
+
+    Returns:
+        List of ticker symbols
+    """
+    if os.path.isfile(spec):
+        with open(spec) as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [ticker.strip() for ticker in spec.split(",") if ticker.strip()]
+
+class WatchlistScheduler:
+    """
+    Refresh a watchlist after the market close and precompute its analyses
+
+    Once per weekday at run_at (market time), every watchlist ticker is
+    fetched through fetch_data with refresh=True, so the price store is
+    topped up past its freshness window. Downloads go through fetch_many,
+    which keeps to the provider's concurrency cap and rate limit and
+    retries failures. A ticker counts as updated when the content hash of
+    its fetched data changed since the last refresh (new bars, or a
+    revised last bar); only updated tickers get their indicator frame and
+    all-pairs statistics recomputed into the CachedAnalysis, so the first
+    request of the day is answered from memory.
+
+    The clock is injectable and run_pending() does one scheduling step, so
+    the scheduler can be driven without threads or real time in tests.
+    Periods are cut and the price store's freshness judged at the clock's
+    time as well, not the wall clock's.
+
+    Args:
+        tickers: Watchlist ticker symbols
+        analysis: Cache to prime (default: a new CachedAnalysis)
+        period: Time period to fetch and analyse
+        interval: Bar interval
+        provider: Data provider (default: the analysis cache's provider, else Yahoo Finance)
+        run_at: Time of day to refresh, "HH:MM" in the clock's timezone
+        timezone: Market timezone used by the default clock
+        clock: Callable returning the current time as a Timestamp
+        run_on_start: Refresh at the first run_pending() instead of waiting for run_at
+        max_workers: Concurrent downloads
+        retries: Retries per provider call after the first failure
+        backoff: Base backoff delay in seconds
+        poll_interval: Longest sleep of the background thread between clock checks
+    """
+
+    def __init__(self, tickers: list, analysis: CachedAnalysis = None, period: str = "6mo", interval: str = "1d",
+                 provider=None, run_at: str = "16:30", timezone: str = "America/New_York", clock=None,
+                 run_on_start: bool = False, max_workers: int = 8, retries: int = 2, backoff: float = 0.5,
+                 poll_interval: float = 60.0):
+        self.tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        self.analysis = analysis if analysis is not None else CachedAnalysis(provider=provider)
+        self.period = period
+        self.interval = interval
+        self.provider = provider if provider is not None else self.analysis.provider
+        self.hour, self.minute = (int(part) for part in run_at.split(":"))
+        self.clock = clock or (lambda: pd.Timestamp.now(tz=timezone))
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.poll_interval = poll_interval
+        self.fingerprints = {}
+        self.last_report = None
+        self.due = self.clock() if run_on_start else self.next_run()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def next_run(self, now: pd.Timestamp = None) -> pd.Timestamp:
+        """
+        Next weekday run_at strictly after now
+
+        Args:
+            now: Reference time (default: clock())
+
+        Returns:
+            Timestamp of the next scheduled refresh
+        """
+        now = self.clock() if now is None else now
+        candidate = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0, nanosecond=0)
+        if candidate <= now:
+            candidate += pd.DateOffset(days=1)
+        while candidate.weekday() >= 5:
+            candidate += pd.DateOffset(days=1)
+        return candidate
+
+    def refresh(self) -> dict:
+        """
+        Fetch the whole watchlist and recompute the tickers whose data changed
+
+        Returns:
+            Report dict with started, seconds, updated, unchanged and failed
+            (ticker -> error message); also kept in last_report
+        """
+        with self._lock:
+            started = self.clock()
+            wall = time.perf_counter()
+            with tracing.span("WatchlistScheduler.refresh", tickers=len(self.tickers)):
+                data, failed = fetch_many(self.tickers, self.period, self.interval, provider=self.provider,
+                                          max_workers=self.max_workers, retries=self.retries,
+                                          backoff=self.backoff, refresh=True, now=started)
+                updated, unchanged = [], []
+                for ticker in self.tickers:
+                    if ticker not in data:
+                        continue
+                    fingerprint = frame_fingerprint(data[ticker])
+                    if self.fingerprints.get(ticker) == fingerprint:
+                        unchanged.append(ticker)
+                        continue
+                    try:
+                        self.analysis.prime(ticker, data[ticker], self.period, self.interval)
+                    except Exception as e:
+                        failed[ticker] = str(e)
+                        continue
+                    self.fingerprints[ticker] = fingerprint
+                    updated.append(ticker)
+            self.last_report = {
+                "started": started,
+                "seconds": time.perf_counter() - wall,
+                "updated": updated,
+                "unchanged": unchanged,
+                "failed": failed,
+            }
+            return self.last_report
+
+    def run_pending(self) -> dict:
+        """
+        Refresh if the scheduled time has passed, then schedule the next run
+
+        Returns:
+            The refresh report, or None if nothing was due
+        """
+        now = self.clock()
+        if now < self.due:
+            return None
+        report = self.refresh()
+        self.due = self.next_run(now)
+        return report
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            wait = (self.due - self.clock()).total_seconds()
+            self._stop.wait(min(max(wait, 0.0), self.poll_interval))
+
+    def start(self):
+        """Run the schedule on a daemon thread until stop()"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="watchlist-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stop the background thread, waiting for a refresh in progress to finish"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+def cli(argv: list = None) -> int:
+    """
+    Keep the price store of a watchlist topped up from the command line
+
+    Args:
+        argv: Arguments (default: sys.argv[1:])
+
+    Returns:
+        Exit code: 0, or 1 if a --once refresh had failures
+    """
+    parser = argparse.ArgumentParser(description="Refresh a watchlist after every market close.")
+    parser.add_argument("watchlist", help="Comma-separated tickers or a file with one ticker per line")
+    parser.add_argument("-p", "--period", default="6mo", help="Time period (default: 6mo)")
+    parser.add_argument("-i", "--interval", default="1d", help="Bar interval (default: 1d)")
+    parser.add_argument("--at", default="16:30", help="Refresh time, HH:MM market time (default: 16:30)")
+    parser.add_argument("--timezone", default="America/New_York", help="Market timezone")
+    parser.add_argument("--once", action="store_true", help="Refresh now and exit")
+    args = parser.parse_args(argv)
+
+    scheduler = WatchlistScheduler(read_watchlist(args.watchlist), period=args.period, interval=args.interval,
+                                   run_at=args.at, timezone=args.timezone, run_on_start=True)
+    while True:
+        report = scheduler.run_pending()
+        if report is not None:
+            print(f"{report['started']:%Y-%m-%d %H:%M}: {len(report['updated'])} updated, "
+                  f"{len(report['unchanged'])} unchanged, {len(report['failed'])} failed "
+                  f"({report['seconds']:.1f}s)", file=sys.stderr)
+            for ticker, error in report["failed"].items():
+                print(f"  {ticker}: {error}", file=sys.stderr)
+            if args.once:
+                return 1 if report["failed"] else 0
+            print(f"Next refresh at {scheduler.due:%Y-%m-%d %H:%M %Z}", file=sys.stderr)
+        time.sleep(min(max((scheduler.due - scheduler.clock()).total_seconds(), 0.0), scheduler.poll_interval))
+
+if __name__ == "__main__":
+    sys.exit(cli())